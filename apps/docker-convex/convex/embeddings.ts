@@ -11,6 +11,7 @@ export type CreateDocumentEmbeddingInput = {
   embeddingDimensions: number;
   chunkText?: string;
   chunkIndex?: number;
+  chunkHash?: string;
   processingTimeMs?: number;
 };
 
@@ -26,6 +27,7 @@ export async function createDocumentEmbeddingFromDb(ctx: any, args: CreateDocume
     embeddingDimensions: args.embeddingDimensions,
     chunkText: args.chunkText,
     chunkIndex: args.chunkIndex,
+    chunkHash: args.chunkHash,
     processingTimeMs: args.processingTimeMs,
     isActive: true,
     createdAt: Date.now(),
@@ -37,6 +39,57 @@ export async function createDocumentEmbeddingFromDb(ctx: any, args: CreateDocume
   return embeddingId;
 }
 
+export type CreateDocumentEmbeddingsBatchInput = {
+  embeddings: CreateDocumentEmbeddingInput[];
+};
+
+export type CreateDocumentEmbeddingsBatchResult = {
+  results: { index: number; embeddingId?: string; error?: string }[];
+  insertedCount: number;
+  failedCount: number;
+};
+
+// Insert many chunk embeddings in one transaction; a chunk whose document is missing is
+// reported in its result instead of failing the whole batch
+export async function createDocumentEmbeddingsBatchInDb(
+  ctx: any,
+  args: CreateDocumentEmbeddingsBatchInput
+): Promise<CreateDocumentEmbeddingsBatchResult> {
+  const documentExists = new Map<string, boolean>();
+  const results: CreateDocumentEmbeddingsBatchResult["results"] = [];
+  const now = Date.now();
+  for (const [index, item] of args.embeddings.entries()) {
+    if (!documentExists.has(item.documentId)) {
+      documentExists.set(item.documentId, (await ctx.db.get(item.documentId)) !== null);
+    }
+    if (!documentExists.get(item.documentId)) {
+      results.push({ index, error: `Document not found: ${item.documentId}` });
+      continue;
+    }
+    const embeddingId = await ctx.db.insert("document_embeddings", {
+      documentId: item.documentId,
+      embedding: item.embedding,
+      embeddingModel: item.embeddingModel,
+      embeddingDimensions: item.embeddingDimensions,
+      chunkText: item.chunkText,
+      chunkIndex: item.chunkIndex,
+      chunkHash: item.chunkHash,
+      processingTimeMs: item.processingTimeMs,
+      isActive: true,
+      createdAt: now,
+    });
+    results.push({ index, embeddingId });
+  }
+  // One patch per document rather than one per chunk
+  for (const [documentId, exists] of documentExists) {
+    if (exists) {
+      await ctx.db.patch(documentId, { hasEmbedding: true, lastModified: now });
+    }
+  }
+  const insertedCount = results.filter((result) => result.embeddingId).length;
+  return { results, insertedCount, failedCount: results.length - insertedCount };
+}
+
 export type GetDocumentEmbeddingsInput = {
   documentId: string;
 };
@@ -49,6 +102,50 @@ export async function getDocumentEmbeddingsFromDb(ctx: any, args: GetDocumentEmb
     .collect();
 }
 
+export type GetDocumentChunkHashesInput = {
+  documentId: string;
+};
+
+// Active chunks of a document without their vectors, for incremental re-embedding
+export async function getDocumentChunkHashesFromDb(ctx: any, args: GetDocumentChunkHashesInput) {
+  const embeddings = await getDocumentEmbeddingsFromDb(ctx, args);
+  return embeddings.map((embedding: any) => ({
+    embeddingId: embedding._id,
+    chunkIndex: embedding.chunkIndex,
+    chunkHash: embedding.chunkHash ?? null,
+  }));
+}
+
+export type SyncDocumentChunksInput = {
+  documentId: string;
+  deactivate: string[];
+  reindex: { embeddingId: string; chunkIndex: number }[];
+};
+
+// Deactivate chunks that disappeared from a document and move kept chunks to their new positions
+export async function syncDocumentChunksInDb(ctx: any, args: SyncDocumentChunksInput) {
+  let deactivatedCount = 0;
+  let reindexedCount = 0;
+  for (const embeddingId of args.deactivate) {
+    const embedding = await ctx.db.get(embeddingId);
+    if (embedding && embedding.documentId === args.documentId && embedding.isActive) {
+      await ctx.db.patch(embeddingId, { isActive: false });
+      deactivatedCount++;
+    }
+  }
+  for (const { embeddingId, chunkIndex } of args.reindex) {
+    const embedding = await ctx.db.get(embeddingId);
+    if (embedding && embedding.documentId === args.documentId && embedding.chunkIndex !== chunkIndex) {
+      await ctx.db.patch(embeddingId, { chunkIndex });
+      reindexedCount++;
+    }
+  }
+  if (deactivatedCount || reindexedCount) {
+    await ctx.db.patch(args.documentId, { lastModified: Date.now() });
+  }
+  return { deactivatedCount, reindexedCount };
+}
+
 export type GetAllDocumentEmbeddingsInput = {};
 
 export async function getAllDocumentEmbeddingsFromDb(ctx: any, args: GetAllDocumentEmbeddingsInput) {
@@ -200,6 +297,7 @@ export const createDocumentEmbedding = mutation({
     embeddingDimensions: v.number(),
     chunkText: v.optional(v.string()),
     chunkIndex: v.optional(v.number()),
+    chunkHash: v.optional(v.string()),
     processingTimeMs: v.optional(v.number()),
   },
   handler: async (ctx, args) => {
@@ -207,6 +305,47 @@ export const createDocumentEmbedding = mutation({
   },
 });
 
+export const createDocumentEmbeddingsBatch = mutation({
+  args: {
+    embeddings: v.array(v.object({
+      documentId: v.id("rag_documents"),
+      embedding: v.array(v.number()),
+      embeddingModel: v.string(),
+      embeddingDimensions: v.number(),
+      chunkText: v.optional(v.string()),
+      chunkIndex: v.optional(v.number()),
+      chunkHash: v.optional(v.string()),
+      processingTimeMs: v.optional(v.number()),
+    })),
+  },
+  handler: async (ctx, args) => {
+    return createDocumentEmbeddingsBatchInDb(ctx, args);
+  },
+});
+
+export const getDocumentChunkHashes = query({
+  args: {
+    documentId: v.id("rag_documents"),
+  },
+  handler: async (ctx, args) => {
+    return getDocumentChunkHashesFromDb(ctx, args);
+  },
+});
+
+export const syncDocumentChunks = mutation({
+  args: {
+    documentId: v.id("rag_documents"),
+    deactivate: v.array(v.id("document_embeddings")),
+    reindex: v.array(v.object({
+      embeddingId: v.id("document_embeddings"),
+      chunkIndex: v.number(),
+    })),
+  },
+  handler: async (ctx, args) => {
+    return syncDocumentChunksInDb(ctx, args);
+  },
+});
+
 export const getDocumentEmbeddings = query({
   args: {
     documentId: v.id("rag_documents"),
@@ -276,6 +276,24 @@ http.route({
   handler: embeddingRoutes.createDocumentEmbeddingAPI,
 });
 
+http.route({
+  path: "/api/embeddings/createDocumentEmbeddingsBatch",
+  method: "POST",
+  handler: embeddingRoutes.createDocumentEmbeddingsBatchAPI,
+});
+
+http.route({
+  path: "/api/embeddings/chunk-hashes",
+  method: "GET",
+  handler: embeddingRoutes.getDocumentChunkHashesAPI,
+});
+
+http.route({
+  path: "/api/embeddings/sync-chunks",
+  method: "POST",
+  handler: embeddingRoutes.syncDocumentChunksAPI,
+});
+
 http.route({
   path: "/api/embeddings/atlas-data",
   method: "GET",
@@ -71,7 +71,7 @@ export const generateDocumentEmbeddingAPI = httpAction(async (ctx, request) => {
 export const createDocumentEmbeddingAPI = httpAction(async (ctx, request) => {
   try {
     const body = await request.json();
-    const { documentId, embedding, embeddingModel, embeddingDimensions, chunkText, chunkIndex, processingTimeMs } = body;
+    const { documentId, embedding, embeddingModel, embeddingDimensions, chunkText, chunkIndex, chunkHash, processingTimeMs } = body;
     if (!documentId || !embedding) {
       return errorResponse("Missing required fields: documentId, embedding", 400);
     }
@@ -83,6 +83,7 @@ export const createDocumentEmbeddingAPI = httpAction(async (ctx, request) => {
       embeddingDimensions: embeddingDimensions || embedding.length,
       chunkText,
       chunkIndex,
+      chunkHash,
       processingTimeMs
     };
     
@@ -102,6 +103,63 @@ export const createDocumentEmbeddingAPI = httpAction(async (ctx, request) => {
   }
 });
 
+// Create many chunk embeddings in one request; results are reported per item, in order
+export const createDocumentEmbeddingsBatchAPI = httpAction(async (ctx, request) => {
+  try {
+    const body = await request.json();
+    const { embeddings } = body;
+    if (!Array.isArray(embeddings) || embeddings.length === 0) {
+      return errorResponse("Missing required field: embeddings (non-empty array)", 400);
+    }
+    
+    // Items missing required fields fail on their own; the rest go to the mutation
+    const results: { index: number; embeddingId?: string; error?: string }[] = [];
+    const valid: { index: number; args: CreateDocumentEmbeddingInput }[] = [];
+    embeddings.forEach((item: any, index: number) => {
+      if (!item || !item.documentId || !Array.isArray(item.embedding)) {
+        results.push({ index, error: "Missing required fields: documentId, embedding" });
+        return;
+      }
+      valid.push({
+        index,
+        args: {
+          documentId: item.documentId as Id<"rag_documents">,
+          embedding: item.embedding,
+          embeddingModel: item.embeddingModel || "all-MiniLM-L6-v2",
+          embeddingDimensions: item.embeddingDimensions || item.embedding.length,
+          chunkText: item.chunkText,
+          chunkIndex: item.chunkIndex,
+          chunkHash: item.chunkHash,
+          processingTimeMs: item.processingTimeMs
+        }
+      });
+    });
+    
+    if (valid.length > 0) {
+      // @ts-expect-error
+      const batch = await ctx.runMutation(api.embeddings.createDocumentEmbeddingsBatch, {
+        embeddings: valid.map((item) => item.args)
+      });
+      for (const result of batch.results) {
+        results.push({ ...result, index: valid[result.index].index });
+      }
+    }
+    results.sort((a, b) => a.index - b.index);
+    
+    const insertedCount = results.filter((result) => result.embeddingId).length;
+    return successResponse({
+      success: insertedCount === results.length,
+      results,
+      insertedCount,
+      failedCount: results.length - insertedCount
+    }, insertedCount > 0 ? 201 : 200);
+  } catch (e) {
+    const message = e instanceof Error ? e.message : "Unknown error";
+    console.error("Error creating document embeddings batch:", e);
+    return errorResponse("Failed to create document embeddings batch", 500, message);
+  }
+});
+
 // Get document embeddings
 export const getDocumentEmbeddingsAPI = httpAction(async (ctx, request) => {
   try {
@@ -125,6 +183,58 @@ export const getDocumentEmbeddingsAPI = httpAction(async (ctx, request) => {
   }
 });
 
+// Get the chunk hashes of a document's active embeddings (no vectors)
+export const getDocumentChunkHashesAPI = httpAction(async (ctx, request) => {
+  try {
+    const url = new URL(request.url);
+    const documentId = url.searchParams.get("documentId");
+    if (!documentId) {
+      return errorResponse("Missing documentId parameter", 400);
+    }
+    
+    // @ts-expect-error
+    const chunks = await ctx.runQuery(api.embeddings.getDocumentChunkHashes, {
+      documentId: documentId as Id<"rag_documents">
+    });
+    return successResponse({
+      success: true,
+      chunks,
+      count: chunks.length
+    });
+  } catch (e) {
+    const message = e instanceof Error ? e.message : "Unknown error";
+    console.error("Error fetching document chunk hashes:", e);
+    return errorResponse("Failed to fetch document chunk hashes", 500, message);
+  }
+});
+
+// Deactivate removed chunks and renumber kept chunks after an incremental re-embed
+export const syncDocumentChunksAPI = httpAction(async (ctx, request) => {
+  try {
+    const body = await request.json();
+    const { documentId, deactivate = [], reindex = [] } = body;
+    if (!documentId) {
+      return errorResponse("Missing required field: documentId", 400);
+    }
+    
+    // @ts-expect-error
+    const result = await ctx.runMutation(api.embeddings.syncDocumentChunks, {
+      documentId: documentId as Id<"rag_documents">,
+      deactivate,
+      reindex
+    });
+    
+    return successResponse({
+      success: true,
+      ...result
+    });
+  } catch (e) {
+    const message = e instanceof Error ? e.message : "Unknown error";
+    console.error("Error syncing document chunks:", e);
+    return errorResponse("Failed to sync document chunks", 500, message);
+  }
+});
+
 // Get all document embeddings
 export const getAllDocumentEmbeddingsAPI = httpAction(async (ctx, request) => {
   try {
@@ -35,6 +35,7 @@ export default defineSchema({
     embeddingDimensions: v.number(), // Number of dimensions in the embedding
     chunkIndex: v.optional(v.number()), // For chunked documents, which chunk this is
     chunkText: v.optional(v.string()), // Text content of this chunk
+    chunkHash: v.optional(v.string()), // Hash of model + chunk text, used to diff re-chunked documents
     createdAt: v.number(), // When embedding was generated
     processingTimeMs: v.optional(v.number()), // Time taken to generate embedding
     isActive: v.boolean(), // Whether embedding is active for search
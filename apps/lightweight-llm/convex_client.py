@@ -0,0 +1 @@
+../../packages/python-convex-client/convex_client.py
\ No newline at end of file
@@ -21,6 +21,7 @@ import psutil
 import gc
 import time
 from status_reporter import StatusReporter
+from convex_client import ConvexClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +41,8 @@ N_GPU_LAYERS = int(os.getenv("N_GPU_LAYERS", "0"))  # GPU layers (0 for CPU only
 # Status reporting configuration
 CONVEX_URL = os.getenv("CONVEX_URL", "http://localhost:3211")
 SERVICE_NAME = "lightweight-llm"
+# Pooled Convex client shared by everything that calls the backend
+convex = ConvexClient.from_env(CONVEX_URL, pool_size=int(os.getenv("CONVEX_POOL_SIZE", "4")))
 
 MAX_TOKENS = 512
 TEMPERATURE = 0.7
@@ -212,7 +215,7 @@ async def lifespan(app: FastAPI):
     logger.info("Starting lightweight LLM service...")
     
     # Initialize status reporter
-    status_reporter = StatusReporter(SERVICE_NAME, CONVEX_URL)
+    status_reporter = StatusReporter(SERVICE_NAME, CONVEX_URL, client=convex)
     status_reporter.send_startup_status()
     
     try:
@@ -233,6 +236,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down lightweight LLM service...")
     cleanup_model()
+    convex.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -565,6 +569,11 @@ async def get_model_info():
         "langextract": langextract_status
     }
 
+@app.get("/convex-client")
+async def get_convex_client_stats():
+    """Convex client metrics: connection reuse, retries and per-endpoint latency histograms"""
+    return convex.get_stats()
+
 class QueryClassificationRequest(BaseModel):
     model_config = {"protected_namespaces": ()}
     
@@ -1,4 +1,3 @@
-import requests
 import psutil
 import time
 import os
@@ -6,12 +5,16 @@ import logging
 import threading
 from typing import Dict, Any, Optional
 
+from convex_client import ConvexClient
+
 class StatusReporter:
     """Utility class for reporting service status to Convex backend"""
     
-    def __init__(self, service_name: str, convex_url: str):
+    def __init__(self, service_name: str, convex_url: str, client: Optional[ConvexClient] = None):
         self.service_name = service_name
         self.convex_url = convex_url
+        # Share the service's pooled client when given one, so reports reuse its connections
+        self.client = client or ConvexClient.from_env(convex_url, pool_size=2)
         self.start_time = time.time()
         self.logger = logging.getLogger(__name__)
         
@@ -83,10 +86,11 @@ class StatusReporter:
             if degraded_mode is not None:
                 payload["degradedMode"] = degraded_mode
             
-            response = requests.post(
+            # A status report replaces the previous one, so it is safe to retry
+            response = self.client.post(
                 f"{self.convex_url}/updateServiceStatus",
                 json=payload,
-                timeout=10
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -0,0 +1,257 @@
+"""
+Embedding Batching Module
+=========================
+
+Helpers for grouping texts into efficient model calls.
+
+MicroBatcher collects concurrent encode requests (from /embed, /encode and
+any other caller) into a single forward pass. Each request waits at most
+``max_wait_ms`` for company and a batch never exceeds ``max_batch_size``
+texts; every caller receives only its own rows back.
+
+encode_length_bucketed sorts a document's chunks by token length and
+encodes them bucket by bucket, so each batch pads to a similar length,
+then restores the original chunk order.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Gathers concurrent single-text encode requests into shared batches"""
+
+    def __init__(self,
+                 encode_fn: Callable[[List[str]], Sequence[Any]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 name: str = "default"):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._pending: List[tuple] = []  # (text, future, enqueued_at)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+        # Counters reported through get_stats()
+        self.batches_run = 0
+        self.items_encoded = 0
+        self.largest_batch = 0
+        self.total_wait_ms = 0.0
+
+    def _ensure_worker(self):
+        """Start the batching thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name=f"micro-batcher-{self.name}", daemon=True
+            )
+            self._thread.start()
+            logger.info(
+                f"Micro-batcher '{self.name}' started "
+                f"(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:.1f})"
+            )
+
+    def submit(self, text: str) -> Future:
+        """Queue a single text and return a future resolving to its embedding row"""
+        return self.submit_many([text])[0]
+
+    def submit_many(self, texts: Sequence[str]) -> List[Future]:
+        """Queue several texts; each gets its own future"""
+        if self._closed:
+            return self._encode_directly(texts)
+        futures = []
+        now = time.monotonic()
+        with self._condition:
+            self._ensure_worker()
+            for text in texts:
+                future = Future()
+                self._pending.append((text, future, now))
+                futures.append(future)
+            self._condition.notify()
+        return futures
+
+    def encode(self, texts: Sequence[str]) -> List[Any]:
+        """Encode texts through the shared batches, blocking until all rows are ready"""
+        return [future.result() for future in self.submit_many(texts)]
+
+    def _encode_directly(self, texts: Sequence[str]) -> List[Future]:
+        """Encode without batching (after close), returning already-resolved futures"""
+        futures = [Future() for _ in texts]
+        try:
+            rows = self.encode_fn(list(texts))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return futures
+        for future, row in zip(futures, rows):
+            future.set_result(row)
+        return futures
+
+    def close(self):
+        """Stop the batching thread once queued work is done; later calls encode directly"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _take_batch(self) -> List[tuple]:
+        """Wait for work, then hold the window open until it fills or times out"""
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return []
+                self._condition.wait()
+
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        """Batching loop: one model call per collected batch"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            texts = [text for text, _, _ in batch]
+            started = time.monotonic()
+
+            try:
+                rows = self.encode_fn(texts)
+                if len(rows) != len(batch):
+                    raise RuntimeError(
+                        f"Encoder returned {len(rows)} rows for {len(batch)} texts"
+                    )
+            except Exception as e:
+                logger.error(f"Micro-batch of {len(batch)} texts failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), row in zip(batch, rows):
+                future.set_result(row)
+
+            self.batches_run += 1
+            self.items_encoded += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.total_wait_ms += sum((started - enqueued) * 1000 for _, _, enqueued in batch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching counters for the health endpoint"""
+        with self._condition:
+            queue_depth = len(self._pending)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+            'batches_run': self.batches_run,
+            'items_encoded': self.items_encoded,
+            'avg_batch_size': round(self.items_encoded / self.batches_run, 2) if self.batches_run else 0,
+            'largest_batch': self.largest_batch,
+            'avg_wait_ms': round(self.total_wait_ms / self.items_encoded, 2) if self.items_encoded else 0,
+            'queue_depth': queue_depth
+        }
+
+
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consume an iterable (e.g. a chunk stream) in lists of at most size items"""
+    iterator = iter(items)
+    size = max(1, int(size))
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# Token-length bucket upper bounds; longer texts share the last (overflow) bucket
+DEFAULT_BUCKET_BOUNDARIES = (32, 64, 128, 256, 512)
+
+
+def plan_length_buckets(lengths: Sequence[int],
+                        boundaries: Sequence[int] = DEFAULT_BUCKET_BOUNDARIES) -> List[List[int]]:
+    """Group text indices into length buckets, each sorted by ascending length"""
+    buckets: List[List[int]] = [[] for _ in range(len(boundaries) + 1)]
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        position = 0
+        while position < len(boundaries) and lengths[index] > boundaries[position]:
+            position += 1
+        buckets[position].append(index)
+    return [bucket for bucket in buckets if bucket]
+
+
+class FixedTokenBudget:
+    """Static batch sizing: as many texts as fit a fixed padded-token budget"""
+
+    def __init__(self, tokens_per_batch: int = 4096, max_batch_size: int = 64):
+        self.tokens_per_batch = max(1, int(tokens_per_batch))
+        self.max_batch_size = max(1, int(max_batch_size))
+
+    def batch_size_for(self, max_tokens: int) -> int:
+        return max(1, min(self.max_batch_size, self.tokens_per_batch // max(1, max_tokens)))
+
+    def observe(self, batch_size: int, max_tokens: int, run: Callable[[], Any]) -> Any:
+        return run()
+
+    def shrink(self, batch_size: int, max_tokens: int, error: Exception):
+        logger.warning(f"Batch of {batch_size} x {max_tokens} tokens failed ({error}); splitting")
+
+
+def encode_length_bucketed(texts: Sequence[str],
+                           lengths: Sequence[int],
+                           encode_fn: Callable[[List[str]], Sequence[Any]],
+                           sizer: Any,
+                           boundaries: Sequence[int] = DEFAULT_BUCKET_BOUNDARIES) -> List[Any]:
+    """
+    Encode texts in length-sorted buckets to minimise padding, returning rows in
+    the original order.
+
+    The sizer (FixedTokenBudget or memory_budget.AdaptiveBatchSizer) picks each
+    batch size via batch_size_for(max_tokens), wraps each model call in
+    observe() and is told about failures through shrink(). A failed batch is
+    split in half and retried until single texts remain; texts that still fail
+    get None in their slot so callers can keep chunk indices aligned.
+    """
+    rows: List[Any] = [None] * len(texts)
+
+    def encode_with_backoff(indices: List[int], max_tokens: int):
+        try:
+            encoded = sizer.observe(
+                len(indices), max_tokens, lambda: encode_fn([texts[i] for i in indices])
+            )
+            for i, row in zip(indices, encoded):
+                rows[i] = row
+        except Exception as batch_error:
+            if len(indices) == 1:
+                logger.error(f"Failed to encode text {indices[0] + 1}/{len(texts)}: {batch_error}")
+                return
+            sizer.shrink(len(indices), max_tokens, batch_error)
+            middle = len(indices) // 2
+            encode_with_backoff(indices[:middle], max_tokens)
+            encode_with_backoff(indices[middle:], max_tokens)
+
+    for bucket in plan_length_buckets(lengths, boundaries):
+        position = 0
+        while position < len(bucket):
+            # Re-plan every batch so adaptive sizers can grow or shrink mid-bucket
+            remaining = bucket[position:]
+            max_tokens = lengths[remaining[-1]]
+            batch_size = max(1, int(sizer.batch_size_for(max_tokens)))
+            indices = remaining[:batch_size]
+            encode_with_backoff(indices, lengths[indices[-1]])
+            position += len(indices)
+
+    return rows
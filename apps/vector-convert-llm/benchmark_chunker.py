@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Golden comparison and micro-benchmark for the semantic chunker
+
+Runs chunking.semantic_chunk_document against a verbatim copy of the
+original implementation (kept below) over a generated corpus of structured
+documents and edge cases, and checks that stream_chunk_document yields
+exactly what chunk_document returns, failing on any output difference. It
+then times both chunkers on multi-megabyte inputs and compares peak
+allocations of the list and streaming APIs.
+
+The same comparisons run as tests in tests/test_chunking_golden.py.
+
+Usage: python benchmark_chunker.py [--size-mb 4] [--repeat 3]
+"""
+
+import argparse
+import io
+import logging
+import random
+import re
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from chunking import chunk_document, semantic_chunk_document, stream_chunk_document
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Original implementation, kept verbatim as the golden reference
+# ---------------------------------------------------------------------------
+
+def legacy_semantic_chunk_document(content: str, max_chunk_size: int = 1000) -> List[str]:
+    """Semantic chunking that preserves numbered lists and structured content"""
+    try:
+        lines = content.split('\n')
+        chunks = []
+        current_chunk = []
+        current_size = 0
+        
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            
+            # Check if this line starts a numbered list or structured section
+            if legacy_is_section_start(line):
+                # Save current chunk if it exists
+                if current_chunk and current_size > 100:  # Only save substantial chunks
+                    chunks.append('\n'.join(current_chunk).strip())
+                    current_chunk = []
+                    current_size = 0
+                
+                # Collect the entire section/numbered item with its sub-items
+                section_lines = legacy_collect_section(lines, i)
+                section_text = '\n'.join(section_lines).strip()
+                
+                # If section is too large, split it but keep related content together
+                if len(section_text) > max_chunk_size:
+                    # Try to split at sub-items while keeping main item intact
+                    sub_chunks = legacy_split_large_section(section_text, max_chunk_size)
+                    chunks.extend(sub_chunks)
+                else:
+                    # Add section as a single chunk
+                    if section_text:
+                        chunks.append(section_text)
+                
+                # Skip the lines we just processed
+                i += len(section_lines)
+                continue
+            
+            # Regular line processing
+            line_with_newline = lines[i]
+            if current_size + len(line_with_newline) > max_chunk_size and current_chunk:
+                # Save current chunk and start new one
+                chunks.append('\n'.join(current_chunk).strip())
+                current_chunk = [line_with_newline]
+                current_size = len(line_with_newline)
+            else:
+                current_chunk.append(line_with_newline)
+                current_size += len(line_with_newline) + 1  # +1 for newline
+            
+            i += 1
+        
+        # Add final chunk
+        if current_chunk:
+            final_chunk = '\n'.join(current_chunk).strip()
+            if final_chunk:
+                chunks.append(final_chunk)
+        
+        # Filter out very small chunks and merge them with adjacent ones
+        filtered_chunks = []
+        for chunk in chunks:
+            if len(chunk.strip()) < 50 and filtered_chunks:
+                # Merge small chunk with previous one
+                filtered_chunks[-1] += '\n\n' + chunk
+            elif len(chunk.strip()) >= 50:
+                filtered_chunks.append(chunk)
+        
+        return filtered_chunks if len(filtered_chunks) > 1 else []
+        
+    except Exception as e:
+        logger.error(f"Error in semantic chunking: {e}")
+        return []
+
+
+def legacy_is_section_start(line: str) -> bool:
+    """Check if line starts a new section (numbered item, header, etc.)"""
+    line = line.strip()
+    if not line:
+        return False
+    
+    # Numbered lists (1., 2., etc.)
+    if re.match(r'^\d+\.\s', line):
+        return True
+    
+    # Lettered lists (a., b., etc.)
+    if re.match(r'^[a-zA-Z]\.\s', line):
+        return True
+    
+    # Bullet points
+    if re.match(r'^[-*•]\s', line):
+        return True
+    
+    # Headers (markdown style)
+    if line.startswith('#'):
+        return True
+    
+    # Step indicators
+    if re.match(r'^(step|phase|stage)\s*\d+', line.lower()):
+        return True
+    
+    return False
+
+
+def legacy_collect_section(lines: List[str], start_idx: int) -> List[str]:
+    """Collect all lines belonging to a section starting at start_idx"""
+    section_lines = [lines[start_idx]]
+    i = start_idx + 1
+    
+    while i < len(lines):
+        line = lines[i].strip()
+        
+        # Empty line - include it but check next line
+        if not line:
+            section_lines.append(lines[i])
+            i += 1
+            continue
+        
+        # If we hit another section start, stop
+        if legacy_is_section_start(line):
+            break
+        
+        # Include lines that seem to be part of this section
+        # (indented content, continuation, sub-items)
+        if (lines[i].startswith('  ') or  # Indented
+            lines[i].startswith('\t') or  # Tabbed
+            re.match(r'^\s*[a-zA-Z]\.|^\s*[-*•]', line) or  # Sub-items
+            not re.match(r'^\d+\.', line)):  # Not a new numbered item
+            section_lines.append(lines[i])
+        else:
+            break
+        
+        i += 1
+    
+    return section_lines
+
+
+def legacy_split_large_section(section_text: str, max_size: int) -> List[str]:
+    """Split a large section while trying to preserve semantic meaning"""
+    # Try to split at natural boundaries within the section
+    lines = section_text.split('\n')
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    
+    for line in lines:
+        if current_size + len(line) > max_size and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk = [line]
+            current_size = len(line)
+        else:
+            current_chunk.append(line)
+            current_size += len(line) + 1
+    
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+EDGE_CASES = [
+    "",
+    "\n\n\n",
+    "single line",
+    "1. only item",
+    "# Header\n" + "text " * 40,
+    "1.5 litres of water\n2.5 litres of milk\n" + "filler " * 30,
+    "1. First\n1.5 not a new item\n  2. indented item\n\t3. tabbed\n4.\n5. next",
+    "STEP 1 do this\nStep2 then that\nphase 3\nStAgE 4 finish\n" + "more text " * 20,
+    "\u017ftep 1 long s is not a step\n" + "x " * 60,
+    "\u0661. arabic-indic digit item\n\u0662. second\n" + "y " * 60,
+    "a. lettered\nb. lettered\n- bullet\n* star\n\u2022 dot\n#tag\n" + "z " * 60,
+    "   \u00a0 \n1.\u00a0non-breaking space\n" + "w " * 80,
+    "Intro paragraph that is long enough to be flushed before a section. " * 3 + "\n1. item\n" * 3,
+    "\r\n".join(["1. windows", "   detail", "2. second", "text " * 30]),
+]
+
+_WORDS = "the service embeds document chunks for vector search and answers questions quickly".split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 25))).capitalize() + "."
+
+
+def generate_document(rng: random.Random, target_chars: int) -> str:
+    """Markdown-ish document mixing prose, headers, numbered/lettered/bulleted lists and steps"""
+    lines: List[str] = []
+    size = 0
+    while size < target_chars:
+        kind = rng.random()
+        if kind < 0.1:
+            line = "#" * rng.randint(1, 3) + " " + _sentence(rng)
+        elif kind < 0.3:
+            line = f"{rng.randint(1, 30)}. {_sentence(rng)}"
+        elif kind < 0.35:
+            line = f"{rng.randint(1, 9)}.{rng.randint(0, 9)} {_sentence(rng)}"
+        elif kind < 0.45:
+            line = rng.choice(["  ", "\t", "    "]) + rng.choice(["- ", "a. ", "", "1. "]) + _sentence(rng)
+        elif kind < 0.5:
+            line = f"{rng.choice(['a', 'B', 'c'])}. {_sentence(rng)}"
+        elif kind < 0.55:
+            line = f"{rng.choice(['-', '*', '•'])} {_sentence(rng)}"
+        elif kind < 0.6:
+            line = f"{rng.choice(['Step', 'PHASE', 'stage'])}{rng.choice(['', ' '])}{rng.randint(1, 9)}: {_sentence(rng)}"
+        elif kind < 0.7:
+            line = ""
+        else:
+            line = " ".join(_sentence(rng) for _ in range(rng.randint(1, 8)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def golden_corpus(seed: int = 1234, documents: int = 300) -> List[str]:
+    rng = random.Random(seed)
+    corpus = list(EDGE_CASES)
+    for _ in range(documents):
+        corpus.append(generate_document(rng, rng.choice([200, 1500, 6000, 30000])))
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def check_golden() -> bool:
+    corpus = golden_corpus()
+    mismatches = 0
+    for index, document in enumerate(corpus):
+        for max_chunk_size in (100, 500, 1000, 4000):
+            expected = legacy_semantic_chunk_document(document, max_chunk_size)
+            actual = semantic_chunk_document(document, max_chunk_size)
+            if actual != expected:
+                mismatches += 1
+                print(f"   ❌ Mismatch: document {index}, max_chunk_size={max_chunk_size}")
+    print(f"   {len(corpus)} documents x 4 chunk sizes, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def check_streaming() -> bool:
+    """stream_chunk_document must yield exactly chunk_document's output for any source type"""
+    corpus = golden_corpus(documents=60)
+    mismatches = 0
+    for index, document in enumerate(corpus):
+        for chunk_size in (300, 1000):
+            expected = chunk_document(document, "text", chunk_size, 200)
+            sources = {
+                'str': document,
+                'file': io.StringIO(document),
+                'pieces': (document[i:i + 97] for i in range(0, len(document), 97)),
+                'bytes': io.BytesIO(document.encode('utf-8')),
+            }
+            for name, source in sources.items():
+                actual = list(stream_chunk_document(source, "text", chunk_size, 200))
+                if actual != expected:
+                    mismatches += 1
+                    print(f"   ❌ Streaming mismatch: document {index}, chunk_size={chunk_size}, source={name}")
+    print(f"   {len(corpus)} documents x 2 chunk sizes x 4 source types, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def best_time(fn, content: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(content, 1000)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, nargs='+', default=[1, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print("🔍 Golden comparison against the original chunker")
+    print("=" * 60)
+    if not check_golden():
+        print("❌ Output differs from the original implementation")
+        sys.exit(1)
+    print("   ✅ Byte-identical output")
+
+    print("\n🔍 Streaming chunker against chunk_document")
+    print("=" * 60)
+    if not check_streaming():
+        print("❌ Streaming output differs from chunk_document")
+        sys.exit(1)
+    print("   ✅ Identical output")
+
+    print("\n⏱️  Benchmark (best of %d)" % args.repeat)
+    print("=" * 60)
+    rng = random.Random(42)
+    for size_mb in args.size_mb:
+        content = generate_document(rng, int(size_mb * 1024 * 1024))
+        legacy = best_time(legacy_semantic_chunk_document, content, args.repeat)
+        current = best_time(semantic_chunk_document, content, args.repeat)
+        print(f"   {size_mb:>5.1f} MB: original {legacy * 1000:8.1f} ms, "
+              f"single-pass {current * 1000:8.1f} ms ({legacy / current:.2f}x)")
+
+        encoded = content.encode('utf-8')
+        del content
+        listed = peak_memory(lambda: chunk_document(encoded.decode('utf-8')))
+        streamed = peak_memory(lambda: sum(1 for _ in stream_chunk_document(io.BytesIO(encoded))))
+        print(f"   {'':>5} peak allocations: chunk_document {listed / 1024 / 1024:6.1f} MB, "
+              f"stream_chunk_document from a file {streamed / 1024 / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
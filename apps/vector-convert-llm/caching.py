@@ -0,0 +1,352 @@
+"""
+Caching Module
+==============
+
+Content-addressed caches for the vector conversion service.
+
+LRUByteCache is an in-memory LRU bounded by total payload bytes rather than
+entry count. DiskCache is an optional SQLite-backed tier that survives
+restarts. EmbeddingCache layers the two and keys embeddings by a hash of
+the model's identity (name, revision and inference backend, since the disk
+tier outlives a backend switch), normalization flag and the exact text.
+ChunkCache does the same for chunking results, keyed by a hash of the
+document content and every parameter that affects how it is split.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping overhead (key string, OrderedDict node, array header)
+ENTRY_OVERHEAD_BYTES = 160
+
+
+class LRUByteCache:
+    """Thread-safe LRU cache evicting least-recently-used entries past a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int):
+        size = int(size) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+
+class DiskCache:
+    """SQLite-backed byte store with least-recently-accessed eviction"""
+
+    def __init__(self, directory: str, max_bytes: int, filename: str = "cache.sqlite3"):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self.current_bytes = int(row[0])
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return bytes(row[0])
+
+    def put(self, key: str, value: bytes):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if previous is not None:
+                self.current_bytes -= previous[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, time.time())
+            )
+            self.current_bytes += size
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop the least recently accessed entries until under budget (lock held)"""
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall()
+        for key, size in rows:
+            if self.current_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                'path': self.path,
+                'entries': entries,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by model identity, normalization flag and text"""
+
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[str] = None, max_disk_bytes: int = 0):
+        self.memory = LRUByteCache(max_memory_bytes)
+        self.disk = None
+        if disk_dir:
+            try:
+                self.disk = DiskCache(disk_dir, max_disk_bytes, filename="embeddings.sqlite3")
+                logger.info(f"Embedding disk cache enabled at {self.disk.path}")
+            except Exception as e:
+                logger.error(f"Failed to open embedding disk cache in {disk_dir}: {e}")
+
+    @staticmethod
+    def make_key(model_key: str, normalize: bool, text: str) -> str:
+        """Content address for one embedding"""
+        digest = hashlib.sha256()
+        digest.update(model_key.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(b'1' if normalize else b'0')
+        digest.update(b'\0')
+        digest.update(str(text).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        row = self.memory.get(key)
+        if row is not None:
+            return row
+        if self.disk is not None:
+            blob = self.disk.get(key)
+            if blob is not None:
+                row = np.frombuffer(blob, dtype=np.float32)
+                self.memory.put(key, row, row.nbytes)
+                return row
+        return None
+
+    def _store(self, key: str, row: np.ndarray):
+        row = np.array(row, dtype=np.float32)  # own copy so the batch array can be freed
+        row.setflags(write=False)
+        self.memory.put(key, row, row.nbytes)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, row.tobytes())
+            except Exception as e:
+                logger.error(f"Failed to write embedding to disk cache: {e}")
+
+    def encode(self,
+               texts: Sequence[str],
+               encode_fn: Callable[[List[str]], Any],
+               model_key: str,
+               normalize: bool) -> np.ndarray:
+        """Return embeddings for texts, encoding only cache misses (each unique miss once)
+
+        model_key must change whenever the vectors would, e.g. LoadedModel.vector_identity.
+        """
+        keys = [self.make_key(model_key, normalize, text) for text in texts]
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, key in enumerate(keys):
+            if key in missing:
+                missing[key].append(i)
+                continue
+            row = self._lookup(key)
+            if row is None:
+                missing[key] = [i]
+            else:
+                rows[i] = row
+
+        if missing:
+            miss_keys = list(missing.keys())
+            encoded = np.asarray(encode_fn([texts[missing[key][0]] for key in miss_keys]))
+            for key, row in zip(miss_keys, encoded):
+                self._store(key, row)
+                for i in missing[key]:
+                    rows[i] = row
+
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters for the health endpoint"""
+        memory = self.memory.get_stats()
+        disk = self.disk.get_stats() if self.disk is not None else None
+        hits = memory['hits'] + (disk['hits'] if disk else 0)
+        misses = disk['misses'] if disk else memory['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': memory['evictions'] + (disk['evictions'] if disk else 0),
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0,
+            'memory': memory,
+            'disk': disk
+        }
+
+
+class ChunkCache:
+    """Two-tier cache of chunk lists keyed by content hash and splitter parameters"""
+
+    def __init__(self,
+                 max_memory_bytes: int,
+                 disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 0,
+                 max_entry_bytes: Optional[int] = None):
+        self.memory = LRUByteCache(max_memory_bytes)
+        # Streams are only recorded up to this size, so caching never holds a huge document's chunks
+        self.max_entry_bytes = int(max_entry_bytes if max_entry_bytes is not None else max_memory_bytes // 4)
+        self.disk = None
+        self.abandoned = 0
+        if disk_dir:
+            try:
+                self.disk = DiskCache(disk_dir, max_disk_bytes, filename="chunks.sqlite3")
+                logger.info(f"Chunk disk cache enabled at {self.disk.path}")
+            except Exception as e:
+                logger.error(f"Failed to open chunk disk cache in {disk_dir}: {e}")
+
+    @staticmethod
+    def make_key(content: str, **params: Any) -> str:
+        """Content address for one chunking result; params must include everything that affects the split"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(content.encode('utf-8', errors='surrogatepass'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _size(chunks: Sequence[str]) -> int:
+        return sum(len(chunk) for chunk in chunks) + 8 * len(chunks)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        chunks = self.memory.get(key)
+        if chunks is not None:
+            return list(chunks)
+        if self.disk is not None:
+            blob = self.disk.get(key)
+            if blob is not None:
+                chunks = tuple(json.loads(blob.decode('utf-8')))
+                self.memory.put(key, chunks, self._size(chunks))
+                return list(chunks)
+        return None
+
+    def put(self, key: str, chunks: Sequence[str]):
+        chunks = tuple(chunks)
+        self.memory.put(key, chunks, self._size(chunks))
+        if self.disk is not None:
+            try:
+                self.disk.put(key, json.dumps(chunks).encode('utf-8'))
+            except Exception as e:
+                logger.error(f"Failed to write chunks to disk cache: {e}")
+
+    def get_or_chunk(self, key: str, chunk_fn: Callable[[], List[str]]) -> List[str]:
+        """Cached chunks for key, or the result of chunk_fn (which is then cached)"""
+        chunks = self.get(key)
+        if chunks is None:
+            chunks = chunk_fn()
+            self.put(key, chunks)
+        return chunks
+
+    def stream(self, key: str, stream_fn: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Yield cached chunks, or pass a chunk stream through and cache it if it completes within max_entry_bytes"""
+        cached = self.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        recorded: Optional[List[str]] = []
+        recorded_bytes = 0
+        for chunk in stream_fn():
+            if recorded is not None:
+                recorded_bytes += len(chunk) + 8
+                if recorded_bytes > self.max_entry_bytes:
+                    recorded = None
+                    self.abandoned += 1
+                else:
+                    recorded.append(chunk)
+            yield chunk
+        if recorded is not None:
+            self.put(key, recorded)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters for the health endpoint"""
+        memory = self.memory.get_stats()
+        disk = self.disk.get_stats() if self.disk is not None else None
+        hits = memory['hits'] + (disk['hits'] if disk else 0)
+        misses = disk['misses'] if disk else memory['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0,
+            'too_large_to_cache': self.abandoned,
+            'memory': memory,
+            'disk': disk
+        }
@@ -0,0 +1,113 @@
+"""
+Chunk Sync Module
+=================
+
+Writing a document's chunk embeddings to Convex, and matching its new
+chunks against the ones Convex already stores for incremental re-embedding.
+
+ChunkEmbeddingWriter saves chunk embeddings a batch per request and maps
+the batch response back to one (embedding_id, error) per chunk. Against a
+Convex deployment without the batch endpoint (it answers 404) the writer
+falls back to one request per chunk for the rest of the process.
+
+Every stored chunk embedding carries a chunk hash of the model and the
+exact chunk text (chunk_hash). StoredChunks groups a document's stored
+chunks by that hash. As the new chunks stream through, claim() hands each
+one a stored chunk with the same hash, if one is left; that chunk keeps its
+embedding and is only renumbered when its position moved. The chunks left
+unclaimed once the document is done are stale and get deactivated.
+"""
+
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from batching import iter_batches
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(chunk_text: str, model_name: str) -> str:
+    """Identifies a stored chunk embedding: the model plus the exact chunk text"""
+    return hashlib.sha256(f"{model_name}\n{chunk_text}".encode('utf-8')).hexdigest()
+
+
+class StoredChunks:
+    """A document's active chunk embeddings, claimed one by one by its new chunks"""
+
+    def __init__(self, chunks: Iterable[dict]):
+        self._by_hash: Dict[Optional[str], List[dict]] = {}
+        for chunk in chunks:
+            # Chunks saved before hashes were recorded group under None and never match
+            self._by_hash.setdefault(chunk.get('chunkHash'), []).append(chunk)
+        self.kept_hashes = set()
+        self.reindex: List[dict] = []
+
+    def claim(self, hash_value: str, chunk_index: int) -> bool:
+        """Keep a stored chunk for the new chunk at chunk_index; False if none with this hash is left"""
+        stored = self._by_hash.get(hash_value)
+        if not stored:
+            return False
+        chunk = stored.pop()
+        self.kept_hashes.add(hash_value)
+        if chunk.get('chunkIndex') != chunk_index:
+            self.reindex.append({'embeddingId': chunk['embeddingId'], 'chunkIndex': chunk_index})
+        return True
+
+    def stale(self) -> List[str]:
+        """Embedding ids of the stored chunks no new chunk claimed"""
+        return [chunk['embeddingId'] for chunks in self._by_hash.values() for chunk in chunks]
+
+
+class ChunkEmbeddingWriter:
+    """Saves chunk embeddings to Convex in batches; one (embedding_id, error) per payload"""
+
+    def __init__(self, client, batch_size: int = 64):
+        self.client = client
+        self.batch_size = max(1, int(batch_size))
+        # Cleared the first time Convex answers 404 for the batch endpoint (a deployment
+        # predating it); chunk embeddings are then saved one request each
+        self.batch_supported = True
+
+    def save_one(self, convex_url: str, payload: dict) -> tuple:
+        """Write one chunk embedding; returns (embedding_id, None) or (None, error)"""
+        try:
+            response = self.client.post(f"{convex_url}/api/embeddings/createDocumentEmbedding", json=payload)
+        except requests.exceptions.RequestException as e:
+            return None, str(e)
+        if response.status_code in (200, 201):
+            return response.json().get('embeddingId'), None
+        return None, f"{response.status_code} - {response.text[:200]}"
+
+    def save(self, convex_url: str, payloads: List[dict]) -> List[tuple]:
+        """Write chunk embeddings batch_size per request, in payload order"""
+        outcomes = []
+        for batch in iter_batches(payloads, self.batch_size):
+            if not self.batch_supported:
+                outcomes.extend(self.save_one(convex_url, payload) for payload in batch)
+                continue
+            try:
+                response = self.client.post(
+                    f"{convex_url}/api/embeddings/createDocumentEmbeddingsBatch", json={'embeddings': batch}
+                )
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error saving a batch of {len(batch)} chunk embeddings: {e}")
+                outcomes.extend((None, str(e)) for _ in batch)
+                continue
+            if response.status_code == 404:
+                logger.warning("⚠️ Convex has no batch embedding endpoint; saving chunk embeddings one at a time")
+                self.batch_supported = False
+                outcomes.extend(self.save_one(convex_url, payload) for payload in batch)
+                continue
+            if response.status_code not in (200, 201):
+                error = f"{response.status_code} - {response.text[:200]}"
+                logger.error(f"Failed to save a batch of {len(batch)} chunk embeddings: {error}")
+                outcomes.extend((None, error) for _ in batch)
+                continue
+            results = {result.get('index'): result for result in response.json().get('results', [])}
+            for n in range(len(batch)):
+                result = results.get(n, {'error': 'Missing from the batch response'})
+                outcomes.append((result.get('embeddingId'), result.get('error')))
+        return outcomes
@@ -0,0 +1,593 @@
+"""
+Document Chunking Module
+========================
+
+Splits documents into chunks for embedding.
+
+Two ways of measuring chunk length are supported:
+
+- characters: the original semantic/LangChain chunkers, sized in characters
+- tokens:     chunks packed up to the embedding model's real max_seq_length,
+              measured with the model's own (fast) tokenizer, so no text is
+              encoded only to be truncated away
+
+truncation_stats()/TruncationStats report how much of a set of chunks the
+model would actually see, whichever mode produced them.
+
+stream_chunk_document() yields the characters-mode chunks incrementally from
+a string, text pieces or a file-like object, so very large uploads can be
+chunked, encoded and saved without holding the whole set of chunks at once.
+"""
+
+import codecs
+import logging
+import re
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter, MarkdownTextSplitter
+
+logger = logging.getLogger(__name__)
+
+CHARACTERS = 'characters'
+TOKENS = 'tokens'
+CHUNKING_MODES = (CHARACTERS, TOKENS)
+
+# Bump whenever the chunkers produce different output for the same input, so
+# cached chunking results (caching.ChunkCache) from older versions are ignored
+CHUNKER_VERSION = 1
+
+# Sentence ends; a single character before the dot ("2.", "a.") is a list marker, not a sentence
+_SENTENCE_END = re.compile(r'(?<=\w\w[.!?])\s+|(?<=[)\]"\'][.!?])\s+')
+
+
+def _count_tokens(tokenizer, texts: List[str]) -> List[int]:
+    """Token count of each text (without special tokens) in one batch call"""
+    if not texts:
+        return []
+    encoded = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_attention_mask=False,
+        return_token_type_ids=False
+    )
+    return [len(ids) for ids in encoded['input_ids']]
+
+
+def _segment_spans(content: str) -> List[Tuple[int, int]]:
+    """Paragraph-level (start, end) spans; blank lines and section starts open a new span"""
+    spans = []
+    start = None
+    end = 0
+    position = 0
+    for line in content.splitlines(keepends=True):
+        line_start, position = position, position + len(line)
+        stripped = line.strip()
+        if not stripped:
+            if start is not None:
+                spans.append((start, end))
+                start = None
+            continue
+        if start is not None and is_section_start(stripped) and not line.startswith(('  ', '\t')):
+            spans.append((start, end))
+            start = None
+        if start is None:
+            start = line_start + (len(line) - len(line.lstrip()))
+        end = line_start + len(line.rstrip())
+    if start is not None:
+        spans.append((start, end))
+    return spans
+
+
+def _sentence_spans(content: str, start: int, end: int) -> List[Tuple[int, int]]:
+    spans = []
+    position = start
+    for match in _SENTENCE_END.finditer(content, start, end):
+        spans.append((position, match.start()))
+        position = match.end()
+    if position < end:
+        spans.append((position, end))
+    return spans
+
+
+def _token_window_spans(content: str, start: int, end: int, tokenizer, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split one span into windows of at most max_tokens using the tokenizer's offsets"""
+    try:
+        encoded = tokenizer(content[start:end], add_special_tokens=False, return_offsets_mapping=True)
+        offsets = encoded['offset_mapping']
+    except Exception:
+        # Slow tokenizers have no offsets; fall back to ~4 characters per token
+        step = max(1, max_tokens * 4)
+        return [(s, min(end, s + step)) for s in range(start, end, step)]
+    return [
+        (start + offsets[i][0], start + offsets[min(len(offsets), i + max_tokens) - 1][1])
+        for i in range(0, len(offsets), max_tokens)
+    ]
+
+
+def token_chunk_document(content: str, tokenizer, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Pack paragraphs into chunks of at most max_tokens model tokens.
+
+    Paragraphs (and list items/headers, which start their own segment) are kept
+    whole where they fit; longer ones are split at sentence ends and, failing
+    that, at token boundaries. Up to overlap_tokens of trailing segments are
+    repeated at the start of the next chunk. Chunk text is sliced from the
+    original document, so whitespace and formatting are preserved.
+    """
+    max_tokens = max(1, int(max_tokens))
+    overlap_tokens = max(0, min(int(overlap_tokens), max_tokens // 2))
+
+    spans = _segment_spans(content)
+    counts = _count_tokens(tokenizer, [content[s:e] for s, e in spans])
+
+    # Break oversized paragraphs into sentences, then token windows
+    segments: List[Tuple[int, int, int]] = []
+    for (start, end), count in zip(spans, counts):
+        if count <= max_tokens:
+            segments.append((start, end, count))
+            continue
+        sentences = _sentence_spans(content, start, end)
+        for (s_start, s_end), s_count in zip(sentences, _count_tokens(tokenizer, [content[s:e] for s, e in sentences])):
+            if s_count <= max_tokens:
+                segments.append((s_start, s_end, s_count))
+                continue
+            windows = _token_window_spans(content, s_start, s_end, tokenizer, max_tokens)
+            window_counts = _count_tokens(tokenizer, [content[s:e] for s, e in windows])
+            segments.extend((w_start, w_end, w_count) for (w_start, w_end), w_count in zip(windows, window_counts))
+
+    chunks: List[str] = []
+    current: List[Tuple[int, int, int]] = []
+    current_tokens = 0
+    for segment in segments:
+        if current and current_tokens + segment[2] > max_tokens:
+            chunks.append(content[current[0][0]:current[-1][1]])
+            # Carry whole trailing segments forward as overlap
+            carried: List[Tuple[int, int, int]] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                if carried_tokens + previous[2] > overlap_tokens or carried_tokens + previous[2] + segment[2] > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[2]
+            current, current_tokens = carried, carried_tokens
+        current.append(segment)
+        current_tokens += segment[2]
+
+    if current:
+        chunks.append(content[current[0][0]:current[-1][1]])
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class TruncationStats:
+    """Accumulates how many chunk tokens exceed the model's max_seq_length, batch by batch"""
+
+    def __init__(self, tokenizer, max_seq_length: int):
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.chunks = 0
+        self.truncated_chunks = 0
+        self.total_tokens = 0
+        self.dropped_tokens = 0
+        self.max_tokens_in_chunk = 0
+
+    def add(self, chunks: List[str]) -> 'TruncationStats':
+        if not chunks:
+            return self
+        encoded = self.tokenizer(
+            list(chunks),
+            add_special_tokens=True,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        self.chunks += len(lengths)
+        self.truncated_chunks += sum(1 for length in lengths if length > self.max_seq_length)
+        self.total_tokens += sum(lengths)
+        self.dropped_tokens += sum(max(0, length - self.max_seq_length) for length in lengths)
+        self.max_tokens_in_chunk = max(self.max_tokens_in_chunk, max(lengths))
+        return self
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'chunks': self.chunks,
+            'truncated_chunks': self.truncated_chunks,
+            'total_tokens': self.total_tokens,
+            'dropped_tokens': self.dropped_tokens,
+            'dropped_fraction': round(self.dropped_tokens / self.total_tokens, 4) if self.total_tokens else 0,
+            'max_tokens_in_chunk': self.max_tokens_in_chunk,
+            'max_seq_length': self.max_seq_length
+        }
+
+
+def truncation_stats(chunks: List[str], tokenizer, max_seq_length: int) -> Dict[str, Any]:
+    """How many chunk tokens exceed the model's max_seq_length and are silently dropped"""
+    return TruncationStats(tokenizer, max_seq_length).add(chunks).as_dict()
+
+
+def chunk_document(content: str,
+                   content_type: str = "text",
+                   chunk_size: int = 1000,
+                   chunk_overlap: int = 200,
+                   mode: str = CHARACTERS,
+                   tokenizer=None,
+                   max_tokens: Optional[int] = None,
+                   overlap_tokens: int = 0) -> List[str]:
+    """Chunk document content using improved semantic splitting
+
+    In tokens mode chunk_size/chunk_overlap are ignored and chunks are packed up
+    to max_tokens of the given tokenizer instead (see token_chunk_document).
+    """
+    if mode == TOKENS:
+        if tokenizer is not None and max_tokens:
+            try:
+                chunks = token_chunk_document(content, tokenizer, max_tokens, overlap_tokens)
+                logger.info(f"Document token-chunked into {len(chunks)} pieces (max_tokens={max_tokens}, overlap={overlap_tokens})")
+                return chunks
+            except Exception as e:
+                logger.error(f"Error in token chunking, falling back to character chunking: {e}")
+        else:
+            logger.warning("Token chunking requested without a tokenizer - using character chunking")
+
+    try:
+        # First, try semantic chunking for structured content
+        semantic_chunks = semantic_chunk_document(content, chunk_size)
+        if semantic_chunks and len(semantic_chunks) > 1:
+            logger.info(f"Document semantically chunked into {len(semantic_chunks)} pieces")
+            return semantic_chunks
+        
+        # Fallback to LangChain splitters
+        if content_type.lower() == "markdown":
+            # Use MarkdownTextSplitter for markdown content
+            text_splitter = MarkdownTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+            )
+        else:
+            # Use RecursiveCharacterTextSplitter with better separators for structured content
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+                separators=[
+                    "\n\n\n",  # Multiple line breaks
+                    "\n\n",    # Double line breaks
+                    "\n",      # Single line breaks
+                    ". ",      # Sentence endings
+                    ", ",      # Comma separations
+                    " ",       # Spaces
+                    ""
+                ]
+            )
+        
+        chunks = text_splitter.split_text(content)
+        logger.info(f"Document chunked into {len(chunks)} pieces (chunk_size={chunk_size}, overlap={chunk_overlap})")
+        return chunks
+        
+    except Exception as e:
+        logger.error(f"Error chunking document: {e}")
+        # Fallback to simple chunking if LangChain fails
+        return simple_chunk_text(content, chunk_size)
+
+
+def semantic_chunk_document(content: str, max_chunk_size: int = 1000) -> List[str]:
+    """Semantic chunking that preserves numbered lists and structured content"""
+    try:
+        filtered_chunks = list(_merge_small_chunks(_semantic_chunks(iter_lines(content), max_chunk_size)))
+        return filtered_chunks if len(filtered_chunks) > 1 else []
+        
+    except Exception as e:
+        logger.error(f"Error in semantic chunking: {e}")
+        return []
+
+
+def stream_chunk_document(source: Union[str, Iterable[str], IO],
+                          content_type: str = "text",
+                          chunk_size: int = 1000,
+                          chunk_overlap: int = 200) -> Iterator[str]:
+    """
+    Yield the same chunks as chunk_document() in characters mode, incrementally.
+
+    source may be a string, an iterable of text pieces or a file-like object.
+    Chunks are produced as lines arrive, so memory is bounded by the chunk and
+    section being assembled rather than by the document. Only while fewer than
+    two chunks have come out are the lines read so far kept: a document that
+    yields a single semantic chunk goes through chunk_document's LangChain
+    fallback, exactly as the non-streaming path does.
+    """
+    prefix: Optional[List[str]] = []
+
+    def recorded(lines: Iterator[str]) -> Iterator[str]:
+        for line in lines:
+            if prefix is not None:
+                prefix.append(line)
+            yield line
+
+    merged = _merge_small_chunks(_semantic_chunks(recorded(iter_lines(source)), chunk_size))
+    first = next(merged, None)
+    second = next(merged, None)
+    if second is None:
+        content = '\n'.join(prefix)
+        prefix = None
+        yield from chunk_document(content, content_type, chunk_size, chunk_overlap)
+        return
+
+    prefix = None
+    logger.info("Document semantically chunked (streaming)")
+    yield first
+    yield second
+    yield from merged
+
+
+def iter_lines(source: Union[str, Iterable[str], IO], block_size: int = 1 << 16) -> Iterator[str]:
+    """Lines of a string, text pieces or a file-like object, split exactly like str.split('\\n')"""
+    if isinstance(source, str):
+        start = 0
+        while True:
+            end = source.find('\n', start)
+            if end == -1:
+                yield source[start:]
+                return
+            yield source[start:end]
+            start = end + 1
+
+    if hasattr(source, 'read'):
+        pieces: Iterable = iter(lambda: source.read(block_size), source.read(0))
+    else:
+        pieces = source
+
+    decoder = None
+    fragments: List[str] = []
+    for piece in pieces:
+        if isinstance(piece, bytes):
+            decoder = decoder or codecs.getincrementaldecoder('utf-8')(errors='replace')
+            piece = decoder.decode(piece)
+        if '\n' not in piece:
+            fragments.append(piece)
+            continue
+        lines = piece.split('\n')
+        fragments.append(lines[0])
+        yield ''.join(fragments)
+        yield from lines[1:-1]
+        fragments = [lines[-1]]
+    if decoder is not None:
+        fragments.append(decoder.decode(b'', final=True))
+    yield ''.join(fragments)
+
+
+def _semantic_chunks(lines: Iterator[str], max_chunk_size: int) -> Iterator[str]:
+    """
+    Chunks before the small-chunk merge, from a stream of lines.
+
+    Each line is stripped and classified once. Sections are collected by
+    reading forward until a line ends them; that line is handed back to the
+    main loop. Sections are split with the split_large_section rules as they
+    grow (see _SectionBuffer), so no whole section is held in memory.
+    """
+    current_chunk = []
+    current_size = 0
+    
+    line = next(lines, None)
+    stripped = line.strip() if line is not None else ''
+    while line is not None:
+        # Check if this line starts a numbered list or structured section
+        if stripped and _SECTION_START.match(stripped):
+            # Save current chunk if it exists
+            if current_chunk and current_size > 100:  # Only save substantial chunks
+                yield '\n'.join(current_chunk).strip()
+                current_chunk = []
+                current_size = 0
+            
+            # Collect the entire section/numbered item with its sub-items
+            # Small sections are simply collected; once the raw text passes
+            # max_chunk_size the section is handed to a _SectionBuffer
+            section_lines = [line]
+            raw_length = len(line)
+            section = None
+            line = next(lines, None)
+            while line is not None:
+                stripped = line.strip()
+                if stripped and _ends_section(line, stripped):
+                    break
+                if section is None:
+                    section_lines.append(line)
+                    raw_length += len(line) + 1
+                    if raw_length > max_chunk_size:
+                        section = _SectionBuffer(section_lines[0], max_chunk_size)
+                        for held in section_lines[1:]:
+                            section.add(held, held.strip())
+                        section_lines = None
+                else:
+                    section.add(line, stripped)
+                if section is not None and section.ready:
+                    yield from section.ready
+                    section.ready = []
+                line = next(lines, None)
+            
+            if section is not None:
+                yield from section.finish()
+            else:
+                section_text = '\n'.join(section_lines).strip()
+                if section_text:
+                    yield section_text
+            continue
+        
+        # Regular line processing
+        if current_size + len(line) > max_chunk_size and current_chunk:
+            # Save current chunk and start new one
+            yield '\n'.join(current_chunk).strip()
+            current_chunk = [line]
+            current_size = len(line)
+        else:
+            current_chunk.append(line)
+            current_size += len(line) + 1  # +1 for newline
+        
+        line = next(lines, None)
+        if line is not None:
+            stripped = line.strip()
+    
+    # Add final chunk
+    if current_chunk:
+        final_chunk = '\n'.join(current_chunk).strip()
+        if final_chunk:
+            yield final_chunk
+
+
+def _merge_small_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """Filter out very small chunks and merge them with the previous one"""
+    previous = None
+    for chunk in chunks:
+        if len(chunk.strip()) < 50:
+            if previous is not None:
+                # Merge small chunk with previous one
+                previous += '\n\n' + chunk
+        else:
+            if previous is not None:
+                yield previous
+            previous = chunk
+    if previous is not None:
+        yield previous
+
+
+class _SectionBuffer:
+    """
+    Incremental equivalent of taking '\\n'.join(section_lines).strip() and
+    emitting it whole, or through split_large_section() when it is longer
+    than max_size.
+
+    Lines are buffered only until the section is known to be too large; from
+    then on they are packed as they arrive and finished chunks collect in
+    ``ready``. The last non-blank line and any blank lines after it are held
+    back, because strip() would remove them at the end of the section.
+    """
+
+    def __init__(self, first_line: str, max_size: int):
+        self.max_size = max_size
+        self.core = [first_line.lstrip()]  # lines up to the last non-blank one
+        self.core_length = len(self.core[0])
+        self.blank_tail: List[str] = []
+        self.splitting = False
+        self.ready: List[str] = []
+        self.current_chunk: List[str] = []
+        self.current_size = 0
+
+    def _stripped_length(self) -> int:
+        last = self.core[-1]
+        return self.core_length - (len(last) - len(last.rstrip()))
+
+    def _pack(self, lines: List[str]):
+        # split_large_section rules
+        for line in lines:
+            if self.current_size + len(line) > self.max_size and self.current_chunk:
+                self.ready.append('\n'.join(self.current_chunk))
+                self.current_chunk = [line]
+                self.current_size = len(line)
+            else:
+                self.current_chunk.append(line)
+                self.current_size += len(line) + 1
+
+    def add(self, line: str, stripped: str):
+        if not stripped:
+            self.blank_tail.append(line)
+            return
+        if self.splitting:
+            # The held line is no longer last, so it goes out unstripped
+            self._pack(self.core)
+            self._pack(self.blank_tail)
+            self.core = [line]
+            self.blank_tail = []
+            return
+        if self.blank_tail:
+            self.core_length += sum(len(blank) + 1 for blank in self.blank_tail)
+            self.core.extend(self.blank_tail)
+            self.blank_tail = []
+        self.core.append(line)
+        self.core_length += len(line) + 1
+        if self._stripped_length() > self.max_size:
+            self.splitting = True
+            self._pack(self.core[:-1])
+            self.core = self.core[-1:]
+
+    def finish(self) -> List[str]:
+        too_large = self.splitting or self._stripped_length() > self.max_size
+        self.core[-1] = self.core[-1].rstrip()
+        if not too_large:
+            section_text = '\n'.join(self.core)
+            return [section_text] if section_text else []
+        self._pack(self.core)
+        if self.current_chunk:
+            self.ready.append('\n'.join(self.current_chunk))
+        return self.ready
+
+
+# A stripped line starts a new section if it is a numbered item ("1. "), a lettered
+# item ("a. "), a bullet, a markdown header or a step/phase/stage marker. The step
+# keywords match case-insensitively in ASCII only, like the str.lower() check they
+# replace; \d stays Unicode-aware as before.
+_SECTION_START = re.compile(
+    r'\d+\.\s|[a-zA-Z]\.\s|[-*•]\s|#|'
+    r'(?:[sS][tT][eE][pP]|[pP][hH][aA][sS][eE]|[sS][tT][aA][gG][eE])\s*\d'
+)
+# Inside a section, an unindented "1." that is not itself a section start
+# (e.g. "3.5 litres" or a bare "3.") also ends it
+_NUMBERED_PREFIX = re.compile(r'\d+\.')
+
+
+def _ends_section(raw_line: str, stripped: str) -> bool:
+    """True if a non-empty line ends the section collected before it"""
+    if _SECTION_START.match(stripped):
+        return True
+    return (_NUMBERED_PREFIX.match(stripped) is not None
+            and not raw_line.startswith(('  ', '\t')))
+
+
+def is_section_start(line: str) -> bool:
+    """Check if line starts a new section (numbered item, header, etc.)"""
+    line = line.strip()
+    return bool(line) and _SECTION_START.match(line) is not None
+
+
+def collect_section(lines: List[str], start_idx: int) -> List[str]:
+    """Collect all lines belonging to a section starting at start_idx"""
+    end = start_idx + 1
+    while end < len(lines):
+        stripped = lines[end].strip()
+        if stripped and _ends_section(lines[end], stripped):
+            break
+        end += 1
+    return lines[start_idx:end]
+
+
+def split_large_section(section_text: str, max_size: int) -> List[str]:
+    """Split a large section while trying to preserve semantic meaning"""
+    # Try to split at natural boundaries within the section
+    lines = section_text.split('\n')
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    
+    for line in lines:
+        if current_size + len(line) > max_size and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk = [line]
+            current_size = len(line)
+        else:
+            current_chunk.append(line)
+            current_size += len(line) + 1
+    
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    
+    return chunks
+
+
+def simple_chunk_text(text: str, max_chunk_size: int = 1000) -> List[str]:
+    """Simple fallback chunking method"""
+    if len(text) <= max_chunk_size:
+        return [text]
+    
+    chunks = []
+    for i in range(0, len(text), max_chunk_size):
+        chunks.append(text[i:i + max_chunk_size])
+    
+    return chunks
@@ -0,0 +1,251 @@
+"""
+Chunking Pool Module
+====================
+
+Parallel chunking of many documents for bulk ingestion.
+
+The semantic chunker and the LangChain splitters are pure Python, so
+documents chunked in threads still run one at a time under the GIL.
+ChunkingPool hands documents to a pool of worker processes sized from the
+container's CPU quota and delivers the results through a bounded queue: when
+the encoder falls behind, the queue fills, submission pauses, and neither
+pending documents nor finished chunk lists pile up in memory.
+
+Small documents are chunked in-process, where sending them to a worker
+would cost more than it saves. Results already in the ChunkCache skip the
+pool entirely.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from chunking import chunk_document
+from encoder_pool import available_cpus
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkJob(NamedTuple):
+    """One document to chunk; cache_key is the ChunkCache key, if caching is wanted"""
+    document_id: Any
+    content: str
+    content_type: str = "text"
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
+    cache_key: Optional[str] = None
+
+
+class ChunkedDocument(NamedTuple):
+    """A document's chunks or error; document_id is None only when the job stream itself failed"""
+    document_id: Any
+    chunks: Optional[List[str]]
+    error: Optional[str] = None
+    chunk_time_ms: int = 0
+
+
+def _chunk_job(content: str, content_type: str, chunk_size: int, chunk_overlap: int) -> tuple:
+    """Runs in a worker process"""
+    started = time.time()
+    chunks = chunk_document(content, content_type, chunk_size, chunk_overlap)
+    return chunks, int((time.time() - started) * 1000)
+
+
+def resolve_chunking_workers(setting: str) -> int:
+    """Interpret CHUNKING_WORKERS: 0 chunks in-process, 'auto' uses the CPU quota"""
+    setting = (setting or 'auto').strip().lower()
+    if setting == 'auto':
+        # With a single CPU a worker process only adds pickling overhead
+        cpus = available_cpus()
+        return cpus if cpus > 1 else 0
+    return max(0, int(setting))
+
+
+class ChunkingPool:
+    """Chunks documents in worker processes and streams results through a bounded queue"""
+
+    def __init__(self,
+                 workers: int,
+                 queue_size: int = 8,
+                 min_pool_chars: int = 20000,
+                 cache=None):
+        self.workers = max(0, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.min_pool_chars = max(0, int(min_pool_chars))
+        self.cache = cache
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.documents_chunked = 0
+        self.documents_in_pool = 0
+        self.cache_hits = 0
+        self.failures = 0
+        self.chunk_time_ms = 0
+        self.producer_stall_ms = 0.0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Start the worker processes on first use"""
+        if self.workers == 0:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                # Not 'fork': the service is multi-threaded by now (startup phases, batchers,
+                # Flask), and a forked child can inherit a lock some other thread held.
+                # forkserver children fork from a single-threaded server process instead.
+                # They do re-run the parent's __main__ script, which is why the service
+                # starts from the empty serve.py rather than main.py.
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'fork'
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                )
+                logger.info(f"Chunking pool started: {self.workers} workers ({method})")
+            return self._executor
+
+    def _record(self, result: ChunkedDocument, pooled: bool):
+        with self._stats_lock:
+            self.documents_chunked += 1
+            self.documents_in_pool += 1 if pooled else 0
+            self.failures += 1 if result.error else 0
+            self.chunk_time_ms += result.chunk_time_ms
+
+    def _chunk_inline(self, job: ChunkJob) -> ChunkedDocument:
+        try:
+            chunks, elapsed_ms = _chunk_job(job.content, job.content_type, job.chunk_size, job.chunk_overlap)
+            return ChunkedDocument(job.document_id, chunks, None, elapsed_ms)
+        except Exception as e:
+            return ChunkedDocument(job.document_id, None, str(e))
+
+    def _store(self, job: ChunkJob, result: ChunkedDocument):
+        if self.cache is not None and job.cache_key and result.chunks is not None:
+            self.cache.put(job.cache_key, result.chunks)
+
+    def chunk_documents(self, jobs: Iterable[ChunkJob]) -> Iterator[ChunkedDocument]:
+        """Yield one ChunkedDocument per job, in completion order"""
+        results: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        done = object()
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # Blocks while the consumer is behind; gives up if the consumer went away
+            started = time.monotonic()
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.5)
+                    with self._stats_lock:
+                        self.producer_stall_ms += (time.monotonic() - started) * 1000
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            in_flight: Dict[Any, ChunkJob] = {}
+            current: Optional[ChunkJob] = None
+            max_in_flight = max(1, self.workers) * 2
+
+            def drain(return_when):
+                finished, _ = wait(list(in_flight), return_when=return_when)
+                for future in finished:
+                    job = in_flight.pop(future)
+                    try:
+                        chunks, elapsed_ms = future.result()
+                        result = ChunkedDocument(job.document_id, chunks, None, elapsed_ms)
+                    except Exception as e:
+                        result = ChunkedDocument(job.document_id, None, str(e))
+                    self._record(result, pooled=True)
+                    self._store(job, result)
+                    if not put(result):
+                        return False
+                return True
+
+            try:
+                executor = self._get_executor()
+                for job in jobs:
+                    if stop.is_set():
+                        break
+                    current = job
+                    if self.cache is not None and job.cache_key:
+                        cached = self.cache.get(job.cache_key)
+                        if cached is not None:
+                            with self._stats_lock:
+                                self.cache_hits += 1
+                            if not put(ChunkedDocument(job.document_id, cached)):
+                                break
+                            current = None
+                            continue
+
+                    if executor is None or len(job.content) < self.min_pool_chars:
+                        result = self._chunk_inline(job)
+                        self._record(result, pooled=False)
+                        self._store(job, result)
+                        if not put(result):
+                            break
+                        current = None
+                        continue
+
+                    while len(in_flight) >= max_in_flight:
+                        if not drain(FIRST_COMPLETED):
+                            return
+                    in_flight[executor.submit(
+                        _chunk_job, job.content, job.content_type, job.chunk_size, job.chunk_overlap
+                    )] = job
+                    current = None
+
+                while in_flight and not stop.is_set():
+                    if not drain(FIRST_COMPLETED):
+                        return
+            except Exception as e:
+                logger.error(f"Chunking producer failed: {e}")
+                error = f"Chunking producer failed: {e}"
+                # Fail the documents that were in hand by id; a failure of the job stream
+                # itself (no document in hand) is reported with document_id None
+                failed_jobs = list(in_flight.values())
+                if current is not None and current not in failed_jobs:
+                    failed_jobs.append(current)
+                for job in failed_jobs:
+                    if not put(ChunkedDocument(job.document_id, None, error)):
+                        break
+                if not failed_jobs:
+                    put(ChunkedDocument(None, None, error))
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                put(done)
+
+        producer = threading.Thread(target=produce, name="chunking-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters for the health endpoint"""
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'started': self._executor is not None,
+                'queue_size': self.queue_size,
+                'min_pool_chars': self.min_pool_chars,
+                'documents_chunked': self.documents_chunked,
+                'documents_in_pool': self.documents_in_pool,
+                'cache_hits': self.cache_hits,
+                'failures': self.failures,
+                'avg_chunk_ms': round(self.chunk_time_ms / self.documents_chunked, 2) if self.documents_chunked else 0,
+                'producer_stall_ms': round(self.producer_stall_ms, 2)
+            }
@@ -0,0 +1,247 @@
+"""
+Near-Duplicate Detection Module
+===============================
+
+MinHash/LSH near-duplicate detection for document chunks.
+
+Ingested corpora repeat themselves: legal boilerplate, page headers and
+footers, signatures and disclaimers show up in chunk after chunk with only a
+date or a name changed. NearDuplicateIndex keeps the MinHash signature
+(from MinHasher) of every chunk encoded recently, bucketed by LSH bands,
+together with the chunk's embedding. ChunkDeduplicator looks each new
+chunk up in the index before encoding; a chunk whose estimated Jaccard
+similarity (over word shingles) to an indexed chunk reaches the threshold
+reuses that embedding instead of going through the model.
+
+The EmbeddingCache already serves byte-identical texts; this catches the
+ones that differ by a few words. The index is bounded by bytes and evicts
+least-recently-used entries.
+"""
+
+import logging
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hash family; keeps every hash value in uint32
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r'\w+')
+
+# Rough per-entry bookkeeping overhead (OrderedDict node, band keys, bucket sets)
+ENTRY_OVERHEAD_BYTES = 400
+
+
+class MinHasher:
+    """MinHash signatures over lower-cased word shingles"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = int(num_perm)
+        self.shingle_size = max(1, int(shingle_size))
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=(self.num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=(self.num_perm, 1)).astype(np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """uint32 signature of num_perm minimums, or None for texts without words"""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return None
+        k = min(self.shingle_size, len(words))
+        shingles = {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) & _PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Thread-safe LSH index mapping MinHash signatures to values (embeddings)"""
+
+    def __init__(self,
+                 threshold: float = 0.9,
+                 num_perm: int = 128,
+                 bands: int = 16,
+                 max_bytes: int = 32 * 1024 * 1024):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = float(threshold)
+        self.num_perm = int(num_perm)
+        self.bands = int(bands)
+        self.rows_per_band = self.num_perm // self.bands
+        self.max_bytes = max(0, int(max_bytes))
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (signature, value, band_keys, size)
+        self._buckets: Dict[tuple, set] = {}
+        self._next_id = 0
+        self.current_bytes = 0
+        self.lookups = 0
+        self.matches = 0
+        self.evictions = 0
+
+    def _band_keys(self, signature: np.ndarray, namespace: str) -> List[tuple]:
+        r = self.rows_per_band
+        return [(namespace, band, signature[band * r:(band + 1) * r].tobytes()) for band in range(self.bands)]
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.count_nonzero(a == b)) / self.num_perm
+
+    def find(self, signature: np.ndarray, namespace: str = '') -> Optional[tuple]:
+        """(entry_id, value) of the most similar indexed chunk at or above the threshold"""
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in self._band_keys(signature, namespace):
+                candidates.update(self._buckets.get(key, ()))
+
+            best_id, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                similarity = self.similarity(signature, self._entries[entry_id][0])
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            self.matches += 1
+            return best_id, self._entries[best_id][1]
+
+    def add(self, signature: np.ndarray, value: Any, namespace: str = '') -> Optional[int]:
+        """Index a signature with its value; returns the new entry id (None if it can't fit)"""
+        size = signature.nbytes + getattr(value, 'nbytes', 0) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return None
+        band_keys = self._band_keys(signature, namespace)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, value, band_keys, size)
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._evict_oldest()
+            return entry_id
+
+    def _evict_oldest(self):
+        """Drop the least-recently-used entry (lock held)"""
+        entry_id, (_, _, band_keys, size) = self._entries.popitem(last=False)
+        for key in band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        self.current_bytes -= size
+        self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index counters for the health endpoint"""
+        with self._lock:
+            return {
+                'enabled': True,
+                'threshold': self.threshold,
+                'num_perm': self.num_perm,
+                'bands': self.bands,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'lookups': self.lookups,
+                'matches': self.matches,
+                'evictions': self.evictions,
+                'match_rate': round(self.matches / self.lookups, 4) if self.lookups else 0
+            }
+
+
+class ChunkDeduplicator:
+    """
+    Per-document pass over the shared index.
+
+    encode() returns embedding rows aligned with the chunks it is given (None
+    where encoding failed) plus a flag per chunk marking near-duplicates of an
+    earlier chunk of the same document. The flag is informational: a
+    near-duplicate is not the same text, so callers still save its row.
+    Counters accumulate across calls, so a streamed document can be fed one
+    batch at a time.
+    """
+
+    def __init__(self, hasher: MinHasher, index: NearDuplicateIndex, namespace: str = ''):
+        self.hasher = hasher
+        self.index = index
+        self.namespace = namespace
+        self._document_entries = set()
+        self.chunks = 0
+        self.encoded = 0
+        self.reused_within_document = 0
+        self.reused_from_index = 0
+
+    def encode(self, chunks: Sequence[str], encode_fn: Callable[[List[str]], Sequence[Any]]) -> tuple:
+        rows: List[Any] = [None] * len(chunks)
+        repeats = [False] * len(chunks)
+        signatures = [self.hasher.signature(chunk) for chunk in chunks]
+
+        # Near-duplicates among this call's own new chunks wait for their first occurrence
+        pending = NearDuplicateIndex(self.index.threshold, self.index.num_perm, self.index.bands, max_bytes=1 << 62)
+        to_encode: List[int] = []
+        follows: Dict[int, int] = {}
+
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                to_encode.append(i)
+                continue
+            hit = self.index.find(signature, self.namespace)
+            if hit is not None:
+                entry_id, row = hit
+                rows[i] = row
+                if entry_id in self._document_entries:
+                    repeats[i] = True
+                    self.reused_within_document += 1
+                else:
+                    self._document_entries.add(entry_id)
+                    self.reused_from_index += 1
+                continue
+            hit = pending.find(signature)
+            if hit is not None:
+                follows[i] = hit[1]
+                repeats[i] = True
+                self.reused_within_document += 1
+                continue
+            pending.add(signature, i)
+            to_encode.append(i)
+
+        if to_encode:
+            encoded = encode_fn([chunks[i] for i in to_encode])
+            for i, row in zip(to_encode, encoded):
+                if row is None:
+                    continue
+                rows[i] = row
+                self.encoded += 1
+                if signatures[i] is not None:
+                    entry_id = self.index.add(signatures[i], np.array(row, dtype=np.float32), self.namespace)
+                    if entry_id is not None:
+                        self._document_entries.add(entry_id)
+        for i, first in follows.items():
+            rows[i] = rows[first]
+
+        self.chunks += len(chunks)
+        return rows, repeats
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Reuse counters for response metadata"""
+        reused = self.reused_within_document + self.reused_from_index
+        return {
+            'chunks': self.chunks,
+            'encoded': self.encoded,
+            'reused': reused,
+            'reused_within_document': self.reused_within_document,
+            'reused_from_index': self.reused_from_index,
+            'reuse_rate': round(reused / self.chunks, 4) if self.chunks else 0
+        }
@@ -0,0 +1,246 @@
+"""
+Encoder Pool Module
+===================
+
+Multi-process encoding for the vector conversion service.
+
+The model is loaded once in the Flask process; EncoderPool then forks N
+worker processes that inherit the already-initialised backend. Weight
+tensors live outside the Python object heap, so the workers share them
+copy-on-write instead of holding N copies. Each worker pins its own torch
+thread count, and large encode calls are split into shards that the
+workers process in parallel, so ingestion scales with the available cores
+instead of serializing on one interpreter.
+
+The pool exposes the same ``encode()`` interface as the inference backends
+and can be dropped in wherever a backend is used. ONNX Runtime sessions are
+not fork-safe, so ONNX backends reopen their session in each worker (the
+exported model file is shared through the page cache instead).
+
+Fork only copies the thread that calls it. A lock that another thread held
+at that moment stays locked in the child forever, and torch's intra-op
+thread pool is one such thread. So the pool must be created while the
+process has no other threads: before the Flask server, the startup
+threads and the micro-batchers start, and before the model's first
+encode. single_threaded_torch() keeps torch from starting its thread pool
+while the model loads. main.py runs the model phase in the foreground
+when ENCODER_WORKERS is set, and warms the model up through the pool.
+Pool replaces a worker that dies by forking again, from what is by then a
+threaded parent. A crashed worker is therefore a reason to restart the
+service, not something the pool recovers from cleanly.
+"""
+
+import gc
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_CPU_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_CPU_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+# Backend inherited by forked workers; set in the parent right before forking
+_worker_backend = None
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: the cgroup CPU quota, capped by the affinity mask"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = period = None
+    cpu_max = _read_first_line(CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        parts = cpu_max.split()
+        if len(parts) == 2 and parts[0] != 'max':
+            quota, period = parts
+    else:
+        quota = _read_first_line(CGROUP_V1_CPU_QUOTA)
+        period = _read_first_line(CGROUP_V1_CPU_PERIOD)
+
+    try:
+        if quota is not None and period is not None and int(quota) > 0 and int(period) > 0:
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except ValueError:
+        pass
+    return max(1, cpus)
+
+
+def resolve_worker_count(setting: str) -> int:
+    """Interpret ENCODER_WORKERS: 0/empty disables the pool, 'auto' uses the CPU quota"""
+    setting = (setting or '0').strip().lower()
+    if setting == 'auto':
+        return available_cpus()
+    return max(0, int(setting))
+
+
+@contextmanager
+def single_threaded_torch() -> Iterator[None]:
+    """Run torch on one thread inside the block, so its thread pool isn't started before a fork"""
+    import torch
+
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(threads)
+
+
+def _init_worker(threads_per_worker: int, cpu_slots: Optional[List[List[int]]], counter):
+    """Runs once in each forked worker"""
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+    after_fork = getattr(_worker_backend, 'after_fork', None)
+    if after_fork is not None:
+        after_fork(threads_per_worker)
+    if cpu_slots:
+        with counter.get_lock():
+            slot = counter.value % len(cpu_slots)
+            counter.value += 1
+        try:
+            os.sched_setaffinity(0, cpu_slots[slot])
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not pin encoder worker {os.getpid()} to CPUs {cpu_slots[slot]}: {e}")
+
+
+def _worker_encode(texts: List[str], batch_size: int, normalize_embeddings: bool) -> np.ndarray:
+    """Encode one shard inside a worker with the inherited backend"""
+    return np.asarray(
+        _worker_backend.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings),
+        dtype=np.float32
+    )
+
+
+class EncoderPool:
+    """Fans encode calls out to forked worker processes sharing one loaded model"""
+
+    def __init__(self,
+                 backend,
+                 workers: int,
+                 threads_per_worker: Optional[int] = None,
+                 min_shard_size: int = 8,
+                 pin_cpus: bool = False,
+                 timeout_s: float = 300.0):
+        global _worker_backend
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Encoder pool requires the 'fork' start method")
+
+        cpus = available_cpus()
+        self.backend = backend
+        self.name = f"{getattr(backend, 'name', 'torch')}-pool"
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = max(1, int(threads_per_worker or cpus // self.workers))
+        self.min_shard_size = max(1, int(min_shard_size))
+        self.timeout_s = timeout_s
+
+        cpu_slots = None
+        if pin_cpus:
+            try:
+                allowed = sorted(os.sched_getaffinity(0))
+                if len(allowed) >= self.workers * self.threads_per_worker:
+                    cpu_slots = [
+                        allowed[i * self.threads_per_worker:(i + 1) * self.threads_per_worker]
+                        for i in range(self.workers)
+                    ]
+            except AttributeError:
+                pass
+
+        others = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+        if others:
+            logger.warning(
+                f"⚠️ Forking encoder workers from a process with other threads running ({', '.join(others)}); "
+                f"a lock one of them holds would stay locked in every worker"
+            )
+
+        context = multiprocessing.get_context('fork')
+        _worker_backend = backend
+        # Move everything allocated so far out of the collector's reach, so gc passes
+        # in the workers don't write to (and un-share) the pages holding the model
+        gc.collect()
+        gc.freeze()
+        try:
+            self._pool = context.Pool(
+                processes=self.workers,
+                initializer=_init_worker,
+                initargs=(self.threads_per_worker, cpu_slots, context.Value('i', 0))
+            )
+        finally:
+            gc.unfreeze()
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shards_dispatched = 0
+        self.texts_encoded = 0
+        self.busy_seconds = 0.0
+        logger.info(
+            f"Encoder pool started: {self.workers} workers x {self.threads_per_worker} torch threads "
+            f"({cpus} CPUs available, pinned={cpu_slots is not None})"
+        )
+
+    def _shards(self, count: int) -> List[range]:
+        """Split count texts into at most one contiguous shard per worker"""
+        shards = max(1, min(self.workers, count // self.min_shard_size))
+        size = math.ceil(count / shards)
+        return [range(start, min(count, start + size)) for start in range(0, count, size)]
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        started = time.time()
+        pending = [
+            self._pool.apply_async(
+                _worker_encode,
+                ([texts[i] for i in shard], max(1, min(batch_size, len(shard))), normalize_embeddings)
+            )
+            for shard in self._shards(len(texts))
+        ]
+        result = np.vstack([job.get(timeout=self.timeout_s) for job in pending])
+
+        with self._lock:
+            self.calls += 1
+            self.shards_dispatched += len(pending)
+            self.texts_encoded += len(texts)
+            self.busy_seconds += time.time() - started
+        return result
+
+    def close(self):
+        """Stop the worker processes"""
+        self._pool.terminate()
+        self._pool.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters for the health endpoint"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'threads_per_worker': self.threads_per_worker,
+                'worker_pids': [process.pid for process in getattr(self._pool, '_pool', [])],
+                'calls': self.calls,
+                'shards_dispatched': self.shards_dispatched,
+                'texts_encoded': self.texts_encoded,
+                'busy_seconds': round(self.busy_seconds, 2)
+            }
@@ -0,0 +1,231 @@
+"""
+Inference Backend Module
+========================
+
+One ``encode()`` interface over several inference engines for a loaded
+SentenceTransformer:
+
+- torch:      eager PyTorch fp32 (the reference implementation)
+- int8:       PyTorch with nn.Linear layers dynamically quantized to int8
+- onnx:       ONNX Runtime running an exported copy of the transformer
+- onnx-int8:  ONNX Runtime running a dynamically int8-quantized export
+
+Non-reference engines are checked against torch output on a fixed sample
+before they are used; if the cosine similarity of any sample falls below
+the threshold the service falls back to torch.
+"""
+
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE_BACKENDS = ('torch', 'int8', 'onnx', 'onnx-int8')
+
+# Sample used for the parity check: short queries, long passages, lists and numbers
+PARITY_SAMPLE_TEXTS = [
+    "What is the refund policy?",
+    "hello",
+    "Step 3: configure the Convex backend URL and restart the service.",
+    "1. Install dependencies\n2. Run migrations\n3. Start the web app",
+    "The company reported total revenue of $2.5 million in Q3 2023, a 15% increase "
+    "from the previous quarter, driven by expanded digital marketing campaigns.",
+    "Vector embeddings map text into a space where semantically similar passages are "
+    "close together, which makes nearest-neighbour search a good proxy for relevance. "
+    "Longer passages exercise padding and attention masking across the whole sequence.",
+]
+
+
+class TorchBackend:
+    """Eager PyTorch encoding through SentenceTransformer.encode"""
+
+    name = 'torch'
+
+    def __init__(self, model):
+        self.model = model
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize_embeddings
+        )
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch encoding with dynamically int8-quantized linear layers"""
+
+    name = 'int8'
+
+    def __init__(self, model):
+        import torch
+        quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized)
+
+
+class OnnxBackend:
+    """ONNX Runtime encoding of an exported transformer plus numpy pooling"""
+
+    name = 'onnx'
+
+    def __init__(self, model, export_dir: str, model_name: str, quantize: bool = False):
+        from sentence_transformers import models as st_models
+
+        transformer = model[0]
+        pooling = model[1]
+        self.tokenizer = transformer.tokenizer
+        self.max_seq_length = transformer.max_seq_length
+        self.pooling_mode = 'cls' if pooling.pooling_mode_cls_token else (
+            'max' if pooling.pooling_mode_max_tokens else 'mean'
+        )
+        self.always_normalize = any(isinstance(module, st_models.Normalize) for module in model)
+        if quantize:
+            self.name = 'onnx-int8'
+
+        self.onnx_path = self._export(transformer.auto_model, export_dir, model_name, quantize)
+        self.session = self._create_session(int(os.environ.get('ONNX_NUM_THREADS', '0')))
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def _create_session(self, num_threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(self.onnx_path, options, providers=['CPUExecutionProvider'])
+
+    def after_fork(self, num_threads: int):
+        """ONNX Runtime sessions are not fork-safe; forked encoder workers open their own"""
+        self.session = self._create_session(num_threads)
+
+    def _export(self, auto_model, export_dir: str, model_name: str, quantize: bool) -> str:
+        """Export the transformer to ONNX once and reuse the file on later starts"""
+        import torch
+
+        os.makedirs(export_dir, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        onnx_path = os.path.join(export_dir, f"{safe_name}.onnx")
+
+        if not os.path.exists(onnx_path):
+            logger.info(f"Exporting {model_name} to ONNX at {onnx_path}")
+            sample = self.tokenizer(["export sample"], return_tensors='pt')
+            input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+            dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+            dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+            auto_model.eval()
+            with torch.no_grad():
+                torch.onnx.export(
+                    auto_model,
+                    tuple(sample[name] for name in input_names),
+                    onnx_path,
+                    input_names=input_names,
+                    output_names=['last_hidden_state'],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                    do_constant_folding=True
+                )
+
+        if not quantize:
+            return onnx_path
+
+        quantized_path = os.path.join(export_dir, f"{safe_name}.int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            logger.info(f"Quantizing ONNX export to int8 at {quantized_path}")
+            quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling_mode == 'cls':
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        if self.pooling_mode == 'max':
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                list(texts[start:start + batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            pooled = self._pool(hidden, encoded['attention_mask'])
+            if normalize_embeddings or self.always_normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(batches)
+
+
+def check_parity(reference, candidate, texts: Optional[List[str]] = None, threshold: float = 0.99) -> Dict[str, Any]:
+    """Compare candidate output with the reference backend by per-text cosine similarity"""
+    texts = texts or PARITY_SAMPLE_TEXTS
+    expected = reference.encode(texts, normalize_embeddings=True)
+    actual = candidate.encode(texts, normalize_embeddings=True)
+    cosines = np.sum(expected * actual, axis=1)
+    return {
+        'threshold': threshold,
+        'min_cosine': round(float(cosines.min()), 6),
+        'mean_cosine': round(float(cosines.mean()), 6),
+        'samples': len(texts),
+        'passed': bool(cosines.min() >= threshold)
+    }
+
+
+def create_backend(model,
+                   backend_name: str,
+                   model_name: str,
+                   export_dir: str,
+                   parity_threshold: float = 0.99) -> Tuple[Any, Dict[str, Any]]:
+    """Build the requested backend, falling back to torch if it is unavailable or fails parity"""
+    backend_name = (backend_name or 'torch').lower()
+    reference = TorchBackend(model)
+    info = {'requested': backend_name, 'active': 'torch', 'parity': None, 'error': None}
+
+    if backend_name == 'torch':
+        return reference, info
+    if backend_name not in AVAILABLE_BACKENDS:
+        info['error'] = f"Unknown backend '{backend_name}', expected one of {', '.join(AVAILABLE_BACKENDS)}"
+        logger.warning(info['error'])
+        return reference, info
+
+    try:
+        build_start = time.time()
+        if backend_name == 'int8':
+            candidate = QuantizedTorchBackend(model)
+        else:
+            candidate = OnnxBackend(model, export_dir, model_name, quantize=backend_name == 'onnx-int8')
+        info['build_time_s'] = round(time.time() - build_start, 2)
+
+        parity = check_parity(reference, candidate, threshold=parity_threshold)
+        info['parity'] = parity
+        if not parity['passed']:
+            info['error'] = f"Parity check failed (min cosine {parity['min_cosine']} < {parity_threshold})"
+            logger.warning(f"⚠️ {backend_name} backend rejected: {info['error']}")
+            return reference, info
+
+        info['active'] = candidate.name
+        logger.info(f"✅ Using {candidate.name} inference backend (min cosine vs torch: {parity['min_cosine']})")
+        return candidate, info
+
+    except ImportError as e:
+        info['error'] = f"{backend_name} backend dependencies not installed: {e}"
+    except Exception as e:
+        info['error'] = f"Failed to initialize {backend_name} backend: {e}"
+    logger.warning(f"⚠️ {info['error']} - falling back to torch")
+    return reference, info
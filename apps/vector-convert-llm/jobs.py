@@ -0,0 +1,234 @@
+"""
+Jobs Module
+===========
+
+Asynchronous ingestion jobs with progress reporting.
+
+Embedding a large document (fetch, chunk, encode, save, notify) can take
+minutes, which is longer than a caller should hold an HTTP request open.
+JobManager queues the work and returns a job id straight away. A bounded
+queue feeds a fixed pool of worker threads, and threads suffice because
+model calls already go through the shared encode scheduler. Submissions
+past the queue limit are refused, not buffered without bound.
+
+Each job has a JobProgress that the pipeline updates as it goes: the
+current stage, cumulative time per stage, and chunk counters. The status
+endpoint reports a snapshot of it. Finished jobs are kept, up to a limit,
+so callers can collect their results.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class QueueFullError(RuntimeError):
+    """The job queue is at capacity"""
+
+
+class JobProgress:
+    """Thread-safe stage timings and counters for one unit of ingestion work"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage: Optional[str] = None
+        self.stage_ms: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.views: Dict[str, Callable[[], Any]] = {}
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Mark `stage` current and add the block's duration to its total"""
+        with self._lock:
+            self.stage = stage
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.stage_ms[stage] = self.stage_ms.get(stage, 0.0) + elapsed
+
+    def timed_iter(self, stage: str, items: Iterable) -> Iterator:
+        """Iterate `items`, charging the time spent producing each one to `stage`"""
+        iterator = iter(items)
+        while True:
+            with self.timed(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, **counters: int):
+        with self._lock:
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def set(self, **counters: int):
+        with self._lock:
+            self.counters.update({name: int(value) for name, value in counters.items()})
+
+    def attach(self, name: str, view: Callable[[], Any]):
+        """Include view() under `name` in every snapshot, e.g. a pipeline's live stats"""
+        with self._lock:
+            self.views[name] = view
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {
+                'stage': self.stage,
+                'stage_ms': {name: round(ms, 1) for name, ms in self.stage_ms.items()},
+                **self.counters
+            }
+            views = dict(self.views)
+        snapshot.update({name: view() for name, view in views.items()})
+        return snapshot
+
+
+class Job:
+    """One submitted unit of work and its outcome"""
+
+    def __init__(self, kind: str, params: Dict[str, Any], fn: Callable[['Job'], tuple]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.fn = fn
+        self.status = QUEUED
+        self.progress = JobProgress()
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.http_status: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def as_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        now = time.time()
+        info = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.params,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'queued_ms': int(((self.started_at or now) - self.submitted_at) * 1000),
+            'run_ms': int(((self.finished_at or now) - self.started_at) * 1000) if self.started_at else None,
+            'progress': self.progress.snapshot(),
+            'error': self.error
+        }
+        if include_result:
+            info['result'] = self.result
+            info['http_status'] = self.http_status
+        return info
+
+
+class JobManager:
+    """Bounded job queue drained by a fixed pool of worker threads"""
+
+    def __init__(self, workers: int = 2, max_queued: int = 100, history: int = 500):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.history = max(1, int(history))
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=self.max_queued)
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{n}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[Job], tuple]) -> Job:
+        """Queue fn(job) -> (result dict, http status); raises QueueFullError at capacity"""
+        self._ensure_workers()
+        job = Job(kind, params, fn)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queued} queued)")
+        with self._lock:
+            self.submitted += 1
+            self._trim_history()
+        return job
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                result, http_status = job.fn(job)
+                job.result, job.http_status = result, http_status
+                if http_status >= 400:
+                    job.error = (result or {}).get('error') or f"HTTP {http_status}"
+            except Exception as e:
+                logger.error(f"❌ Job {job.id} ({job.kind}) crashed: {e}", exc_info=True)
+                job.error = str(e)
+            job.finished_at = time.time()
+            job.status = FAILED if job.error else SUCCEEDED
+            with self._lock:
+                if job.error:
+                    self.failed += 1
+                else:
+                    self.succeeded += 1
+            logger.info(f"🏁 Job {job.id} ({job.kind}) {job.status} in {job.finished_at - job.started_at:.1f}s")
+            self._queue.task_done()
+
+    def _trim_history(self):
+        """Forget the oldest finished jobs past the history limit (lock held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = [job for job in reversed(self._jobs.values()) if status is None or job.status == status]
+        return [job.as_dict(include_result=False) for job in jobs[:limit]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': queued,
+                'running': running,
+                'submitted': self.submitted,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'tracked': len(self._jobs)
+            }
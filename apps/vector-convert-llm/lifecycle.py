@@ -0,0 +1,134 @@
+"""
+Startup Lifecycle Module
+========================
+
+Background startup phases with liveness and readiness.
+
+Importing main.py used to sleep, probe Convex and start the model thread
+before the server bound its port. Now the server binds first, and
+StartupLifecycle then runs each startup phase (model load, Convex
+connectivity and status reporting) in its own thread, in parallel. Every
+phase records its state, start time, duration and error.
+
+The service is live as soon as it can answer requests. It is ready once
+every required phase has finished. Phases that are not required, such as
+Convex connectivity by default, may fail and are reported, but they don't
+hold back readiness.
+
+A foreground phase runs to completion in the thread that calls start(),
+before any background phase starts. It is for work that must happen while
+the process is still single-threaded, such as forking the encoder pool (see
+encoder_pool.py).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class StartupLifecycle:
+    """Named startup phases run in parallel background threads"""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._required = set()
+        self._foreground = set()
+        self._threads = []
+
+    def add_phase(self, name: str, fn: Callable[[], Any], required: bool = True, foreground: bool = False):
+        """Register a phase; fn raising (or returning False) marks it failed"""
+        with self._lock:
+            if self.started_at is not None:
+                raise RuntimeError("Startup has already begun")
+            self._phases[name] = {'state': PENDING, 'fn': fn, 'started_at': None, 'duration_ms': None, 'error': None}
+            if required:
+                self._required.add(name)
+            if foreground:
+                self._foreground.add(name)
+
+    def start(self, foreground: bool = True) -> bool:
+        """Run foreground phases, then launch the rest; returns False if startup was already started
+
+        foreground=False launches every phase in the background, for callers
+        that must not block, such as a request thread.
+        """
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.time()
+            in_foreground = self._foreground if foreground else set()
+            foreground = [name for name in self._phases if name in in_foreground]
+            names = [name for name in self._phases if name not in in_foreground]
+        for name in foreground:
+            logger.info(f"🚦 Startup phase '{name}' running in the foreground")
+            self._run_phase(name)
+        for name in names:
+            thread = threading.Thread(target=self._run_phase, args=(name,), name=f'startup-{name}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        logger.info(f"🚦 Startup phases running in background: {', '.join(names)}")
+        return True
+
+    def _run_phase(self, name: str):
+        with self._lock:
+            phase = self._phases[name]
+            phase['state'] = RUNNING
+            phase['started_at'] = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            if phase['fn']() is False:
+                error = 'phase reported failure'
+        except Exception as e:
+            error = str(e)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            phase['duration_ms'] = duration_ms
+            phase['state'] = FAILED if error else DONE
+            phase['error'] = error
+        if error:
+            logger.warning(f"⚠️ Startup phase '{name}' failed after {duration_ms:.0f} ms: {error}")
+        else:
+            logger.info(f"✅ Startup phase '{name}' done in {duration_ms:.0f} ms")
+
+    def is_ready(self) -> bool:
+        """Startup has begun and every required phase completed successfully"""
+        with self._lock:
+            return self.started_at is not None and all(
+                self._phases[name]['state'] == DONE for name in self._required
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Phase states and timings for the health and readiness endpoints"""
+        with self._lock:
+            phases = {
+                name: {
+                    'state': phase['state'],
+                    'required': name in self._required,
+                    'duration_ms': phase['duration_ms'],
+                    'error': phase['error']
+                }
+                for name, phase in self._phases.items()
+            }
+            started_at = self.started_at
+        finished = [phase['duration_ms'] for phase in phases.values() if phase['duration_ms'] is not None]
+        return {
+            'started': started_at is not None,
+            'ready': self.is_ready(),
+            # Time from import to the background phases starting (the server binds alongside them)
+            'import_to_start_ms': round((started_at - self.created_at) * 1000, 1) if started_at else None,
+            # Phases overlap, so startup takes as long as the slowest one
+            'elapsed_ms': max(finished) if len(finished) == len(phases) and phases else None,
+            'phases': phases
+        }
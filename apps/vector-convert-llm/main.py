@@ -9,15 +9,34 @@ import time
 import threading
 import requests
 import uuid
-import re
-from typing import List, Dict, Any
-from langchain_text_splitters import RecursiveCharacterTextSplitter, MarkdownTextSplitter
+from typing import List, Dict, Any, Optional
 import json
 import psutil
-import gc
+import atexit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 import threading
 import requests
 from status_reporter import StatusReporter
+from convex_client import ConvexClient
+from batching import FixedTokenBudget, MicroBatcher, encode_length_bucketed, iter_batches
+from caching import ChunkCache, EmbeddingCache
+from chunk_sync import ChunkEmbeddingWriter, StoredChunks, chunk_hash
+from chunking_pool import ChunkedDocument, ChunkJob, ChunkingPool, resolve_chunking_workers
+from dedup import ChunkDeduplicator, MinHasher, NearDuplicateIndex
+from chunking import CHARACTERS, CHUNKER_VERSION, CHUNKING_MODES, TOKENS, TruncationStats, chunk_document, stream_chunk_document
+from encoder_pool import EncoderPool, resolve_worker_count, single_threaded_torch
+from model_artifacts import load_sentence_transformer
+from quantization import BINARY, FLOAT, OUTPUT_MODES, binary_search, output_size, pack_embeddings, quantize_binary, rescore
+from projection import PcaProjection, ProjectionStore, recall_at_k
+from model_registry import LoadedModel, ModelLoadError, ModelRegistry, UnknownModelError, estimate_model_bytes
+from scheduler import BULK, INTERACTIVE, PriorityScheduler
+from inference_backend import create_backend
+from jobs import JobManager, JobProgress, QueueFullError
+from pipeline import Pipeline
+from lifecycle import StartupLifecycle
+from runtime_profiles import GarbageCollector, select_profile
+from memory_budget import AdaptiveBatchSizer, resolve_memory_budget
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -64,9 +83,13 @@ def log_response_info(response):
 
 # Global variables to store the model and loading status
 model = None
+encoder = None  # inference backend wrapping the loaded model (see inference_backend.py)
+encoder_pool = None  # set when ENCODER_WORKERS > 0 (see encoder_pool.py)
+inference_backend_info = None
 model_loaded = False
 model_loading = False
 model_error = None
+loaded_model_name = os.environ.get('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
 start_time = time.time()
 load_start_time = None
 
@@ -74,6 +97,122 @@ load_start_time = None
 CONVEX_URL = os.environ.get('CONVEX_URL', 'http://localhost:3000')
 SERVICE_NAME = 'vector-convert-llm'
 status_reporter = None
+# Readiness waits for the default model; set STARTUP_REQUIRE_CONVEX to also wait for Convex connectivity
+STARTUP_REQUIRE_CONVEX = os.environ.get('STARTUP_REQUIRE_CONVEX', 'false').lower() == 'true'
+
+# Runtime profile (full/optimized/minimal, or 'auto' from the memory limit) supplies the
+# defaults for batch sizes, chunk sizes, caches, lazy loading and GC below (see runtime_profiles.py)
+runtime_profile = select_profile()
+# minimal: load the default model on the first request instead of at startup
+LAZY_MODEL_LOAD = runtime_profile.get('LAZY_MODEL_LOAD', 'false').lower() == 'true'
+# gc.collect() after every GC_INTERVAL POST requests (0 leaves collection to Python)
+GC_INTERVAL = int(runtime_profile.get('GC_INTERVAL', '0'))
+# chunk_size/chunk_overlap used when a document request doesn't give them
+DEFAULT_CHUNK_SIZE = int(runtime_profile.get('DEFAULT_CHUNK_SIZE', '1000'))
+DEFAULT_CHUNK_OVERLAP = int(runtime_profile.get('DEFAULT_CHUNK_OVERLAP', '200'))
+
+# Embedding models: EMBEDDING_MODEL loads at startup and serves requests that don't name a
+# model; the others in EMBEDDING_MODELS load on first request and unload least-recently-used
+# once the loaded models' estimated size passes MODEL_REGISTRY_MAX_MB (0 = no cap)
+EMBEDDING_MODEL = loaded_model_name
+EMBEDDING_MODELS = [name.strip() for name in runtime_profile.get('EMBEDDING_MODELS', 'all-MiniLM-L6-v2,BAAI/bge-small-en').split(',') if name.strip()]
+MODEL_REGISTRY_MAX_MB = float(runtime_profile.get('MODEL_REGISTRY_MAX_MB', '512'))
+# Model files are pinned under MODEL_ARTIFACTS_DIR at image build time (model_artifacts.py);
+# MODEL_OFFLINE refuses to download models that were not pinned instead of fetching them
+MODEL_ARTIFACTS_DIR = os.environ.get('MODEL_ARTIFACTS_DIR', '/app/models')
+MODEL_OFFLINE = os.environ.get('MODEL_OFFLINE', 'false').lower() == 'true'
+# Vectors written to Convex must match the document_embeddings vector index
+CONVEX_EMBEDDING_DIMENSIONS = int(os.environ.get('CONVEX_EMBEDDING_DIMENSIONS', '384'))
+
+# Corpus-fitted PCA projections (see projection.py), one per model under PROJECTION_DIR. With
+# EMBEDDING_PROJECTION_ENABLED, /embed, /encode and Convex writes output projected vectors by
+# default, so queries and stored chunks agree (the Convex vector index dimensions must match)
+PROJECTION_DIR = os.environ.get('PROJECTION_DIR', '/app/cache/projections')
+EMBEDDING_PROJECTION_ENABLED = os.environ.get('EMBEDDING_PROJECTION_ENABLED', 'false').lower() == 'true'
+PROJECTION_HOLDOUT_FRACTION = float(os.environ.get('PROJECTION_HOLDOUT_FRACTION', '0.1'))
+
+# /search with quantization=binary ranks by Hamming distance, then rescores this many
+# candidates per requested result with full-precision vectors
+SEARCH_RESCORE_OVERSAMPLE = int(os.environ.get('SEARCH_RESCORE_OVERSAMPLE', '4'))
+
+# Asynchronous ingestion jobs (see jobs.py): JOB_WORKERS threads drain a queue of at most
+# JOB_QUEUE_SIZE jobs; the last JOB_HISTORY_LIMIT jobs stay queryable
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '100'))
+JOB_HISTORY_LIMIT = int(os.environ.get('JOB_HISTORY_LIMIT', '500'))
+
+# Bulk /process-documents: documents are fetched BULK_FETCH_CONCURRENCY at a time over the
+# pooled Convex client, and their chunks encoded together in groups of about BULK_ENCODE_CHUNKS
+BULK_MAX_DOCUMENTS = int(os.environ.get('BULK_MAX_DOCUMENTS', '500'))
+BULK_FETCH_CONCURRENCY = int(os.environ.get('BULK_FETCH_CONCURRENCY', '8'))
+BULK_ENCODE_CHUNKS = int(os.environ.get('BULK_ENCODE_CHUNKS', '512'))
+# Chunk embeddings are written to Convex this many per request
+EMBEDDING_SAVE_BATCH_SIZE = int(os.environ.get('EMBEDDING_SAVE_BATCH_SIZE', '64'))
+
+# Inference backend configuration (torch, int8, onnx, onnx-int8)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'torch')
+BACKEND_PARITY_THRESHOLD = float(os.environ.get('BACKEND_PARITY_THRESHOLD', '0.99'))
+ONNX_EXPORT_DIR = os.environ.get('ONNX_EXPORT_DIR', '/app/cache/onnx')
+
+# Multi-process encoding: fork ENCODER_WORKERS processes sharing the loaded model
+# (0 disables the pool, 'auto' uses one worker per CPU in the container's quota)
+ENCODER_WORKERS = resolve_worker_count(os.environ.get('ENCODER_WORKERS', '0'))
+ENCODER_THREADS_PER_WORKER = int(os.environ.get('ENCODER_THREADS_PER_WORKER', '0'))
+ENCODER_PIN_CPUS = os.environ.get('ENCODER_PIN_CPUS', 'false').lower() == 'true'
+
+# Priority lanes: model calls run ENCODE_SCHEDULER_SLOTS at a time, interactive
+# query embeddings ahead of queued bulk ingestion batches
+ENCODE_SCHEDULER_SLOTS = int(os.environ.get('ENCODE_SCHEDULER_SLOTS', '1'))
+# Caller-supplied text lists longer than this (e.g. /similarity) queue as bulk work
+INTERACTIVE_MAX_TEXTS = int(os.environ.get('INTERACTIVE_MAX_TEXTS', '4'))
+
+# Micro-batching configuration for /embed and /encode
+MICRO_BATCHING_ENABLED = os.environ.get('MICRO_BATCHING_ENABLED', 'true').lower() == 'true'
+MICRO_BATCH_MAX_SIZE = int(runtime_profile.get('MICRO_BATCH_MAX_SIZE', '32'))
+MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', '5'))
+
+# Document chunk encoding: adaptive batch sizing under a RAM budget (see memory_budget.py),
+# or a fixed token budget per length-bucketed batch when ADAPTIVE_BATCHING_ENABLED=false
+ADAPTIVE_BATCHING_ENABLED = os.environ.get('ADAPTIVE_BATCHING_ENABLED', 'true').lower() == 'true'
+ENCODE_RAM_BUDGET_FRACTION = float(os.environ.get('ENCODE_RAM_BUDGET_FRACTION', '0.85'))
+ENCODE_TOKENS_PER_BATCH = int(runtime_profile.get('ENCODE_TOKENS_PER_BATCH', '4096'))
+ENCODE_MAX_BATCH_SIZE = int(runtime_profile.get('ENCODE_MAX_BATCH_SIZE', '64'))
+
+# Chunk sizing: 'characters' (chunk_size/chunk_overlap from the request) or 'tokens'
+# (packed to the model's max_seq_length with CHUNK_OVERLAP_TOKENS of overlap)
+CHUNKING_MODE = os.environ.get('CHUNKING_MODE', 'characters').lower()
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('CHUNK_OVERLAP_TOKENS', '32'))
+# Large documents are chunked, encoded and saved this many chunks at a time
+CHUNK_STREAM_BATCH_SIZE = int(runtime_profile.get('CHUNK_STREAM_BATCH_SIZE', '256'))
+# Ingestion stages (fetch, chunk, encode, save) run concurrently with at most this
+# many batches queued between each pair
+PIPELINE_QUEUE_SIZE = int(runtime_profile.get('PIPELINE_QUEUE_SIZE', '4'))
+
+# Embedding cache configuration (disk tier is enabled by setting EMBEDDING_CACHE_DIR)
+EMBEDDING_CACHE_ENABLED = runtime_profile.get('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+EMBEDDING_CACHE_MAX_MB = float(runtime_profile.get('EMBEDDING_CACHE_MAX_MB', '64'))
+EMBEDDING_CACHE_DIR = os.environ.get('EMBEDDING_CACHE_DIR')
+EMBEDDING_CACHE_DISK_MAX_MB = float(os.environ.get('EMBEDDING_CACHE_DISK_MAX_MB', '1024'))
+
+# Chunking result cache (disk tier is enabled by setting CHUNK_CACHE_DIR)
+CHUNK_CACHE_ENABLED = runtime_profile.get('CHUNK_CACHE_ENABLED', 'true').lower() == 'true'
+CHUNK_CACHE_MAX_MB = float(runtime_profile.get('CHUNK_CACHE_MAX_MB', '32'))
+CHUNK_CACHE_DIR = os.environ.get('CHUNK_CACHE_DIR')
+CHUNK_CACHE_DISK_MAX_MB = float(os.environ.get('CHUNK_CACHE_DISK_MAX_MB', '512'))
+
+# Multi-document ingestion chunks documents in parallel worker processes
+# (0 chunks in-process, 'auto' uses one worker per CPU in the container's quota)
+CHUNKING_WORKERS = resolve_chunking_workers(runtime_profile.get('CHUNKING_WORKERS', 'auto'))
+CHUNKING_QUEUE_SIZE = int(os.environ.get('CHUNKING_QUEUE_SIZE', '8'))
+CHUNKING_POOL_MIN_CHARS = int(os.environ.get('CHUNKING_POOL_MIN_CHARS', '20000'))
+
+# Near-duplicate chunks (boilerplate, headers, footers) reuse an indexed embedding
+# instead of being encoded again. Every chunk is still saved, near-duplicates with the
+# reused vector; only exact repeats of a chunk's text can skip the save
+NEAR_DUPLICATE_ENABLED = runtime_profile.get('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.9'))
+NEAR_DUPLICATE_INDEX_MAX_MB = float(runtime_profile.get('NEAR_DUPLICATE_INDEX_MAX_MB', '32'))
+NEAR_DUPLICATE_SKIP_SAVES = os.environ.get('NEAR_DUPLICATE_SKIP_SAVES', 'false').lower() == 'true'
 
 # Log environment configuration for debugging
 logger.info(f"🔧 Environment Configuration:")
@@ -82,59 +221,114 @@ logger.info(f"   SERVICE_NAME: {SERVICE_NAME}")
 logger.info(f"   PORT: {os.environ.get('PORT', '7999')}")
 logger.info(f"   Python version: {sys.version}")
 logger.info(f"   Working directory: {os.getcwd()}")
+logger.info(f"   Runtime profile: {runtime_profile.name} ({runtime_profile.reason}; overrides: {', '.join(runtime_profile.overrides()) or 'none'})")
+logger.info(f"   Model loading: {'lazy (first request)' if LAZY_MODEL_LOAD else 'at startup'}, gc_interval={GC_INTERVAL or 'off'}, default_chunk={DEFAULT_CHUNK_SIZE}/{DEFAULT_CHUNK_OVERLAP}")
+logger.info(f"   Startup: readiness requires model{' and Convex' if STARTUP_REQUIRE_CONVEX else ''}")
+logger.info(f"   Embedding models: default={EMBEDDING_MODEL}, available={', '.join(EMBEDDING_MODELS)} (max_mb={MODEL_REGISTRY_MAX_MB})")
+logger.info(f"   Model artifacts: {MODEL_ARTIFACTS_DIR} (offline={MODEL_OFFLINE})")
+logger.info(f"   Projection: enabled={EMBEDDING_PROJECTION_ENABLED} (dir={PROJECTION_DIR}, holdout={PROJECTION_HOLDOUT_FRACTION})")
+logger.info(f"   Jobs: workers={JOB_WORKERS}, queue_size={JOB_QUEUE_SIZE}, history={JOB_HISTORY_LIMIT}")
+logger.info(f"   Bulk ingestion: max_documents={BULK_MAX_DOCUMENTS}, fetch_concurrency={BULK_FETCH_CONCURRENCY}, encode_chunks={BULK_ENCODE_CHUNKS}")
+logger.info(f"   Embedding save batch size: {EMBEDDING_SAVE_BATCH_SIZE}")
+logger.info(f"   Inference backend: {INFERENCE_BACKEND} (parity threshold={BACKEND_PARITY_THRESHOLD})")
+logger.info(f"   Encoder workers: {ENCODER_WORKERS or 'disabled'} (threads_per_worker={ENCODER_THREADS_PER_WORKER or 'auto'}, pin_cpus={ENCODER_PIN_CPUS})")
+logger.info(f"   Encode scheduler slots: {ENCODE_SCHEDULER_SLOTS}, interactive_max_texts={INTERACTIVE_MAX_TEXTS}")
+logger.info(f"   Micro-batching: {MICRO_BATCHING_ENABLED} (max_batch_size={MICRO_BATCH_MAX_SIZE}, max_wait_ms={MICRO_BATCH_WAIT_MS})")
+logger.info(f"   Chunking mode: {CHUNKING_MODE} (overlap_tokens={CHUNK_OVERLAP_TOKENS}, stream_batch_size={CHUNK_STREAM_BATCH_SIZE}, pipeline_queue_size={PIPELINE_QUEUE_SIZE})")
+logger.info(f"   Embedding cache: {EMBEDDING_CACHE_ENABLED} (max_mb={EMBEDDING_CACHE_MAX_MB}, disk_dir={EMBEDDING_CACHE_DIR or 'disabled'})")
+logger.info(f"   Chunking workers: {CHUNKING_WORKERS or 'in-process'} (queue_size={CHUNKING_QUEUE_SIZE}, min_pool_chars={CHUNKING_POOL_MIN_CHARS})")
+logger.info(f"   Chunk cache: {CHUNK_CACHE_ENABLED} (max_mb={CHUNK_CACHE_MAX_MB}, disk_dir={CHUNK_CACHE_DIR or 'disabled'})")
+logger.info(f"   Near-duplicate reuse: {NEAR_DUPLICATE_ENABLED} (threshold={NEAR_DUPLICATE_THRESHOLD}, max_mb={NEAR_DUPLICATE_INDEX_MAX_MB}, skip_saves={NEAR_DUPLICATE_SKIP_SAVES})")
 
 # Conversion job functions removed as part of tech debt cleanup
 # These functions were previously used to track LLM/embedding conversion history
 # but are no longer needed as the conversion_jobs table has been removed
 
+def load_embedding_model(model_name: str, use_encoder_pool: bool = False) -> LoadedModel:
+    """Load one SentenceTransformer from its pinned artifacts with its inference backend and micro-batchers"""
+    started = time.time()
+    os.environ['HF_HUB_DISABLE_PROGRESS_BARS'] = '1'
+    os.environ['HF_HUB_DISABLE_TELEMETRY'] = '1'
+
+    # The encoder workers must be forked before torch starts its thread pool (see
+    # encoder_pool.py), so a pooled model loads on one torch thread and skips warmup
+    pooled = use_encoder_pool and ENCODER_WORKERS > 0
+    with single_threaded_torch() if pooled else nullcontext():
+        st_model, load_report = load_sentence_transformer(
+            model_name, MODEL_ARTIFACTS_DIR, offline=MODEL_OFFLINE, warmup=not pooled
+        )
+
+        # Select the inference engine; anything other than torch must pass a parity check
+        backend_started = time.perf_counter()
+        backend, backend_info = create_backend(
+            st_model, INFERENCE_BACKEND, model_name, ONNX_EXPORT_DIR, BACKEND_PARITY_THRESHOLD
+        )
+        load_report['phases_ms']['backend'] = round((time.perf_counter() - backend_started) * 1000, 1)
+        memory_bytes = estimate_model_bytes(st_model, backend)
+        pool = None
+        if pooled:
+            backend = start_encoder_pool(backend)
+            pool = backend if isinstance(backend, EncoderPool) else None
+    if pooled:
+        # Warm up whatever serves requests now: the workers, or the in-process fallback
+        warmup_started = time.perf_counter()
+        backend.encode(["warmup"])
+        load_report['phases_ms']['warmup'] = round((time.perf_counter() - warmup_started) * 1000, 1)
+
+    loaded = LoadedModel(
+        model_name,
+        st_model,
+        backend,
+        backend_info=backend_info,
+        encoder_pool=pool,
+        memory_bytes=memory_bytes,
+        load_time_s=time.time() - started,
+        load_report=load_report
+    )
+    # Concurrent /embed and /encode callers share forward passes through these batchers
+    loaded.embed_batcher = MicroBatcher(
+        lambda texts: _encode_normalized(texts, loaded),
+        MICRO_BATCH_MAX_SIZE, MICRO_BATCH_WAIT_MS, name=f'embed:{model_name}'
+    )
+    loaded.encode_batcher = MicroBatcher(
+        lambda texts: _encode_raw(texts, loaded, lane=INTERACTIVE),
+        MICRO_BATCH_MAX_SIZE, MICRO_BATCH_WAIT_MS, name=f'encode:{model_name}'
+    )
+    return loaded
+
 def load_model():
-    """Load the sentence transformer model with retry logic and fallback"""
-    global model, model_loaded, model_loading, model_error, load_start_time, status_reporter
+    """Load the default sentence transformer model, retrying a failed download once"""
+    global model, model_loaded, model_loading, model_error, load_start_time, status_reporter, loaded_model_name
+    global encoder, inference_backend_info
     import time
-    import os
     
     try:
         model_loading = True
         model_error = None
         load_start_time = time.time()
-        logger.info("Loading minimal sentence-transformers model: all-MiniLM-L6-v2")
+        logger.info(f"Loading sentence-transformers model: {EMBEDDING_MODEL}")
         
         # Send loading status
         if status_reporter:
-            status_reporter.send_loading_status("Loading sentence transformer model: all-MiniLM-L6-v2")
+            status_reporter.send_loading_status(f"Loading sentence transformer model: {EMBEDDING_MODEL}")
         
-        # Import here to avoid startup issues
-        from sentence_transformers import SentenceTransformer
-        
-        # Try multiple approaches to load the model
-        model_names = [
-            'all-MiniLM-L6-v2',
-            'paraphrase-MiniLM-L6-v2'
-        ]
+        # No fallback model: the image pins only PRELOAD_MODELS, and a different model's
+        # vectors wouldn't match those already stored. Pinned artifacts load from disk, so
+        # only a download gets a second attempt
+        model_names = [EMBEDDING_MODEL] * (1 if MODEL_OFFLINE else 2)
         
         for attempt, model_name in enumerate(model_names, 1):
             try:
                 logger.info(f"Attempt {attempt}: Loading model '{model_name}'")
+                loaded = load_embedding_model(model_name, use_encoder_pool=True)
                 
-                # Set environment variables for better connectivity
-                os.environ['HF_HUB_DISABLE_PROGRESS_BARS'] = '1'
-                os.environ['HF_HUB_DISABLE_TELEMETRY'] = '1'
-                
-                # Try loading with different configurations
-                if attempt == 1:
-                    # First attempt: normal loading
-                    model = SentenceTransformer(model_name, cache_folder='/app/cache/transformers')
-                elif attempt == 2:
-                    # Second attempt: with explicit cache and trust_remote_code
-                    model = SentenceTransformer(
-                        model_name, 
-                        cache_folder='/app/cache/transformers',
-                        trust_remote_code=True
-                    )
-                else:
-                    # Third attempt: fallback model
-                    model = SentenceTransformer(model_name)
-                
+                # The default model stays loaded for the life of the process; requests
+                # that don't name a model use it
+                model_registry.register(loaded, pinned=True, default=True)
+                model = loaded.model
+                encoder = loaded.encoder
+                inference_backend_info = loaded.backend_info
+                loaded_model_name = model_name
                 model_loaded = True
                 model_loading = False
                 logger.info(f"Model '{model_name}' loaded successfully on attempt {attempt}")
@@ -148,8 +342,9 @@ def load_model():
             except Exception as e:
                 logger.warning(f"Attempt {attempt} failed for model '{model_name}': {e}")
                 if attempt < len(model_names):
-                    logger.info(f"Retrying with next model...")
-                    time.sleep(2)  # Wait before retry
+                    logger.info(f"Retrying...")
+                    if not MODEL_OFFLINE:
+                        time.sleep(2)  # Give a flaky network a moment before the next download
                 else:
                     raise e
                     
@@ -164,226 +359,357 @@ def load_model():
         
         # Set a flag to indicate we're running without a model
         model = None
+        encoder = None
         model_loaded = False
         logger.warning("Service will run in degraded mode without embedding model")
         
         # Don't raise the exception - let the service continue without the model
         # raise e
 
-def load_model_async():
-    """Load model in background thread"""
+def start_encoder_pool(backend):
+    """Fork the encoder workers around a loaded backend, keeping the backend in-process on failure"""
+    global encoder_pool
     try:
-        load_model()
+        encoder_pool = EncoderPool(
+            backend,
+            ENCODER_WORKERS,
+            threads_per_worker=ENCODER_THREADS_PER_WORKER or None,
+            pin_cpus=ENCODER_PIN_CPUS
+        )
+        atexit.register(encoder_pool.close)
+        return encoder_pool
     except Exception as e:
-        logger.error(f"Background model loading failed: {e}")
+        logger.error(f"❌ Failed to start encoder pool, encoding in-process: {e}")
+        encoder_pool = None
+        return backend
+
+# One pooled client for every Convex call: document fetches, chunk saves, notifications
+# and status reports (CONVEX_POOL_SIZE, CONVEX_TIMEOUT, CONVEX_RETRIES, CONVEX_GZIP_MIN_BYTES)
+convex = ConvexClient.from_env(CONVEX_URL)
+
+def load_model_phase() -> bool:
+    """Startup phase: load the default model; fails (and leaves the service degraded) without one"""
+    load_model()
+    return model_loaded
+
+def start_status_reporting() -> bool:
+    """Startup phase: check Convex connectivity and start periodic status reports"""
+    global status_reporter
+    logger.info(f"Initializing status reporter with CONVEX_URL: {CONVEX_URL}")
+    reporter = StatusReporter(SERVICE_NAME, CONVEX_URL, check_connectivity=False, client=convex)
+    status_reporter = reporter
+    connected = reporter.test_connectivity()
+    if not model_loaded and not model_error:
+        reporter.send_startup_status()
+    # The first periodic report goes out immediately with whatever the model phase has reached
+    reporter.start_periodic_reporting(interval_seconds=30, get_status_callback=get_current_status)
+    return connected
+
+# Nothing here blocks import: serve() starts these phases, in background threads while the
+# server binds its port. With LAZY_MODEL_LOAD the model is not a startup phase; the first
+# POST request loads it. With ENCODER_WORKERS the model phase is a foreground phase instead:
+# serve() loads the model and forks the workers before the server or any other phase starts
+# a thread (see encoder_pool.py), so the port binds only once the model is loaded
+startup = StartupLifecycle()
+if ENCODER_WORKERS > 0 and LAZY_MODEL_LOAD:
+    logger.warning("⚠️ LAZY_MODEL_LOAD ignored: ENCODER_WORKERS must fork before the server starts")
+    LAZY_MODEL_LOAD = False
+if not LAZY_MODEL_LOAD:
+    startup.add_phase('model', load_model_phase, foreground=ENCODER_WORKERS > 0)
+startup.add_phase('convex', start_status_reporting, required=STARTUP_REQUIRE_CONVEX)
 
-def chunk_document(content: str, content_type: str = "text", chunk_size: int = 1000, chunk_overlap: int = 200) -> List[str]:
-    """Chunk document content using improved semantic splitting"""
+lazy_load_lock = threading.Lock()
+garbage_collector = GarbageCollector(GC_INTERVAL)
+
+def ensure_model_loaded() -> bool:
+    """Load the default model now if it isn't loaded (lazy loading); concurrent callers wait"""
+    if model_loaded:
+        return True
+    with lazy_load_lock:
+        if not model_loaded:
+            load_model()
+    return model_loaded
+
+def start_from_request():
+    """Start the phases from the first request, under WSGI servers that import the app without serve()"""
+    global ENCODER_WORKERS
+    if startup.started_at is not None:
+        return
+    if ENCODER_WORKERS > 0:
+        # The server's threads already run, so forking the encoder pool here would be unsafe
+        logger.error(
+            f"❌ ENCODER_WORKERS={ENCODER_WORKERS} needs the service started through serve.py "
+            f"(the pool must fork before any thread starts); encoding in-process instead"
+        )
+        ENCODER_WORKERS = 0
+    # Every phase goes to the background so this request isn't held for the model load
+    startup.start(foreground=False)
+
+@app.before_request
+def ensure_startup():
+    start_from_request()
+    if LAZY_MODEL_LOAD and request.method == 'POST':
+        ensure_model_loaded()
+
+@app.after_request
+def collect_garbage(response):
+    if request.method == 'POST':
+        garbage_collector.tick()
+    return response
+
+# Models other than the default load on first request through the registry
+model_registry = ModelRegistry(
+    load_embedding_model,
+    EMBEDDING_MODEL,
+    EMBEDDING_MODELS,
+    max_memory_bytes=int(MODEL_REGISTRY_MAX_MB * 1024 * 1024)
+)
+
+projection_store = ProjectionStore(PROJECTION_DIR)
+
+def active_projection(loaded: LoadedModel, requested=None):
+    """The model's fitted projection when the request (default EMBEDDING_PROJECTION_ENABLED) asks for one"""
+    if not (EMBEDDING_PROJECTION_ENABLED if requested is None else requested):
+        return None
+    return projection_store.get(loaded.name)
+
+def stored_projection_dimension(loaded: LoadedModel):
+    """Dimensions of the vectors written to Convex for a model"""
+    projection = active_projection(loaded)
+    return projection.dimensions if projection is not None else loaded.dimension
+
+def to_stored_vector(row, projection) -> List[float]:
+    """An embedding row as saved to Convex, projected when a projection is active"""
+    return (projection.apply(row) if projection is not None else np.asarray(row)).tolist()
+
+def request_model(data, for_convex: bool = False) -> tuple:
+    """(LoadedModel, None) for the model a request names, or (None, error response)"""
     try:
-        # First, try semantic chunking for structured content
-        semantic_chunks = semantic_chunk_document(content, chunk_size)
-        if semantic_chunks and len(semantic_chunks) > 1:
-            logger.info(f"Document semantically chunked into {len(semantic_chunks)} pieces")
-            return semantic_chunks
-        
-        # Fallback to LangChain splitters
-        if content_type.lower() == "markdown":
-            # Use MarkdownTextSplitter for markdown content
-            text_splitter = MarkdownTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                length_function=len,
-            )
-        else:
-            # Use RecursiveCharacterTextSplitter with better separators for structured content
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                length_function=len,
-                separators=[
-                    "\n\n\n",  # Multiple line breaks
-                    "\n\n",    # Double line breaks
-                    "\n",      # Single line breaks
-                    ". ",      # Sentence endings
-                    ", ",      # Comma separations
-                    " ",       # Spaces
-                    ""
-                ]
-            )
-        
-        chunks = text_splitter.split_text(content)
-        logger.info(f"Document chunked into {len(chunks)} pieces (chunk_size={chunk_size}, overlap={chunk_overlap})")
-        return chunks
-        
+        loaded = model_registry.get((data or {}).get('model'))
+    except UnknownModelError as e:
+        return None, (jsonify({'error': str(e), 'available_models': model_registry.allowed_models}), 400)
+    except ModelLoadError as e:
+        return None, (jsonify({'error': str(e)}), 503)
+    stored_dimension = stored_projection_dimension(loaded)
+    if for_convex and stored_dimension not in (None, CONVEX_EMBEDDING_DIMENSIONS):
+        return None, (jsonify({
+            'error': f"Model '{loaded.name}' produces {stored_dimension}-dimensional embeddings; "
+                     f"the Convex vector index expects {CONVEX_EMBEDDING_DIMENSIONS}"
+        }), 400)
+    return loaded, None
+
+# Interactive query embeddings always run between bulk ingestion batches
+encode_scheduler = PriorityScheduler((INTERACTIVE, BULK), slots=ENCODE_SCHEDULER_SLOTS)
+
+def _encode_normalized(texts: List[str], loaded: LoadedModel):
+    """Model call used by /embed: normalized embeddings for similarity search"""
+    return encode_scheduler.run(
+        INTERACTIVE,
+        lambda: loaded.encoder.encode(texts, batch_size=min(32, len(texts)), normalize_embeddings=True)
+    )
+
+def lane_for(texts: List[str]) -> str:
+    """INTERACTIVE for a handful of texts; longer lists would hold the priority lane like a bulk batch"""
+    return INTERACTIVE if len(texts) <= INTERACTIVE_MAX_TEXTS else BULK
+
+def _encode_raw(texts: List[str], loaded: LoadedModel, lane: str = BULK):
+    """Model call used by /encode and document ingestion: raw (unnormalized) embeddings"""
+    return encode_scheduler.run(lane, lambda: loaded.encoder.encode(texts, batch_size=max(1, len(texts))))
+
+def batched_encode(batcher: MicroBatcher, texts: List[str]) -> np.ndarray:
+    """Encode texts through a micro-batcher, or directly when batching is disabled"""
+    if not MICRO_BATCHING_ENABLED or not texts:
+        return np.asarray(batcher.encode_fn(texts))
+    return np.vstack(batcher.encode(texts))
+
+# Identical texts (repeated queries, re-ingested documents, boilerplate chunks) are encoded once
+embedding_cache = EmbeddingCache(
+    int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+    disk_dir=EMBEDDING_CACHE_DIR,
+    max_disk_bytes=int(EMBEDDING_CACHE_DISK_MAX_MB * 1024 * 1024)
+) if EMBEDDING_CACHE_ENABLED else None
+
+def cached_encode(texts: List[str], encode_fn, normalize: bool, loaded: LoadedModel) -> np.ndarray:
+    """Encode texts, serving repeats from the embedding cache when it is enabled"""
+    if embedding_cache is None or not texts:
+        return np.asarray(encode_fn(texts))
+    return embedding_cache.encode(texts, encode_fn, loaded.vector_identity, normalize)
+
+def token_lengths(texts: List[str], loaded: LoadedModel) -> List[int]:
+    """Tokenized length of each text (capped at the model's max_seq_length) in one fast batch call"""
+    try:
+        encoded = loaded.model.tokenizer(
+            list(texts),
+            add_special_tokens=True,
+            truncation=True,
+            max_length=loaded.model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+        return [len(ids) for ids in encoded['input_ids']]
     except Exception as e:
-        logger.error(f"Error chunking document: {e}")
-        # Fallback to simple chunking if LangChain fails
-        return simple_chunk_text(content, chunk_size)
+        logger.warning(f"Tokenizer length lookup failed, estimating from characters: {e}")
+        return [max(1, len(text) // 4) for text in texts]
+
+# Chunk batches are sized from measured memory per token against the service's RAM budget
+if ADAPTIVE_BATCHING_ENABLED:
+    encode_budget_bytes, encode_budget_source = resolve_memory_budget(ENCODE_RAM_BUDGET_FRACTION)
+    chunk_batch_sizer = AdaptiveBatchSizer(
+        encode_budget_bytes, encode_budget_source, max_batch_size=ENCODE_MAX_BATCH_SIZE
+    )
+else:
+    chunk_batch_sizer = FixedTokenBudget(ENCODE_TOKENS_PER_BATCH, ENCODE_MAX_BATCH_SIZE)
+
+# Re-processing unchanged content with the same splitter settings skips chunking entirely
+chunk_cache = ChunkCache(
+    int(CHUNK_CACHE_MAX_MB * 1024 * 1024),
+    disk_dir=CHUNK_CACHE_DIR,
+    max_disk_bytes=int(CHUNK_CACHE_DISK_MAX_MB * 1024 * 1024)
+) if CHUNK_CACHE_ENABLED else None
+
+# Chunks many documents at once, handing results to the encoder through a bounded queue
+chunking_pool = ChunkingPool(
+    CHUNKING_WORKERS, CHUNKING_QUEUE_SIZE, CHUNKING_POOL_MIN_CHARS, cache=chunk_cache
+)
+atexit.register(chunking_pool.close)
+
+def chunk_cache_key(content: str, content_type: str, chunk_size: int, chunk_overlap: int, mode: str, **extra) -> str:
+    """ChunkCache key covering everything that changes how a document is split"""
+    return ChunkCache.make_key(
+        content,
+        content_type=content_type,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        mode=mode,
+        chunker_version=CHUNKER_VERSION,
+        **extra
+    )
+
+def stream_chunks_for_model(content: str,
+                            content_type: str,
+                            chunk_size: int,
+                            chunk_overlap: int,
+                            mode: str = None,
+                            loaded: LoadedModel = None) -> tuple:
+    """Chunks of a document in the requested mode, yielded incrementally in characters mode"""
+    mode = (mode or CHUNKING_MODE).lower()
+    if mode not in CHUNKING_MODES:
+        logger.warning(f"Unknown chunking mode '{mode}', using {CHUNKING_MODE}")
+        mode = CHUNKING_MODE
+
+    cache_params = {}
+    if mode != TOKENS:
+        chunk_fn = lambda: stream_chunk_document(content, content_type, chunk_size, chunk_overlap)
+    else:
+        # Token windows follow the requesting model's tokenizer
+        tokenizer = getattr(loaded.model, 'tokenizer', None)
+        try:
+            special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
+        except Exception:
+            special_tokens = 2
+        max_tokens = loaded.model.max_seq_length - special_tokens
+        cache_params = {'model': loaded.name, 'max_tokens': max_tokens, 'overlap_tokens': CHUNK_OVERLAP_TOKENS}
+        chunk_fn = lambda: chunk_document(
+            content, content_type, chunk_size, chunk_overlap,
+            mode=mode,
+            tokenizer=tokenizer,
+            max_tokens=max_tokens,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS
+        )
+
+    if chunk_cache is None:
+        return iter(chunk_fn()), mode
+    cache_key = chunk_cache_key(content, content_type, chunk_size, chunk_overlap, mode, **cache_params)
+    return chunk_cache.stream(cache_key, chunk_fn), mode
 
-def semantic_chunk_document(content: str, max_chunk_size: int = 1000) -> List[str]:
-    """Semantic chunking that preserves numbered lists and structured content"""
+def chunk_documents_parallel(documents) -> Any:
+    """
+    Chunk many documents (dicts with document_id, content and optionally content_type,
+    chunk_size, chunk_overlap) in characters mode on the chunking pool, yielding
+    ChunkedDocument results in completion order through its bounded queue.
+    """
+    def jobs():
+        for document in documents:
+            content_type = document.get('content_type', 'text')
+            chunk_size = document.get('chunk_size', DEFAULT_CHUNK_SIZE)
+            chunk_overlap = document.get('chunk_overlap', DEFAULT_CHUNK_OVERLAP)
+            yield ChunkJob(
+                document['document_id'],
+                document['content'],
+                content_type,
+                chunk_size,
+                chunk_overlap,
+                chunk_cache_key(document['content'], content_type, chunk_size, chunk_overlap, CHARACTERS)
+                if chunk_cache is not None else None
+            )
+    return chunking_pool.chunk_documents(jobs())
+
+def new_truncation_stats(loaded: LoadedModel):
+    """Truncation accumulator for a loaded model, or None without a tokenizer"""
+    tokenizer = getattr(loaded.model, 'tokenizer', None)
+    return TruncationStats(tokenizer, loaded.model.max_seq_length) if tokenizer is not None else None
+
+def track_truncation(stats, chunks: List[str]):
+    if stats is None:
+        return
     try:
-        lines = content.split('\n')
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Check if this line starts a numbered list or structured section
-            if is_section_start(line):
-                # Save current chunk if it exists
-                if current_chunk and current_size > 100:  # Only save substantial chunks
-                    chunks.append('\n'.join(current_chunk).strip())
-                    current_chunk = []
-                    current_size = 0
-                
-                # Collect the entire section/numbered item with its sub-items
-                section_lines = collect_section(lines, i)
-                section_text = '\n'.join(section_lines).strip()
-                
-                # If section is too large, split it but keep related content together
-                if len(section_text) > max_chunk_size:
-                    # Try to split at sub-items while keeping main item intact
-                    sub_chunks = split_large_section(section_text, max_chunk_size)
-                    chunks.extend(sub_chunks)
-                else:
-                    # Add section as a single chunk
-                    if section_text:
-                        chunks.append(section_text)
-                
-                # Skip the lines we just processed
-                i += len(section_lines)
-                continue
-            
-            # Regular line processing
-            line_with_newline = lines[i]
-            if current_size + len(line_with_newline) > max_chunk_size and current_chunk:
-                # Save current chunk and start new one
-                chunks.append('\n'.join(current_chunk).strip())
-                current_chunk = [line_with_newline]
-                current_size = len(line_with_newline)
-            else:
-                current_chunk.append(line_with_newline)
-                current_size += len(line_with_newline) + 1  # +1 for newline
-            
-            i += 1
-        
-        # Add final chunk
-        if current_chunk:
-            final_chunk = '\n'.join(current_chunk).strip()
-            if final_chunk:
-                chunks.append(final_chunk)
-        
-        # Filter out very small chunks and merge them with adjacent ones
-        filtered_chunks = []
-        for chunk in chunks:
-            if len(chunk.strip()) < 50 and filtered_chunks:
-                # Merge small chunk with previous one
-                filtered_chunks[-1] += '\n\n' + chunk
-            elif len(chunk.strip()) >= 50:
-                filtered_chunks.append(chunk)
-        
-        return filtered_chunks if len(filtered_chunks) > 1 else []
-        
+        stats.add(chunks)
     except Exception as e:
-        logger.error(f"Error in semantic chunking: {e}")
-        return []
-
-def is_section_start(line: str) -> bool:
-    """Check if line starts a new section (numbered item, header, etc.)"""
-    line = line.strip()
-    if not line:
-        return False
-    
-    # Numbered lists (1., 2., etc.)
-    if re.match(r'^\d+\.\s', line):
-        return True
-    
-    # Lettered lists (a., b., etc.)
-    if re.match(r'^[a-zA-Z]\.\s', line):
-        return True
-    
-    # Bullet points
-    if re.match(r'^[-*•]\s', line):
-        return True
-    
-    # Headers (markdown style)
-    if line.startswith('#'):
-        return True
-    
-    # Step indicators
-    if re.match(r'^(step|phase|stage)\s*\d+', line.lower()):
-        return True
-    
-    return False
+        logger.warning(f"Could not compute truncation stats: {e}")
 
-def collect_section(lines: List[str], start_idx: int) -> List[str]:
-    """Collect all lines belonging to a section starting at start_idx"""
-    section_lines = [lines[start_idx]]
-    i = start_idx + 1
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Empty line - include it but check next line
-        if not line:
-            section_lines.append(lines[i])
-            i += 1
-            continue
-        
-        # If we hit another section start, stop
-        if is_section_start(line):
-            break
-        
-        # Include lines that seem to be part of this section
-        # (indented content, continuation, sub-items)
-        if (lines[i].startswith('  ') or  # Indented
-            lines[i].startswith('\t') or  # Tabbed
-            re.match(r'^\s*[a-zA-Z]\.|^\s*[-*•]', line) or  # Sub-items
-            not re.match(r'^\d+\.', line)):  # Not a new numbered item
-            section_lines.append(lines[i])
-        else:
-            break
-        
-        i += 1
-    
-    return section_lines
-
-def split_large_section(section_text: str, max_size: int) -> List[str]:
-    """Split a large section while trying to preserve semantic meaning"""
-    # Try to split at natural boundaries within the section
-    lines = section_text.split('\n')
-    chunks = []
-    current_chunk = []
-    current_size = 0
-    
-    for line in lines:
-        if current_size + len(line) > max_size and current_chunk:
-            chunks.append('\n'.join(current_chunk))
-            current_chunk = [line]
-            current_size = len(line)
-        else:
-            current_chunk.append(line)
-            current_size += len(line) + 1
-    
-    if current_chunk:
-        chunks.append('\n'.join(current_chunk))
-    
-    return chunks
+def summarize_truncation(stats, mode: str):
+    """Log and return the truncation stats of one document"""
+    if stats is None:
+        return None
+    summary = stats.as_dict()
+    summary['mode'] = mode
+    logger.info(
+        f"✂️ Chunking ({mode}): {summary['truncated_chunks']}/{summary['chunks']} chunks exceed "
+        f"{summary['max_seq_length']} tokens, {summary['dropped_tokens']}/{summary['total_tokens']} tokens truncated"
+    )
+    return summary
 
-def simple_chunk_text(text: str, max_chunk_size: int = 1000) -> List[str]:
-    """Simple fallback chunking method"""
-    if len(text) <= max_chunk_size:
-        return [text]
-    
-    chunks = []
-    for i in range(0, len(text), max_chunk_size):
-        chunks.append(text[i:i + max_chunk_size])
-    
-    return chunks
+def chunk_for_model(content: str,
+                    content_type: str,
+                    chunk_size: int,
+                    chunk_overlap: int,
+                    mode: str = None,
+                    loaded: LoadedModel = None) -> tuple:
+    """Chunk a document in the requested mode and measure how much of it the model would truncate"""
+    chunk_stream, mode = stream_chunks_for_model(content, content_type, chunk_size, chunk_overlap, mode, loaded)
+    chunks = list(chunk_stream)
+    stats = new_truncation_stats(loaded)
+    track_truncation(stats, chunks)
+    return chunks, summarize_truncation(stats, mode)
+
+def encode_chunks(chunks: List[str], loaded: LoadedModel) -> List[Any]:
+    """Encode document chunks in length-sorted buckets; rows come back in chunk order (None on failure)"""
+    lengths = token_lengths(chunks, loaded)
+    return encode_length_bucketed(
+        chunks,
+        lengths,
+        lambda batch: cached_encode(batch, lambda texts: _encode_raw(texts, loaded), False, loaded),
+        chunk_batch_sizer
+    )
+
+# MinHash signatures of recently encoded chunks, shared by every ingestion request
+near_duplicate_hasher = MinHasher()
+near_duplicate_index = NearDuplicateIndex(
+    NEAR_DUPLICATE_THRESHOLD,
+    max_bytes=int(NEAR_DUPLICATE_INDEX_MAX_MB * 1024 * 1024)
+) if NEAR_DUPLICATE_ENABLED else None
+
+def new_chunk_deduplicator(loaded: LoadedModel):
+    """Per-document near-duplicate tracker, or None when reuse is disabled"""
+    if near_duplicate_index is None:
+        return None
+    return ChunkDeduplicator(near_duplicate_hasher, near_duplicate_index, namespace=f"{loaded.vector_identity}:raw")
+
+def encode_chunks_deduplicated(chunks: List[str], deduplicator, loaded: LoadedModel) -> tuple:
+    """encode_chunks, reusing embeddings of near-duplicate chunks; returns (rows, repeats within the document)"""
+    if deduplicator is None:
+        return encode_chunks(chunks, loaded), [False] * len(chunks)
+    return deduplicator.encode(chunks, lambda texts: encode_chunks(texts, loaded))
 
 @app.route('/routes', methods=['GET'])
 def list_routes():
@@ -430,6 +756,21 @@ def get_memory_usage():
 
 # Memory monitoring removed - now handled by consolidated metrics endpoint
 
+@app.route('/livez', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'alive', 'uptime': time.time() - start_time}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readiness_check():
+    """Readiness: every required startup phase has finished (503 until then)"""
+    ready = startup.is_ready()
+    return jsonify({
+        'ready': ready,
+        'model': loaded_model_name if model_loaded else None,
+        'startup': startup.get_stats()
+    }), 200 if ready else 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint with detailed status and memory usage"""
@@ -470,7 +811,7 @@ def health_check():
             if model_error:
                 status_reporter.send_degraded_status(f"Service running in degraded mode: {model_error[:100]}")
             elif model_loaded:
-                status_reporter.send_healthy_status('all-MiniLM-L6-v2')
+                status_reporter.send_healthy_status(loaded_model_name)
             elif model_loading:
                 status_reporter.send_loading_status("Loading sentence transformer model")
             else:
@@ -484,12 +825,35 @@ def health_check():
         'message': message,
         'model_loaded': model_loaded,
         'model_loading': model_loading,
-        'model': 'all-MiniLM-L6-v2' if model_loaded else None,
+        'model': loaded_model_name if model_loaded else None,
         'service': 'vector-convert-llm',
         'uptime': uptime,
         'error': model_error,
         'memory_usage': memory_usage,
-        'degraded_mode': model_error is not None
+        'degraded_mode': model_error is not None,
+        'startup': startup.get_stats(),
+        'runtime_profile': dict(runtime_profile.get_stats(), gc=garbage_collector.get_stats()),
+        'encode_scheduler': encode_scheduler.get_stats(),
+        'micro_batching': {
+            'enabled': MICRO_BATCHING_ENABLED,
+            'max_batch_size': MICRO_BATCH_MAX_SIZE,
+            'max_wait_ms': MICRO_BATCH_WAIT_MS
+        },
+        'models': model_registry.get_stats(),
+        'jobs': job_manager.get_stats(),
+        'convex_client': convex.get_stats(),
+        'projection': dict(projection_store.get_stats(), enabled_by_default=EMBEDDING_PROJECTION_ENABLED),
+        'embedding_cache': embedding_cache.get_stats() if embedding_cache is not None else {'enabled': False},
+        'chunk_cache': chunk_cache.get_stats() if chunk_cache is not None else {'enabled': False},
+        'chunking_pool': chunking_pool.get_stats(),
+        'near_duplicate_index': near_duplicate_index.get_stats() if near_duplicate_index is not None else {'enabled': False},
+        'inference_backend': inference_backend_info,
+        'encoder_pool': encoder_pool.get_stats() if encoder_pool is not None else {'enabled': False},
+        'chunk_batching': chunk_batch_sizer.get_stats() if ADAPTIVE_BATCHING_ENABLED else {
+            'adaptive': False,
+            'tokens_per_batch': ENCODE_TOKENS_PER_BATCH,
+            'max_batch_size': ENCODE_MAX_BATCH_SIZE
+        }
     }), 200
 
 @app.route('/test-post', methods=['POST'])
@@ -537,13 +901,31 @@ def encode_sentences():
             return jsonify({"error": "Invalid input. Please provide a JSON object with a 'sentences' key containing a list of strings."}), 400
 
         sentences = data['sentences']
-        logger.info(f"Processing {len(sentences)} sentences")
+        output_mode = data.get('output', FLOAT)
+        if output_mode not in OUTPUT_MODES:
+            return jsonify({"error": f"output must be one of {', '.join(OUTPUT_MODES)}"}), 400
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
+        logger.info(f"Processing {len(sentences)} sentences with {loaded.name}")
+        
+        projection = active_projection(loaded, data.get('project'))
+        if data.get('project') and projection is None:
+            return jsonify({"error": f"No projection has been fitted for model '{loaded.name}'"}), 400
         
         try:
-            embeddings = model.encode(sentences).tolist()  # Convert numpy array to list for JSON serialization
-            logger.info(f"Successfully generated embeddings with shape: {len(embeddings)}x{len(embeddings[0]) if embeddings else 0}")
+            embeddings = cached_encode(
+                sentences, lambda batch: batched_encode(loaded.encode_batcher, batch), False, loaded
+            )
+            if projection is not None:
+                embeddings = projection.apply(embeddings)
+            logger.info(f"Successfully generated embeddings with shape: {embeddings.shape}")
             
-            response = {"embeddings": embeddings}
+            # Lists of floats, or packed int8/binary vectors (see quantization.py)
+            response = {"embeddings": pack_embeddings(embeddings, output_mode) if len(embeddings) else []}
+            if output_mode != FLOAT:
+                response["output"] = output_mode
+                response["dimension"] = int(embeddings.shape[1])
             logger.info("=== ENCODE ENDPOINT SUCCESS ===")
             return jsonify(response), 200
             
@@ -595,7 +977,16 @@ def embed_text():
             return jsonify({'error': 'Missing text field in request'}), 400
         
         text = data['text']
-        logger.info(f"Processing text (length: {len(str(text))})")
+        output_mode = data.get('output', FLOAT)
+        if output_mode not in OUTPUT_MODES:
+            return jsonify({'error': f"output must be one of {', '.join(OUTPUT_MODES)}"}), 400
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
+        projection = active_projection(loaded, data.get('project'))
+        if data.get('project') and projection is None:
+            return jsonify({'error': f"No projection has been fitted for model '{loaded.name}'"}), 400
+        logger.info(f"Processing text (length: {len(str(text))}) with {loaded.name}")
         
         # Validate and preprocess text input
         if isinstance(text, str):
@@ -635,14 +1026,12 @@ def embed_text():
         try:
             logger.info("Starting embedding generation...")
             
-            # Use batch processing for efficiency
-            embeddings = model.encode(
-                processed_texts,
-                batch_size=min(32, len(processed_texts)),  # Reasonable batch size
-                show_progress_bar=False,
-                convert_to_numpy=True,
-                normalize_embeddings=True  # Normalize for better similarity search
+            # Share forward passes with concurrent callers (normalized for similarity search)
+            embeddings = cached_encode(
+                processed_texts, lambda batch: batched_encode(loaded.embed_batcher, batch), True, loaded
             )
+            if projection is not None:
+                embeddings = projection.apply(embeddings)
             
             logger.info(f"Embeddings generated successfully. Shape: {embeddings.shape}")
             
@@ -650,16 +1039,17 @@ def embed_text():
             logger.error(f"Error during embedding generation: {embed_error}", exc_info=True)
             return jsonify({'error': f'Embedding generation failed: {str(embed_error)}'}), 500
         
-        # Convert to list for JSON serialization
+        # Convert to lists of floats, or packed int8/binary vectors, for JSON serialization
         try:
+            packed = pack_embeddings(embeddings, output_mode)
             if isinstance(text, str):
                 # Single text input, return single embedding
-                result = embeddings[0].tolist()
-                logger.info(f"Single embedding converted, dimension: {len(result)}")
+                result = packed[0]
+                logger.info(f"Single embedding converted, dimension: {embeddings.shape[1]} ({output_mode})")
             else:
                 # Multiple texts, return list of embeddings
-                result = [emb.tolist() for emb in embeddings]
-                logger.info(f"Multiple embeddings converted, count: {len(result)}")
+                result = packed
+                logger.info(f"Multiple embeddings converted, count: {len(result)} ({output_mode})")
         except Exception as convert_error:
             logger.error(f"Error converting embeddings to list: {convert_error}", exc_info=True)
             return jsonify({'error': f'Result conversion failed: {str(convert_error)}'}), 500
@@ -670,7 +1060,10 @@ def embed_text():
         response_data = {
             'embeddings': result,
             'dimension': len(embeddings[0]),
-            'model': 'all-MiniLM-L6-v2',
+            'model': loaded.name,
+            'projected': projection is not None,
+            'output': output_mode,
+            'bytes_per_vector': output_size(len(embeddings[0]), output_mode),
             'processing_time_ms': processing_time,
             'texts_processed': len(processed_texts)
         }
@@ -710,14 +1103,17 @@ def calculate_similarity():
         texts = data['texts']
         if not isinstance(texts, list) or len(texts) < 2:
             return jsonify({'error': 'texts must be a list with at least 2 items'}), 400
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
         
         # Job tracking removed as part of tech debt cleanup
         
         # Generate embeddings
-        embeddings = model.encode(texts)
+        embeddings = encode_scheduler.run(lane_for(texts), lambda: loaded.encoder.encode(texts))
         
         # Calculate similarity matrix
-        similarities = model.similarity(embeddings, embeddings)
+        similarities = loaded.model.similarity(embeddings, embeddings)
         
         processing_time = int((time.time() - start_time) * 1000)
         
@@ -726,7 +1122,7 @@ def calculate_similarity():
         return jsonify({
             'similarities': similarities.tolist(),
             'texts': texts,
-            'model': 'all-MiniLM-L6-v2'
+            'model': loaded.name
         }), 200
         
     except Exception as e:
@@ -752,13 +1148,34 @@ def semantic_search():
         
         if not isinstance(documents, list):
             return jsonify({'error': 'documents must be a list'}), 400
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
         
         # Generate embeddings
-        query_embedding = model.encode([query])
-        doc_embeddings = model.encode(documents)
+        # Only the query jumps the queue; the caller's document list is encoded as bulk work
+        query_embedding = encode_scheduler.run(INTERACTIVE, lambda: loaded.encoder.encode([query]))
+        doc_embeddings = encode_scheduler.run(lane_for(documents), lambda: loaded.encoder.encode(documents))
+        
+        if data.get('quantization') == BINARY:
+            # Hamming-distance candidates over sign bits, re-ranked with the float vectors
+            candidates = binary_search(
+                quantize_binary(query_embedding)[0], quantize_binary(doc_embeddings), top_k * SEARCH_RESCORE_OVERSAMPLE
+            )
+            ranked = rescore(query_embedding[0], doc_embeddings[candidates], candidates.tolist(), top_k)
+            return jsonify({
+                'query': query,
+                'results': [
+                    {'document': documents[hit['id']], 'score': hit['score'], 'index': int(hit['id'])}
+                    for hit in ranked
+                ],
+                'model': loaded.name,
+                'quantization': BINARY,
+                'candidates_rescored': len(candidates)
+            }), 200
         
         # Calculate similarities
-        similarities = model.similarity(query_embedding, doc_embeddings)[0]
+        similarities = loaded.model.similarity(query_embedding, doc_embeddings)[0]
         
         # Get top-k results
         top_indices = np.argsort(similarities)[::-1][:top_k]
@@ -774,16 +1191,175 @@ def semantic_search():
         return jsonify({
             'query': query,
             'results': results,
-            'model': 'all-MiniLM-L6-v2'
+            'model': loaded.name
         }), 200
         
     except Exception as e:
         logger.error(f"Error in semantic_search: {e}")
         return jsonify({'error': str(e)}), 500
 
+def projection_sample_texts(data) -> List[str]:
+    """Texts for fitting or evaluating a projection: 'texts', plus chunks of any 'document_ids'"""
+    texts = [str(t) for t in (data.get('texts') or []) if str(t).strip()]
+    document_ids = data.get('document_ids') or []
+    if document_ids:
+        convex_url = os.environ.get('CONVEX_URL', 'http://convex-backend:3211')
+        documents = []
+        for document_id in document_ids:
+            response = convex.get(f"{convex_url}/api/documents/{document_id}")
+            if response.status_code != 200:
+                logger.warning(f"⚠️ Skipping document {document_id} for projection sample: HTTP {response.status_code}")
+                continue
+            document = response.json()
+            if document.get('content'):
+                documents.append({
+                    'document_id': document_id,
+                    'content': document['content'],
+                    'content_type': document.get('contentType', 'text')
+                })
+        for chunked in chunk_documents_parallel(documents):
+            texts.extend(chunked.chunks or [])
+    return texts
+
+def projection_sample_vectors(texts: List[str], loaded: LoadedModel) -> np.ndarray:
+    """Raw embeddings of a projection sample, encoded as bulk work (fit and recall_at_k normalize them)"""
+    rows = [row for row in encode_chunks(texts, loaded) if row is not None]
+    return np.asarray(rows, dtype=np.float32)
+
+@app.route('/projection', methods=['GET'])
+def projection_status():
+    """Fitted projections and whether encode paths apply them by default"""
+    return jsonify(dict(projection_store.get_stats(), enabled_by_default=EMBEDDING_PROJECTION_ENABLED)), 200
+
+@app.route('/projection/fit', methods=['POST'])
+def fit_projection():
+    """
+    Fit a PCA projection for a model on a corpus sample ('texts' and/or 'document_ids'),
+    report recall@k against full-dimension vectors on a held-out part of the sample,
+    and save it unless 'dry_run' is set or recall is below 'min_recall'.
+    """
+    try:
+        data = request.get_json() or {}
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
+        dimensions = int(data.get('dimensions', 128))
+        k = int(data.get('k', 10))
+        holdout_fraction = float(data.get('holdout_fraction', PROJECTION_HOLDOUT_FRACTION))
+        min_recall = data.get('min_recall')
+
+        texts = projection_sample_texts(data)
+        if len(texts) < 2:
+            return jsonify({'error': 'Provide a corpus sample in texts and/or document_ids'}), 400
+        started = time.time()
+        vectors = projection_sample_vectors(texts, loaded)
+
+        # Shuffle deterministically so the held-out queries aren't just the last document
+        order = np.random.RandomState(0).permutation(len(vectors))
+        holdout = max(1, int(len(vectors) * holdout_fraction))
+        queries, corpus = vectors[order[:holdout]], vectors[order[holdout:]]
+        try:
+            projection = PcaProjection.fit(corpus, dimensions, model=loaded.name)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        evaluation = recall_at_k(corpus, queries, projection, k)
+
+        saved = not data.get('dry_run', False) and (min_recall is None or evaluation['recall'] >= float(min_recall))
+        if saved:
+            projection_store.put(loaded.name, projection)
+            logger.info(
+                f"📐 Saved {dimensions}-dimension projection for '{loaded.name}' "
+                f"(recall@{evaluation['k']}={evaluation['recall']})"
+            )
+        return jsonify({
+            'model': loaded.name,
+            'saved': saved,
+            'projection': projection.get_stats(),
+            'evaluation': evaluation,
+            'processing_time_ms': int((time.time() - started) * 1000)
+        }), 200
+    except Exception as e:
+        logger.error(f"Error fitting projection: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/projection/evaluate', methods=['POST'])
+def evaluate_projection():
+    """Recall@k of a model's saved projection for 'queries' against a corpus ('texts'/'document_ids')"""
+    try:
+        data = request.get_json() or {}
+        loaded, error_response = request_model(data)
+        if error_response:
+            return error_response
+        projection = projection_store.get(loaded.name)
+        if projection is None:
+            return jsonify({'error': f"No projection has been fitted for model '{loaded.name}'"}), 404
+        queries = [str(q) for q in (data.get('queries') or []) if str(q).strip()]
+        corpus = projection_sample_texts(data)
+        if not queries or not corpus:
+            return jsonify({'error': 'Provide queries and a corpus in texts and/or document_ids'}), 400
+        evaluation = recall_at_k(
+            projection_sample_vectors(corpus, loaded),
+            projection_sample_vectors(queries, loaded),
+            projection,
+            int(data.get('k', 10))
+        )
+        return jsonify({'model': loaded.name, 'projection': projection.get_stats(), 'evaluation': evaluation}), 200
+    except Exception as e:
+        logger.error(f"Error evaluating projection: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/projection', methods=['DELETE'])
+def delete_projection():
+    """Remove a model's saved projection (encode paths return full-dimension vectors again)"""
+    loaded, error_response = request_model(request.args)
+    if error_response:
+        return error_response
+    return jsonify({'model': loaded.name, 'removed': projection_store.remove(loaded.name)}), 200
+
+def fetch_existing_chunks(convex_url: str, document_id: str) -> Optional[StoredChunks]:
+    """A document's active chunks, or None if Convex could not be asked"""
+    try:
+        response = convex.get(f"{convex_url}/api/embeddings/chunk-hashes", params={'documentId': document_id})
+        if response.status_code != 200:
+            logger.warning(f"⚠️ Failed to fetch existing chunk hashes: {response.status_code} - {response.text}")
+            return None
+        return StoredChunks(response.json().get('chunks', []))
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"⚠️ Failed to fetch existing chunk hashes: {e}")
+        return None
+
+def sync_document_chunks(convex_url: str, document_id: str, deactivate: List[str], reindex: List[dict]):
+    """Deactivate removed chunks and renumber kept ones; returns Convex's counts, or None on failure"""
+    if not deactivate and not reindex:
+        return {'deactivatedCount': 0, 'reindexedCount': 0}
+    try:
+        # Deactivating and renumbering are idempotent, so this may be retried
+        response = convex.post(
+            f"{convex_url}/api/embeddings/sync-chunks",
+            json={'documentId': document_id, 'deactivate': deactivate, 'reindex': reindex},
+            idempotent=True
+        )
+        if response.status_code == 200:
+            return response.json()
+        logger.error(f"Failed to sync document chunks: {response.status_code} - {response.text}")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error syncing document chunks: {e}")
+    return None
+
+chunk_writer = ChunkEmbeddingWriter(convex, EMBEDDING_SAVE_BATCH_SIZE)
+
 @app.route('/process-document', methods=['POST'])
 def process_document_embedding():
     """Fetch document from Convex, generate embedding with chunking, and save back to Convex"""
+    data = request.get_json()
+    if data and data.get('async'):
+        # Same pipeline as a queued job; the caller polls /jobs/<job_id>
+        return submit_document_job(data)
+    return run_document_embedding(data)
+
+def run_document_embedding(data, progress: Optional[JobProgress] = None):
+    """The /process-document pipeline for one request body; returns a (response, status) pair"""
+    progress = progress if progress is not None else JobProgress()
     start_time = time.time()
     
     try:
@@ -805,7 +1381,6 @@ def process_document_embedding():
                 'model_error': model_error
             }), 503
         
-        data = request.get_json()
         if not data or 'document_id' not in data:
             return jsonify({'error': 'Missing document_id field in request'}), 400
         
@@ -813,12 +1388,21 @@ def process_document_embedding():
         # Always use the internal Docker network URL for Convex
         convex_url = os.environ.get('CONVEX_URL', 'http://convex-backend:3211')
         use_chunking = data.get('use_chunking', True)  # Enable chunking by default
-        chunk_size = data.get('chunk_size', 1000)
-        chunk_overlap = data.get('chunk_overlap', 200)
+        chunk_size = data.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        chunk_overlap = data.get('chunk_overlap', DEFAULT_CHUNK_OVERLAP)
+        chunking_mode = data.get('chunking_mode')
+        skip_duplicate_chunks = data.get('skip_duplicate_chunks', NEAR_DUPLICATE_SKIP_SAVES)
+        # Incremental mode only encodes and saves chunks the document's stored embeddings lack
+        incremental = data.get('incremental', False)
         
         if not convex_url:
             return jsonify({'error': 'Convex URL not provided'}), 400
         
+        loaded, error_response = request_model(data, for_convex=True)
+        if error_response:
+            return error_response
+        stored_projection = active_projection(loaded)
+        
         logger.info(f"Processing document embedding for ID: {document_id} (chunking: {use_chunking})")
         logger.info(f"Convex URL used: {convex_url}")
         
@@ -831,7 +1415,8 @@ def process_document_embedding():
         
         try:
             logger.info(f"🌐 Making request to: {fetch_url}")
-            fetch_response = requests.get(fetch_url, timeout=30)
+            with progress.timed('fetch'):
+                fetch_response = convex.get(fetch_url)
             logger.info(f"📡 Fetch response status: {fetch_response.status_code}")
             logger.info(f"📋 Fetch response headers: {dict(fetch_response.headers)}")
             
@@ -884,121 +1469,169 @@ def process_document_embedding():
         logger.info(f"Document fetched successfully, content length: {len(text)}, type: {content_type}")
         
         # Generate embedding with chunking
-        if use_chunking and len(text) > chunk_size:
+        if use_chunking and (len(text) > chunk_size or incremental):
             logger.info("‼️Using chunking for large document🤖...")
             
-            # Chunk the document
-            chunks = chunk_document(text, content_type, chunk_size, chunk_overlap)
+            existing_chunks = fetch_existing_chunks(convex_url, document_id) if incremental else None
+            if incremental and existing_chunks is None:
+                logger.warning("⚠️ Falling back to a full re-embed: existing chunks are unavailable")
             
-            # Generate embeddings for each chunk with memory management
-            logger.info(f"Generating embeddings for {len(chunks)} chunks...")
-            chunk_embeddings = []
+            # Chunk, encode and save the document a batch of chunks at a time, so memory
+            # is bounded by one batch rather than by the whole document
+            chunk_stream, chunking_mode = stream_chunks_for_model(
+                text, content_type, chunk_size, chunk_overlap, chunking_mode, loaded
+            )
+            truncation = new_truncation_stats(loaded)
+            deduplicator = new_chunk_deduplicator(loaded)
+            logger.info(f"Generating and saving chunk embeddings in batches of {CHUNK_STREAM_BATCH_SIZE}...")
             
-            # Process chunks in smaller batches to prevent memory issues
-            batch_size = 2  # Process 2 chunks at a time to reduce memory pressure
+            # Each counter below is written by one stage's thread only
+            total_chunks = 0
+            encoded_count = 0
+            saved_chunks = 0
+            skipped_stored = 0
+            skipped_repeats = 0
+            unchanged_chunks = 0
+            saved_hashes = set()
+            embedding_dimension = 0
+            failed_chunks = []
             
-            for batch_start in range(0, len(chunks), batch_size):
-                batch_end = min(batch_start + batch_size, len(chunks))
-                batch_chunks = chunks[batch_start:batch_end]
+            def encode_batch(batch):
+                """Encode stage: match a batch against stored chunks and encode the rest"""
+                nonlocal total_chunks, unchanged_chunks, skipped_stored
+                total_chunks += len(batch)
+                progress.set(chunks_total=total_chunks)
+                track_truncation(truncation, [chunk_text for _, chunk_text in batch])
                 
-                try:
-                    # Process batch of chunks
-                    logger.info(f"Processing batch {batch_start//batch_size + 1}/{(len(chunks) + batch_size - 1)//batch_size} (chunks {batch_start+1}-{batch_end})")
-                    
-                    # Generate embeddings for the batch
-                    batch_embeddings = model.encode(batch_chunks, show_progress_bar=False)
-                    
-                    # Add each embedding to the list
-                    for i, embedding in enumerate(batch_embeddings):
-                        chunk_embeddings.append(embedding.tolist())
-                        logger.info(f"Generated embedding for chunk {batch_start + i + 1}/{len(chunks)}")
-                    
-                    # Force garbage collection after each batch
-                    import gc
-                    gc.collect()
-                    
-                except Exception as batch_error:
-                    logger.error(f"Error processing batch {batch_start//batch_size + 1}: {batch_error}")
-                    
-                    # Fallback: try processing chunks individually in this batch
-                    for i, chunk in enumerate(batch_chunks):
-                        try:
-                            chunk_embedding = model.encode([chunk], show_progress_bar=False)[0].tolist()
-                            chunk_embeddings.append(chunk_embedding)
-                            logger.info(f"Generated embedding for chunk {batch_start + i + 1}/{len(chunks)} (individual fallback)")
-                        except Exception as chunk_error:
-                            logger.error(f"Error generating embedding for chunk {batch_start + i + 1}: {chunk_error}")
+                # Chunks already stored for this document keep their embedding; only
+                # their position may need updating
+                pending = []
+                for i, chunk_text in batch:
+                    hash_value = chunk_hash(chunk_text, loaded.name)
+                    if existing_chunks is not None:
+                        if existing_chunks.claim(hash_value, i):
+                            unchanged_chunks += 1
                             continue
+                        if hash_value in existing_chunks.kept_hashes and skip_duplicate_chunks:
+                            skipped_stored += 1
+                            continue
+                    pending.append((i, chunk_text, hash_value))
+                if not pending:
+                    return []
+                
+                # Generate embeddings for this batch in length-sorted buckets, reusing
+                # the embeddings of near-duplicate chunks
+                with progress.timed('encode'):
+                    batch_rows, _ = encode_chunks_deduplicated(
+                        [chunk_text for _, chunk_text, _ in pending], deduplicator, loaded
+                    )
+                progress.add(chunks_encoded=sum(1 for row in batch_rows if row is not None))
+                return list(zip(pending, batch_rows))
             
-            if not chunk_embeddings:
-                error_msg = "Failed to generate embeddings for any chunks"
-                logger.error(error_msg)
-                return jsonify({'error': error_msg}), 500
-            
-            # Save individual chunk embeddings instead of averaging
-            logger.info(f"Saving {len(chunk_embeddings)} individual chunk embeddings to Convex...")
-            
-            # Save each chunk embedding separately
-            saved_chunks = 0
-            for i, (chunk_text, chunk_embedding) in enumerate(zip(chunks, chunk_embeddings)):
-                try:
-                    save_url = f"{convex_url}/api/embeddings/createDocumentEmbedding"
-                    save_payload = {
+            def save_batch(encoded):
+                """Save stage: write a batch's chunk embeddings to Convex"""
+                nonlocal encoded_count, saved_chunks, skipped_repeats, embedding_dimension
+                # Each chunk keeps its original index so failed and skipped chunks
+                # don't shift the rest. A near-duplicate is saved with the vector it
+                # reused; only a chunk whose exact text was already saved can be skipped
+                payloads = []
+                for (i, chunk_text, hash_value), row in encoded:
+                    if row is None:
+                        continue
+                    encoded_count += 1
+                    if hash_value in saved_hashes and skip_duplicate_chunks:
+                        skipped_repeats += 1
+                        continue
+                    saved_hashes.add(hash_value)
+                    chunk_embedding = to_stored_vector(row, stored_projection)
+                    embedding_dimension = len(chunk_embedding)
+                    payloads.append({
                         'documentId': document_id,
                         'embedding': chunk_embedding,
-                        'embeddingModel': 'all-MiniLM-L6-v2',
+                        'embeddingModel': loaded.name,
                         'embeddingDimensions': len(chunk_embedding),
                         'chunkText': chunk_text,
                         'chunkIndex': i,
+                        'chunkHash': hash_value,
                         'processingTimeMs': int((time.time() - start_time) * 1000)
-                    }
-                    
-                    save_response = requests.post(save_url, json=save_payload)
-                    
-                    if save_response.status_code in (200, 201):
-                        saved_chunks += 1
-                        logger.info(f"Saved chunk {i+1}/{len(chunks)} embedding to Convex")
+                    })
+                if not payloads:
+                    return
+                
+                with progress.timed('save'):
+                    outcomes = chunk_writer.save(convex_url, payloads)
+                saved = 0
+                for payload, (_, error) in zip(payloads, outcomes):
+                    if error is None:
+                        saved += 1
                     else:
-                        logger.error(f"Failed to save chunk {i+1} embedding: {save_response.status_code} - {save_response.text}")
-                        
-                except Exception as chunk_save_error:
-                    logger.error(f"Error saving chunk {i+1} embedding: {chunk_save_error}")
-                    continue
+                        failed_chunks.append({'chunk_index': payload['chunkIndex'], 'error': error})
+                saved_chunks += saved
+                progress.add(chunks_saved=saved, chunks_failed=len(payloads) - saved)
+                logger.info(f"Saved {saved}/{len(payloads)} chunk embeddings to Convex")
+            
+            # Chunking, encoding and saving overlap: while one batch is being saved the
+            # next is encoded and the one after that chunked
+            pipeline = Pipeline(f"document {document_id}", PIPELINE_QUEUE_SIZE)
+            pipeline.source('chunk', iter_batches(enumerate(progress.timed_iter('chunk', chunk_stream)), CHUNK_STREAM_BATCH_SIZE))
+            pipeline.map('encode', encode_batch)
+            pipeline.map('save', save_batch)
+            progress.attach('pipeline', pipeline.get_stats)
+            for _ in pipeline.run():
+                pass
+            skipped_duplicates = skipped_stored + skipped_repeats
+            progress.set(chunks_unchanged=unchanged_chunks, chunks_skipped=skipped_duplicates)
             
-            if saved_chunks == 0:
+            chunking_stats = summarize_truncation(truncation, chunking_mode)
+            if deduplicator is not None:
+                deduplication_stats = dict(deduplicator.as_dict(), skipped_saves=skipped_duplicates)
+                logger.info(f"♻️ Reused embeddings for {deduplication_stats['reused']}/{total_chunks} chunks, skipped {skipped_duplicates} duplicate saves")
+            else:
+                deduplication_stats = {'enabled': False}
+            
+            if encoded_count == 0 and unchanged_chunks + skipped_duplicates < total_chunks:
+                error_msg = "Failed to generate embeddings for any chunks"
+                logger.error(error_msg)
+                return jsonify({'error': error_msg}), 500
+            
+            if saved_chunks == 0 and encoded_count > skipped_duplicates:
                 error_msg = "Failed to save any chunk embeddings"
                 logger.error(error_msg)
                 return jsonify({'error': error_msg}), 500
             
-            embedding_method = "individual_chunks"
+            incremental_stats = None
+            if existing_chunks is not None:
+                # Whatever was not matched is no longer part of the document; deactivate
+                # it only now, so searches never see the document with chunks missing
+                stale = existing_chunks.stale()
+                reindex = existing_chunks.reindex
+                with progress.timed('sync'):
+                    sync_result = sync_document_chunks(convex_url, document_id, stale, reindex)
+                incremental_stats = {
+                    'unchanged': unchanged_chunks,
+                    'added': saved_chunks,
+                    'reindexed': len(reindex),
+                    'deactivated': len(stale),
+                    'synced': sync_result is not None
+                }
+                logger.info(
+                    f"🔁 Incremental update: {unchanged_chunks} unchanged, {saved_chunks} added, "
+                    f"{len(reindex)} moved, {len(stale)} deactivated"
+                )
+            
+            embedding_method = "incremental_chunks" if existing_chunks is not None else "individual_chunks"
             processing_time = int((time.time() - start_time) * 1000)
             
             # Create notification for successful embedding (one per document)
-            try:
-                notification_url = f"{convex_url}/api/notifications"
-                notification_payload = {
-                    'type': 'document_embedded',
-                    'title': 'Document Embedded',
-                    'message': f'"{document_title}" has been embedded and chunked into {saved_chunks} searchable pieces',
-                    'documentId': document_id,
-                    'metadata': json.dumps({
-                        'document_title': document_title,
-                        'chunks_saved': saved_chunks,
-                        'total_chunks': len(chunks),
-                        'embedding_dimension': len(chunk_embeddings[0]) if chunk_embeddings else 0,
-                        'model': 'all-MiniLM-L6-v2',
-                        'processing_time_ms': processing_time,
-                        'embedding_method': embedding_method
-                    })
-                }
-                
-                notification_response = requests.post(notification_url, json=notification_payload)
-                if notification_response.status_code in (200, 201):
-                    logger.info(f"✅ Notification created successfully for document: {document_id}")
-                else:
-                    logger.warning(f"⚠️ Failed to create notification: {notification_response.status_code} - {notification_response.text}")
-            except Exception as notification_error:
-                logger.error(f"❌ Error creating notification: {notification_error}")
+            notify_document_embedded(convex_url, document_id, document_title, {
+                'chunks_saved': saved_chunks,
+                'total_chunks': total_chunks,
+                'embedding_dimension': embedding_dimension,
+                'model': loaded.name,
+                'processing_time_ms': processing_time,
+                'embedding_method': embedding_method,
+                'reuse_rate': deduplication_stats.get('reuse_rate', 0)
+            }, progress, message=f'"{document_title}" has been embedded and chunked into {saved_chunks + unchanged_chunks} searchable pieces')
             
             # Job tracking removed as part of tech debt cleanup
             
@@ -1006,18 +1639,28 @@ def process_document_embedding():
                 'success': True,
                 'document_id': document_id,
                 'chunks_saved': saved_chunks,
-                'total_chunks': len(chunks),
-                'embedding_dimension': len(chunk_embeddings[0]) if chunk_embeddings else 0,
-                'model': 'all-MiniLM-L6-v2',
+                'total_chunks': total_chunks,
+                'failed_chunks': failed_chunks,
+                'embedding_dimension': embedding_dimension,
+                'model': loaded.name,
                 'processing_time_ms': processing_time,
                 'content_length': len(text),
-                'embedding_method': embedding_method
+                'embedding_method': embedding_method,
+                'chunking': chunking_stats,
+                'deduplication': deduplication_stats,
+                'incremental': incremental_stats,
+                'stage_timings_ms': progress.snapshot()['stage_ms'],
+                'pipeline': pipeline.get_stats()
             }), 200
             
         else:
             # Generate single embedding for small documents
             logger.info("Generating single embedding for document...")
-            embedding = model.encode([text])[0].tolist()
+            with progress.timed('encode'):
+                embedding = to_stored_vector(
+                    cached_encode([text], lambda texts: _encode_raw(texts, loaded), False, loaded)[0], stored_projection
+                )
+            progress.set(chunks_total=1, chunks_encoded=1)
             logger.info(f"Embedding generated successfully, dimension: {len(embedding)}")
             embedding_method = "single"
         
@@ -1027,43 +1670,28 @@ def process_document_embedding():
         save_payload = {
             'documentId': document_id,
             'embedding': embedding,
-            'embeddingModel': 'all-MiniLM-L6-v2',
+            'embeddingModel': loaded.name,
             'embeddingDimensions': len(embedding),
             'processingTimeMs': int((time.time() - start_time) * 1000)
         }
         
-        save_response = requests.post(save_url, json=save_payload)
+        with progress.timed('save'):
+            save_response = convex.post(save_url, json=save_payload)
         
         processing_time = int((time.time() - start_time) * 1000)
         
         if save_response.status_code in (200, 201):
+            progress.add(chunks_saved=1)
             logger.info("Embedding saved successfully to Convex")
             
             # Create notification for successful embedding (one per document)
-            try:
-                notification_url = f"{convex_url}/api/notifications"
-                notification_payload = {
-                    'type': 'document_embedded',
-                    'title': 'Document Embedded',
-                    'message': f'"{document_title}" has been successfully embedded and is ready for search',
-                    'documentId': document_id,
-                    'metadata': json.dumps({
-                        'document_title': document_title,
-                        'embedding_dimension': len(embedding),
-                        'model': 'all-MiniLM-L6-v2',
-                        'processing_time_ms': processing_time,
-                        'embedding_method': embedding_method,
-                        'chunks_processed': 1
-                    })
-                }
-                
-                notification_response = requests.post(notification_url, json=notification_payload)
-                if notification_response.status_code in (200, 201):
-                    logger.info(f"✅ Notification created successfully for document: {document_id}")
-                else:
-                    logger.warning(f"⚠️ Failed to create notification: {notification_response.status_code} - {notification_response.text}")
-            except Exception as notification_error:
-                logger.error(f"❌ Error creating notification: {notification_error}")
+            notify_document_embedded(convex_url, document_id, document_title, {
+                'embedding_dimension': len(embedding),
+                'model': loaded.name,
+                'processing_time_ms': processing_time,
+                'embedding_method': embedding_method,
+                'chunks_processed': 1
+            }, progress, message=f'"{document_title}" has been successfully embedded and is ready for search')
             
             # Job tracking removed as part of tech debt cleanup
             
@@ -1071,11 +1699,12 @@ def process_document_embedding():
                 'success': True,
                 'document_id': document_id,
                 'embedding_dimension': len(embedding),
-                'model': 'all-MiniLM-L6-v2',
+                'model': loaded.name,
                 'processing_time_ms': processing_time,
                 'content_length': len(text),
                 'embedding_method': embedding_method,
-                'chunks_processed': 1
+                'chunks_processed': 1,
+                'stage_timings_ms': progress.snapshot()['stage_ms']
             }), 200
         else:
             error_msg = f"Failed to save embedding to Convex: {save_response.status_code} - {save_response.text}"
@@ -1094,6 +1723,327 @@ def process_document_embedding():
         
         return jsonify({'error': str(e)}), 500
 
+def fetch_documents_concurrently(convex_url: str, document_ids: List[str], concurrency: int):
+    """Yield (document_id, document, error) as fetches complete, with at most `concurrency` in flight"""
+    def fetch(document_id):
+        response = convex.get(f"{convex_url}/api/documents/{document_id}")
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch document from Convex: {response.status_code} - {response.text[:200]}")
+        return response.json()
+
+    pending_ids = iter(document_ids)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='convex-fetch') as executor:
+        in_flight = {}
+        for document_id in pending_ids:
+            in_flight[executor.submit(fetch, document_id)] = document_id
+            if len(in_flight) >= concurrency:
+                break
+        while in_flight:
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                document_id = in_flight.pop(future)
+                try:
+                    yield document_id, future.result(), None
+                except Exception as e:
+                    yield document_id, None, str(e)
+                next_id = next(pending_ids, None)
+                if next_id is not None:
+                    in_flight[executor.submit(fetch, next_id)] = next_id
+
+@app.route('/process-documents', methods=['POST'])
+def process_documents_embedding():
+    """Embed many Convex documents in one call: concurrent fetches, shared encode batches, per-document results"""
+    data = request.get_json()
+    if data and data.get('async'):
+        return submit_documents_job(data)
+    return run_bulk_document_embedding(data)
+
+def run_bulk_document_embedding(data, progress: Optional[JobProgress] = None):
+    """The /process-documents pipeline for one request body; returns a (response, status) pair"""
+    progress = progress if progress is not None else JobProgress()
+    start_time = time.time()
+    
+    try:
+        if model is None or not model_loaded:
+            return jsonify({
+                'error': 'Model not ready - still loading or failed to load',
+                'model_loaded': model_loaded,
+                'model_loading': model_loading,
+                'model_error': model_error
+            }), 503
+        
+        document_ids = list(dict.fromkeys((data or {}).get('document_ids') or []))
+        if not document_ids:
+            return jsonify({'error': 'Missing document_ids field in request'}), 400
+        if len(document_ids) > BULK_MAX_DOCUMENTS:
+            return jsonify({'error': f'At most {BULK_MAX_DOCUMENTS} documents per request, got {len(document_ids)}'}), 400
+        
+        loaded, error_response = request_model(data, for_convex=True)
+        if error_response:
+            return error_response
+        stored_projection = active_projection(loaded)
+        
+        convex_url = os.environ.get('CONVEX_URL', 'http://convex-backend:3211')
+        chunk_size = data.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        chunk_overlap = data.get('chunk_overlap', DEFAULT_CHUNK_OVERLAP)
+        chunking_mode = (data.get('chunking_mode') or CHUNKING_MODE).lower()
+        notify = data.get('notify', True)
+        
+        logger.info(f"📚 Bulk embedding {len(document_ids)} documents with {loaded.name}")
+        progress.set(documents_total=len(document_ids))
+        results = {document_id: {'document_id': document_id, 'success': False} for document_id in document_ids}
+        titles = {}
+        chunked_ids = set()
+        
+        def fail(document_id, error):
+            if document_id is None:
+                # The chunker's input stream broke: every document that had not been
+                # chunked (or failed) yet is lost with it
+                for pending_id in document_ids:
+                    if pending_id not in chunked_ids and 'error' not in results[pending_id]:
+                        fail(pending_id, error)
+                return
+            results[document_id].update(success=False, error=error)
+            progress.add(documents_failed=1)
+            logger.error(f"❌ Document {document_id}: {error}")
+        
+        def fetch_documents():
+            """Fetch stage: documents with content, in the order their fetches complete"""
+            fetched = fetch_documents_concurrently(convex_url, document_ids, BULK_FETCH_CONCURRENCY)
+            for document_id, document, error in progress.timed_iter('fetch', fetched):
+                if error:
+                    fail(document_id, error)
+                    continue
+                if not document.get('content'):
+                    fail(document_id, 'Document content is empty or missing')
+                    continue
+                progress.add(documents_fetched=1)
+                titles[document_id] = document.get('title', 'Unknown Document')
+                results[document_id]['content_length'] = len(document['content'])
+                yield {
+                    'document_id': document_id,
+                    'content': document['content'],
+                    'content_type': document.get('contentType', 'text'),
+                    'chunk_size': chunk_size,
+                    'chunk_overlap': chunk_overlap
+                }
+        
+        def chunk_documents(documents):
+            """Chunk stage: one ChunkedDocument per fetched document"""
+            if chunking_mode == CHARACTERS:
+                chunked_documents = chunk_documents_parallel(documents)
+            else:
+                # Token windows need the model's tokenizer, so they are cut in-process
+                chunked_documents = (
+                    ChunkedDocument(document['document_id'], chunk_for_model(
+                        document['content'], document['content_type'], chunk_size, chunk_overlap, chunking_mode, loaded
+                    )[0])
+                    for document in documents
+                )
+            for chunked in progress.timed_iter('chunk', chunked_documents):
+                if chunked.error is not None or chunked.chunks is None:
+                    fail(chunked.document_id, f"Chunking failed: {chunked.error}")
+                    continue
+                if not chunked.chunks:
+                    fail(chunked.document_id, 'Document produced no chunks')
+                    continue
+                progress.add(chunks_total=len(chunked.chunks))
+                chunked_ids.add(chunked.document_id)
+                yield chunked
+        
+        truncation = new_truncation_stats(loaded)
+        deduplicator = new_chunk_deduplicator(loaded)
+        embedding_dimension = 0
+        
+        def encode_group(group: List[ChunkedDocument]):
+            # One set of length-bucketed batches across every document in the group
+            all_chunks = [chunk for document in group for chunk in document.chunks]
+            track_truncation(truncation, all_chunks)
+            with progress.timed('encode'):
+                rows, _ = encode_chunks_deduplicated(all_chunks, deduplicator, loaded)
+            progress.add(chunks_encoded=sum(1 for row in rows if row is not None))
+            return group, rows
+        
+        def encode_documents(chunked_documents):
+            """Encode stage: documents grouped until they hold about BULK_ENCODE_CHUNKS chunks"""
+            group, group_chunks = [], 0
+            for chunked in chunked_documents:
+                group.append(chunked)
+                group_chunks += len(chunked.chunks)
+                if group_chunks >= BULK_ENCODE_CHUNKS:
+                    yield encode_group(group)
+                    group, group_chunks = [], 0
+            if group:
+                yield encode_group(group)
+        
+        def save_group(encoded):
+            """Save stage: write the group's chunk embeddings in batches, then settle each document"""
+            nonlocal embedding_dimension
+            group, rows = encoded
+            payloads, owners = [], []
+            failed_chunks = {document.document_id: [] for document in group}
+            offset = 0
+            for document in group:
+                document_rows = rows[offset:offset + len(document.chunks)]
+                offset += len(document.chunks)
+                for i, (chunk_text, row) in enumerate(zip(document.chunks, document_rows)):
+                    if row is None:
+                        failed_chunks[document.document_id].append({'chunk_index': i, 'error': 'Encoding failed'})
+                        continue
+                    chunk_embedding = to_stored_vector(row, stored_projection)
+                    embedding_dimension = len(chunk_embedding)
+                    payloads.append({
+                        'documentId': document.document_id,
+                        'embedding': chunk_embedding,
+                        'embeddingModel': loaded.name,
+                        'embeddingDimensions': len(chunk_embedding),
+                        'chunkText': chunk_text,
+                        'chunkIndex': i,
+                        'chunkHash': chunk_hash(chunk_text, loaded.name),
+                        'processingTimeMs': int((time.time() - start_time) * 1000)
+                    })
+                    owners.append(document.document_id)
+            
+            with progress.timed('save'):
+                outcomes = chunk_writer.save(convex_url, payloads) if payloads else []
+            for owner, payload, (_, error) in zip(owners, payloads, outcomes):
+                if error is not None:
+                    failed_chunks[owner].append({'chunk_index': payload['chunkIndex'], 'error': error})
+            
+            for document in group:
+                failed = len(failed_chunks[document.document_id])
+                saved = len(document.chunks) - failed
+                progress.add(chunks_saved=saved, chunks_failed=failed)
+                
+                result = results[document.document_id]
+                result.update(
+                    total_chunks=len(document.chunks),
+                    chunks_saved=saved,
+                    chunks_failed=failed,
+                    failed_chunks=failed_chunks[document.document_id]
+                )
+                if saved == 0:
+                    fail(document.document_id, 'Failed to save any chunk embeddings')
+                    continue
+                result['success'] = True
+                progress.add(documents_done=1)
+                if notify:
+                    notify_document_embedded(convex_url, document.document_id, titles.get(document.document_id), {
+                        'chunks_saved': saved,
+                        'total_chunks': len(document.chunks),
+                        'embedding_dimension': embedding_dimension,
+                        'model': loaded.name,
+                        'embedding_method': 'bulk_chunks'
+                    }, progress)
+        
+        # Fetches, chunking, encoding and Convex writes all overlap, each stage
+        # working on different documents
+        pipeline = Pipeline(f"bulk {len(document_ids)} documents", PIPELINE_QUEUE_SIZE)
+        pipeline.source('fetch', fetch_documents())
+        pipeline.stage('chunk', chunk_documents)
+        pipeline.stage('encode', encode_documents)
+        pipeline.map('save', save_group)
+        progress.attach('pipeline', pipeline.get_stats)
+        for _ in pipeline.run():
+            pass
+        
+        succeeded = sum(1 for result in results.values() if result['success'])
+        processing_time = int((time.time() - start_time) * 1000)
+        logger.info(f"📚 Bulk embedding finished: {succeeded}/{len(document_ids)} documents in {processing_time} ms")
+        return jsonify({
+            'success': succeeded == len(document_ids),
+            'documents': [results[document_id] for document_id in document_ids],
+            'documents_succeeded': succeeded,
+            'documents_failed': len(document_ids) - succeeded,
+            'embedding_dimension': embedding_dimension,
+            'model': loaded.name,
+            'processing_time_ms': processing_time,
+            'chunking': summarize_truncation(truncation, chunking_mode),
+            'deduplication': deduplicator.as_dict() if deduplicator is not None else {'enabled': False},
+            'stage_timings_ms': progress.snapshot()['stage_ms'],
+            'pipeline': pipeline.get_stats()
+        }), 200 if succeeded else 500
+        
+    except Exception as e:
+        logger.error(f"Error in process_documents_embedding: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+def notify_document_embedded(convex_url: str, document_id: str, title: str, metadata: dict, progress: JobProgress,
+                             message: Optional[str] = None):
+    """Create the per-document 'Document Embedded' notification; failures are only logged"""
+    if message is None:
+        message = f'"{title}" has been embedded and chunked into {metadata["chunks_saved"]} searchable pieces'
+    try:
+        with progress.timed('notify'):
+            response = convex.post(f"{convex_url}/api/notifications", json={
+                'type': 'document_embedded',
+                'title': 'Document Embedded',
+                'message': message,
+                'documentId': document_id,
+                'metadata': json.dumps(dict(metadata, document_title=title))
+            })
+        if response.status_code in (200, 201):
+            logger.info(f"✅ Notification created successfully for document: {document_id}")
+        else:
+            logger.warning(f"⚠️ Failed to create notification: {response.status_code} - {response.text}")
+    except Exception as notification_error:
+        logger.error(f"❌ Error creating notification: {notification_error}")
+
+job_manager = JobManager(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_HISTORY_LIMIT)
+
+def submit_job(kind: str, params: dict, pipeline, data):
+    """Queue pipeline(data, progress) as a job; 202 with its id, 429 when the queue is full"""
+    def run(job):
+        # Workers have no request; jsonify only needs the application context
+        with app.app_context():
+            response, status = pipeline(data, job.progress)
+            return response.get_json(), status
+    
+    try:
+        job = job_manager.submit(kind, params, run)
+    except QueueFullError as e:
+        return jsonify({'error': str(e), 'jobs': job_manager.get_stats()}), 429
+    logger.info(f"📥 Queued {kind} job {job.id}")
+    return jsonify({'job_id': job.id, 'status': job.status, 'status_url': f"/jobs/{job.id}"}), 202
+
+def submit_document_job(data):
+    """Queue a /process-document request body as a job"""
+    if not data or 'document_id' not in data:
+        return jsonify({'error': 'Missing document_id field in request'}), 400
+    return submit_job('process-document', {'document_id': data['document_id']}, run_document_embedding, data)
+
+def submit_documents_job(data):
+    """Queue a /process-documents request body as a job"""
+    if not data or not data.get('document_ids'):
+        return jsonify({'error': 'Missing document_ids field in request'}), 400
+    return submit_job('process-documents', {'documents': len(data['document_ids'])}, run_bulk_document_embedding, data)
+
+@app.route('/jobs/process-document', methods=['POST'])
+def submit_process_document_job():
+    """Asynchronous /process-document: returns a job id immediately"""
+    return submit_document_job(request.get_json())
+
+@app.route('/jobs/process-documents', methods=['POST'])
+def submit_process_documents_job():
+    """Asynchronous /process-documents: returns a job id immediately"""
+    return submit_documents_job(request.get_json())
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, chunk-level progress, stage timings, and the result once finished"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job.as_dict()), 200
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs (newest first, optionally filtered by ?status=) and the queue backlog"""
+    return jsonify({
+        'jobs': job_manager.list(request.args.get('status'), int(request.args.get('limit', 50))),
+        'stats': job_manager.get_stats()
+    }), 200
+
 @app.route('/process-markdown', methods=['POST'])
 def process_markdown_document():
     """Process markdown content with chunking and generate embeddings"""
@@ -1110,61 +2060,33 @@ def process_markdown_document():
         content = data['content']
         document_id = data.get('document_id')
         convex_url = data.get('convex_url', os.environ.get('CONVEX_URL'))
-        chunk_size = data.get('chunk_size', 1000)
-        chunk_overlap = data.get('chunk_overlap', 200)
+        chunk_size = data.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        chunk_overlap = data.get('chunk_overlap', DEFAULT_CHUNK_OVERLAP)
+        chunking_mode = data.get('chunking_mode')
         
         if not convex_url:
             return jsonify({'error': 'Convex URL not provided'}), 400
         
-        logger.info(f"Processing markdown document (length: {len(content)})")
+        loaded, error_response = request_model(data, for_convex=True)
+        if error_response:
+            return error_response
+        stored_projection = active_projection(loaded)
+        
+        logger.info(f"Processing markdown document (length: {len(content)}) with {loaded.name}")
         
         # Job tracking removed as part of tech debt cleanup
         
         # Chunk the markdown content
-        chunks = chunk_document(content, 'markdown', chunk_size, chunk_overlap)
+        chunks, chunking_stats = chunk_for_model(content, 'markdown', chunk_size, chunk_overlap, chunking_mode, loaded)
         logger.info(f"Document chunked into 🧩 {len(chunks)} pieces")
         
-        # Generate embeddings for each chunk with memory management
-        chunk_embeddings = []
-        chunk_texts = []
-        
-        # Process chunks in smaller batches to prevent memory issues
-        batch_size = 2  # Process 2 chunks at a time to reduce memory pressure
-        
-        for batch_start in range(0, len(chunks), batch_size):
-            batch_end = min(batch_start + batch_size, len(chunks))
-            batch_chunks = chunks[batch_start:batch_end]
-            
-            try:
-                # Process batch of chunks
-                logger.info(f"Processing batch {batch_start//batch_size + 1}/{(len(chunks) + batch_size - 1)//batch_size} (chunks {batch_start+1}-{batch_end})")
-                
-                # Generate embeddings for the batch
-                batch_embeddings = model.encode(batch_chunks, show_progress_bar=False)
-                
-                # Add each embedding to the list
-                for i, embedding in enumerate(batch_embeddings):
-                    chunk_embeddings.append(embedding.tolist())
-                    chunk_texts.append(batch_chunks[i])
-                    logger.info(f"Generated embedding for chunk {batch_start + i + 1}/{len(chunks)}")
-                
-                # Force garbage collection after each batch
-                import gc
-                gc.collect()
-                
-            except Exception as batch_error:
-                logger.error(f"Error processing batch {batch_start//batch_size + 1}: {batch_error}")
-                
-                # Fallback: try processing chunks individually in this batch
-                for i, chunk in enumerate(batch_chunks):
-                    try:
-                        chunk_embedding = model.encode([chunk], show_progress_bar=False)[0].tolist()
-                        chunk_embeddings.append(chunk_embedding)
-                        chunk_texts.append(chunk)
-                        logger.info(f"Generated embedding for chunk {batch_start + i + 1}/{len(chunks)} (individual fallback)")
-                    except Exception as chunk_error:
-                        logger.error(f"Error generating embedding for chunk {batch_start + i + 1}: {chunk_error}")
-                        continue
+        # Generate embeddings for each chunk in length-sorted buckets, reusing the
+        # embeddings of near-duplicate chunks (every chunk is still saved)
+        deduplicator = new_chunk_deduplicator(loaded)
+        chunk_rows, _ = encode_chunks_deduplicated(chunks, deduplicator, loaded)
+        deduplication_stats = deduplicator.as_dict() if deduplicator is not None else {'enabled': False}
+        chunk_texts = [chunk for chunk, row in zip(chunks, chunk_rows) if row is not None]
+        chunk_embeddings = [to_stored_vector(row, stored_projection) for row in chunk_rows if row is not None]
         
         if not chunk_embeddings:
             error_msg = "Failed to generate embeddings for any chunks"
@@ -1187,11 +2109,11 @@ def process_markdown_document():
                 'content_type': 'markdown',
                 'chunk_count': len(chunks),
                 'embedding_method': 'chunked_average',
-                'model': 'all-MiniLM-L6-v2'
+                'model': loaded.name
             }
         }
         
-        save_response = requests.post(save_url, json=save_payload)
+        save_response = convex.post(save_url, json=save_payload)
         
         processing_time = int((time.time() - start_time) * 1000)
         
@@ -1208,14 +2130,14 @@ def process_markdown_document():
                     'documentId': document_id,
                     'metadata': json.dumps({
                         'embedding_dimension': len(avg_embedding),
-                        'model': 'all-MiniLM-L6-v2',
+                        'model': loaded.name,
                         'processing_time_ms': processing_time,
                         'embedding_method': 'chunked_average',
                         'chunks_processed': len(chunk_embeddings)
                     })
                 }
                 
-                notification_response = requests.post(notification_url, json=notification_payload)
+                notification_response = convex.post(notification_url, json=notification_payload)
                 if notification_response.status_code in (200, 201):
                     logger.info("Notification created successfully")
                 else:
@@ -1229,11 +2151,13 @@ def process_markdown_document():
                 'success': True,
                 'document_id': document_id,
                 'embedding_dimension': len(avg_embedding),
-                'model': 'all-MiniLM-L6-v2',
+                'model': loaded.name,
                 'processing_time_ms': processing_time,
                 'content_length': len(content),
                 'chunks_processed': len(chunk_embeddings),
-                'embedding_method': 'chunked_average'
+                'embedding_method': 'chunked_average',
+                'chunking': chunking_stats,
+                'deduplication': deduplication_stats
             }), 200
         else:
             error_msg = f"Failed to save to Convex: {save_response.status_code} - {save_response.text}"
@@ -1271,8 +2195,15 @@ def embed_and_save():
         if not convex_url:
             return jsonify({'error': 'Convex URL not provided'}), 400
         
+        loaded, error_response = request_model(data, for_convex=True)
+        if error_response:
+            return error_response
+        stored_projection = active_projection(loaded)
+        
         # Generate embedding
-        embedding = model.encode([text])[0].tolist()
+        embedding = to_stored_vector(
+            encode_scheduler.run(BULK, lambda: loaded.encoder.encode([text]))[0], stored_projection
+        )
         
         # Save to Convex
         convex_endpoint = f"{convex_url}/updateDocumentEmbedding"
@@ -1281,14 +2212,14 @@ def embed_and_save():
             'embedding': embedding
         }
         
-        response = requests.post(convex_endpoint, json=convex_payload)
+        response = convex.post(convex_endpoint, json=convex_payload)
         
         if response.status_code == 200:
             return jsonify({
                 'success': True,
                 'document_id': document_id,
                 'embedding_dimension': len(embedding),
-                'model': 'all-MiniLM-L6-v2',
+                'model': loaded.name,
                 'convex_response': response.json()
             }), 200
         else:
@@ -1312,7 +2243,7 @@ def get_current_status():
             'status': 'error',
             'ready': False,
             'message': f'Model error: {model_error}',
-            'model': 'all-MiniLM-L6-v2',
+            'model': loaded_model_name,
             'model_loaded': False,
             'model_loading': False
         }
@@ -1321,7 +2252,7 @@ def get_current_status():
             'status': 'loading',
             'ready': False,
             'message': 'Loading sentence transformer model',
-            'model': 'all-MiniLM-L6-v2',
+            'model': loaded_model_name,
             'model_loaded': False,
             'model_loading': True
         }
@@ -1330,7 +2261,7 @@ def get_current_status():
             'status': 'healthy',
             'ready': True,
             'message': 'Service is running normally',
-            'model': 'all-MiniLM-L6-v2',
+            'model': loaded_model_name,
             'model_loaded': True,
             'model_loading': False
         }
@@ -1339,48 +2270,26 @@ def get_current_status():
             'status': 'degraded',
             'ready': True,
             'message': 'Service running without model',
-            'model': 'all-MiniLM-L6-v2',
+            'model': loaded_model_name,
             'model_loaded': False,
             'model_loading': False,
             'degraded_mode': True
         }
 
-# Initialize status reporter and start model loading in background thread when module is imported
-logger.info("Starting vector-convert-llm service...")
-
-# Add a small delay to ensure convex-backend is fully ready
-logger.info("Waiting 3 seconds for convex-backend to be fully ready...")
-time.sleep(3)
+logger.info("Available endpoints: /livez, /readyz, /health, /embed, /similarity, /search, /process-document, /process-markdown, /embed-and-save")
 
-# Initialize status reporter
-try:
-    logger.info(f"Initializing status reporter with CONVEX_URL: {CONVEX_URL}")
-    status_reporter = StatusReporter(SERVICE_NAME, CONVEX_URL)
-    
-    # Try to send startup status
-    startup_success = status_reporter.send_startup_status()
-    if startup_success:
-        logger.info(f"✅ Status reporter initialized successfully for service: {SERVICE_NAME}")
-        
-        # Start periodic status reporting every 30 seconds
-        status_reporter.start_periodic_reporting(interval_seconds=30, get_status_callback=get_current_status)
-        logger.info("Periodic status reporting started")
-    else:
-        logger.warning("⚠️ Status reporter initialized but startup status failed - continuing anyway")
-        
-except Exception as e:
-    logger.error(f"❌ Failed to initialize status reporter: {e}")
-    logger.warning("Service will continue without status reporting")
-    status_reporter = None
-
-model_thread = threading.Thread(target=load_model_async, daemon=True)
-model_thread.start()
-
-# Memory monitoring now handled by consolidated metrics endpoint
-
-logger.info("Service initialized, model loading in background...")
-logger.info("Available endpoints: /health, /embed, /similarity, /search, /process-document, /process-markdown, /embed-and-save")
+def serve():
+    """Run the service; startup.sh calls this through serve.py"""
+    logger.info("Starting vector-convert-llm service...")
+    if __name__ == '__main__' and chunking_pool.workers:
+        # Chunking workers re-run the __main__ script; as this file that means a full
+        # service import per worker (see serve.py), so chunk in-process instead
+        logger.warning("⚠️ main.py was run directly: chunking in-process; start serve.py to use CHUNKING_WORKERS")
+        chunking_pool.workers = 0
+    # Foreground phases (the model, when ENCODER_WORKERS forks a pool) run here; the Convex
+    # checks and any other phases run in background threads while app.run binds the port
+    startup.start()
+    app.run(host='0.0.0.0', port=7999, debug=False, threaded=True)
 
 if __name__ == '__main__':
-    logger.info("Starting minimal vector-convert-llm service...")
-    app.run(host='0.0.0.0', port=7999, debug=False, threaded=True)
+    serve()
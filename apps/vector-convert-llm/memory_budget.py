@@ -0,0 +1,253 @@
+"""
+Memory Budget Module
+====================
+
+Adaptive batch sizing for chunk encoding under a RAM budget.
+
+The budget comes from ENCODE_RAM_BUDGET_MB, or from the service's RAM
+allocation (VECTOR_CONVERT_LLM_RAM, the value calculate-ram.sh writes as
+NEXT_PUBLIC_VECTOR_CONVERT_LLM_RAM), or from the container's cgroup memory
+limit. AdaptiveBatchSizer measures peak RSS growth per padded token for
+every batch it runs, and sizes later batches to fit the headroom left under
+that budget. Memory errors double the estimate so the next batches shrink.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_MEMORY_MAX = '/sys/fs/cgroup/memory.max'
+CGROUP_V1_MEMORY_LIMIT = '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED_THRESHOLD = 1 << 60
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_memory_size(value: str) -> Optional[int]:
+    """Parse sizes written like the docker-compose/.env RAM settings ("2G", "1.2G", "400M")"""
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', str(value), re.IGNORECASE)
+    if not match:
+        return None
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def detect_container_memory_limit() -> Optional[int]:
+    """Memory limit of the current cgroup in bytes, or None when unlimited/unknown"""
+    for path in (CGROUP_V2_MEMORY_MAX, CGROUP_V1_MEMORY_LIMIT):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw == 'max':
+            return None
+        try:
+            limit = int(raw)
+        except ValueError:
+            continue
+        return limit if limit < UNLIMITED_THRESHOLD else None
+    return None
+
+
+def resolve_memory_budget(fraction: float = 0.85) -> Tuple[int, str]:
+    """Total RSS the process may reach while encoding, and where that number came from"""
+    explicit_mb = os.environ.get('ENCODE_RAM_BUDGET_MB')
+    if explicit_mb:
+        return int(float(explicit_mb) * 1024 * 1024), 'ENCODE_RAM_BUDGET_MB'
+
+    allocation = parse_memory_size(os.environ.get('VECTOR_CONVERT_LLM_RAM', ''))
+    if allocation:
+        return int(allocation * fraction), 'VECTOR_CONVERT_LLM_RAM'
+
+    container_limit = detect_container_memory_limit()
+    if container_limit:
+        return int(container_limit * fraction), 'cgroup'
+
+    return int(psutil.virtual_memory().total * fraction), 'system'
+
+
+def is_memory_error(error: Exception) -> bool:
+    """True for allocation failures raised by Python, numpy or torch"""
+    if isinstance(error, MemoryError):
+        return True
+    message = str(error).lower()
+    return 'out of memory' in message or 'failed to allocate' in message or 'cannot allocate' in message
+
+
+def process_tree_rss(process: psutil.Process) -> int:
+    """Memory of a process plus all its descendants (encoder pool and chunking workers)
+
+    The parent counts at its RSS and each descendant at its USS, the memory
+    only that process holds. Pages a forked worker still shares copy-on-write
+    with the parent are already in the parent's RSS, so they are not counted
+    again for every worker. Forkserver chunking workers are grandchildren,
+    hence the recursive walk. A process whose USS can't be read counts at its
+    RSS. Reading USS parses /proc/<pid>/smaps, so this is for occasional
+    checks such as headroom, not for sampling.
+    """
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_full_info().uss
+        except psutil.AccessDenied:
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                continue
+        except psutil.Error:
+            continue
+    return rss
+
+
+def _plain_rss(processes: List[psutil.Process]) -> int:
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+class _PeakRssSampler:
+    """Samples plain RSS of a process tree in the background to capture the peak during one batch
+
+    The tree is listed once, on entry, and every sample reads only
+    /proc/<pid>/statm per process. Shared pages make the absolute numbers
+    overstate usage, but the sampler reports growth over its own baseline,
+    where they cancel out.
+    """
+
+    def __init__(self, process: psutil.Process, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        try:
+            children = process.children(recursive=True)
+        except psutil.Error:
+            children = []
+        self._processes = [process] + children
+        self.baseline = self.peak = _plain_rss(self._processes)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    @property
+    def growth(self) -> int:
+        return max(0, self.peak - self.baseline)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.peak = max(self.peak, _plain_rss(self._processes))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _plain_rss(self._processes))
+        return False
+
+
+class AdaptiveBatchSizer:
+    """Grows or shrinks encode batch sizes from measured peak memory per token"""
+
+    def __init__(self,
+                 budget_bytes: int,
+                 budget_source: str = 'explicit',
+                 initial_bytes_per_token: int = 256 * 1024,
+                 min_batch_size: int = 1,
+                 max_batch_size: int = 64,
+                 safety_factor: float = 0.8):
+        self.budget_bytes = int(budget_bytes)
+        self.budget_source = budget_source
+        self.bytes_per_token = float(initial_bytes_per_token)
+        self.min_batch_size = max(1, int(min_batch_size))
+        self.max_batch_size = max(self.min_batch_size, int(max_batch_size))
+        self.safety_factor = safety_factor
+
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        # One measured batch at a time: growth during an overlap belongs to both batches
+        self._measuring = threading.Lock()
+        self.batches_measured = 0
+        self.batches_unmeasured = 0
+        self.memory_backoffs = 0
+        self.peak_batch_growth = 0
+        self.last_batch_sizes: Dict[int, int] = {}
+
+    def headroom_bytes(self) -> int:
+        """Budget left above the current RSS of the service and its workers"""
+        return max(0, self.budget_bytes - process_tree_rss(self._process))
+
+    def batch_size_for(self, max_tokens: int) -> int:
+        """Largest batch of max_tokens-long texts expected to fit the remaining headroom"""
+        with self._lock:
+            bytes_per_token = self.bytes_per_token
+        tokens_allowed = self.headroom_bytes() * self.safety_factor / max(1.0, bytes_per_token)
+        size = int(tokens_allowed // max(1, max_tokens))
+        return max(self.min_batch_size, min(self.max_batch_size, size))
+
+    def observe(self, batch_size: int, max_tokens: int, run: Callable[[], Any]) -> Any:
+        """Run one batch, measuring its peak RSS growth to refine the per-token estimate
+
+        A batch that starts while another is being measured runs unmeasured;
+        charging it the other batch's growth (or the reverse) would inflate
+        the estimate, and a single inflated reading shrinks every later batch.
+        Growth from other requests running alongside is still counted.
+        """
+        if not self._measuring.acquire(blocking=False):
+            with self._lock:
+                self.batches_unmeasured += 1
+            return run()
+        try:
+            with _PeakRssSampler(self._process) as sampler:
+                result = run()
+        finally:
+            self._measuring.release()
+
+        padded_tokens = max(1, batch_size * max_tokens)
+        observed = sampler.growth / padded_tokens
+        with self._lock:
+            if observed > self.bytes_per_token:
+                # React immediately when batches need more memory than expected
+                self.bytes_per_token = observed
+            elif observed > 0:
+                # ...and relax slowly when they need less
+                self.bytes_per_token = 0.8 * self.bytes_per_token + 0.2 * observed
+            self.batches_measured += 1
+            self.peak_batch_growth = max(self.peak_batch_growth, sampler.growth)
+            self.last_batch_sizes[max_tokens] = batch_size
+        return result
+
+    def shrink(self, batch_size: int, max_tokens: int, error: Exception):
+        """Back off after a failed batch; memory errors also raise the per-token estimate"""
+        with self._lock:
+            if is_memory_error(error):
+                self.memory_backoffs += 1
+                self.bytes_per_token *= 2
+        logger.warning(
+            f"Batch of {batch_size} x {max_tokens} tokens failed ({error}); backing off to smaller batches"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sizer state for the health endpoint"""
+        with self._lock:
+            return {
+                'budget_mb': round(self.budget_bytes / 1024 / 1024, 1),
+                'budget_source': self.budget_source,
+                'headroom_mb': round(self.headroom_bytes() / 1024 / 1024, 1),
+                'bytes_per_token': int(self.bytes_per_token),
+                'batches_measured': self.batches_measured,
+                'batches_unmeasured': self.batches_unmeasured,
+                'memory_backoffs': self.memory_backoffs,
+                'peak_batch_growth_mb': round(self.peak_batch_growth / 1024 / 1024, 1),
+                'last_batch_sizes': {str(tokens): size for tokens, size in sorted(self.last_batch_sizes.items())}
+            }
@@ -0,0 +1,234 @@
+"""
+Model Artifacts Module
+======================
+
+Local, pinned copies of the embedding models.
+
+At image build time ``python model_artifacts.py fetch <model>...`` downloads
+each model once into MODEL_ARTIFACTS_DIR/<model>, keeps only the files the
+service needs, converts the transformer's PyTorch pickle to safetensors and
+writes an ``artifact.json`` manifest with the resolved hub revision and
+every file's size and sha256. At startup the service loads the model from that directory.
+There is no hub lookup and no retry loop, so a restart works with no network
+at all. transformers reads the weights from the safetensors file through
+its memory map instead of unpickling them.
+
+With MODEL_OFFLINE=false, a model without local artifacts is fetched on
+first use. With MODEL_OFFLINE=true it fails fast instead. Each load records
+how long every phase took (verify, fetch, import, load, warmup) so cold
+starts can be compared across images.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_DIR = os.environ.get('MODEL_ARTIFACTS_DIR', '/app/models')
+MANIFEST_FILE = 'artifact.json'
+
+# Weights in other frameworks and exported variants are never loaded by the service
+IGNORE_PATTERNS = [
+    '*.h5', '*.msgpack', '*.ot', '*.onnx', '*.tflite', 'tf_model*', 'flax_model*', 'rust_model*',
+    'onnx/*', 'openvino/*', 'coreml/*', '*.md', '.gitattributes'
+]
+
+
+class ArtifactError(RuntimeError):
+    """Local model artifacts are missing or do not match their manifest"""
+
+
+def repo_id_for(model_name: str) -> str:
+    """Hub repository of a model name, resolving bare sentence-transformers names"""
+    return model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+
+
+def artifact_dir(model_name: str, root: str = ARTIFACTS_DIR) -> str:
+    return os.path.join(root, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _list_files(path: str) -> List[str]:
+    files = []
+    for directory, subdirs, names in os.walk(path):
+        subdirs[:] = [name for name in subdirs if not name.startswith('.')]
+        for name in names:
+            relative = os.path.relpath(os.path.join(directory, name), path)
+            if relative != MANIFEST_FILE and not name.startswith('.'):
+                files.append(relative)
+    return sorted(files)
+
+
+def _convert_to_safetensors(path: str) -> List[str]:
+    """Replace the top-level pytorch_model.bin with a safetensors copy; returns converted files
+
+    Only the transformer weights at the top of the model directory are
+    converted. Modules in subdirectories (2_Dense/ and the like) load their
+    own pytorch_model.bin with torch.load and have no safetensors path, so
+    their files are left alone.
+    """
+    import torch
+    from safetensors.torch import save_file
+
+    source = os.path.join(path, 'pytorch_model.bin')
+    target = os.path.join(path, 'model.safetensors')
+    if not os.path.exists(source):
+        return []
+    if os.path.exists(target):
+        os.remove(source)
+        return []
+    state_dict = torch.load(source, map_location='cpu')
+    # safetensors refuses tensors sharing storage; each one gets its own copy
+    save_file({key: tensor.contiguous().clone() for key, tensor in state_dict.items()},
+              target, metadata={'format': 'pt'})
+    os.remove(source)
+    return ['pytorch_model.bin']
+
+
+def fetch_artifacts(model_name: str, root: str = ARTIFACTS_DIR, revision: Optional[str] = None) -> Dict[str, Any]:
+    """Download a model into its artifact directory and write the manifest"""
+    from huggingface_hub import HfApi, snapshot_download
+
+    repo_id = repo_id_for(model_name)
+    path = artifact_dir(model_name, root)
+    resolved = HfApi().model_info(repo_id, revision=revision).sha
+    logger.info(f"Fetching {repo_id}@{resolved} into {path}")
+    snapshot_download(
+        repo_id,
+        revision=resolved,
+        local_dir=path,
+        local_dir_use_symlinks=False,
+        ignore_patterns=IGNORE_PATTERNS
+    )
+    converted = _convert_to_safetensors(path)
+
+    manifest = {
+        'model': model_name,
+        'repo_id': repo_id,
+        'revision': resolved,
+        'fetched_at': time.time(),
+        'converted_to_safetensors': converted,
+        'files': {
+            relative: {
+                'size': os.path.getsize(os.path.join(path, relative)),
+                'sha256': _sha256(os.path.join(path, relative))
+            }
+            for relative in _list_files(path)
+        }
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify_artifacts(model_name: str, root: str = ARTIFACTS_DIR, checksums: bool = False) -> Dict[str, Any]:
+    """Check a model's files against its manifest (sizes, plus sha256 when checksums=True)"""
+    path = artifact_dir(model_name, root)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"No artifacts for '{model_name}' in {path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    for relative, expected in manifest['files'].items():
+        file_path = os.path.join(path, relative)
+        if not os.path.exists(file_path):
+            raise ArtifactError(f"Artifact file missing for '{model_name}': {relative}")
+        if os.path.getsize(file_path) != expected['size']:
+            raise ArtifactError(f"Artifact file size mismatch for '{model_name}': {relative}")
+        if checksums and _sha256(file_path) != expected['sha256']:
+            raise ArtifactError(f"Artifact checksum mismatch for '{model_name}': {relative}")
+    if not any(relative.endswith('.safetensors') for relative in manifest['files']):
+        raise ArtifactError(f"Artifacts for '{model_name}' contain no safetensors weights")
+    return manifest
+
+
+@contextmanager
+def _phase(phases: Dict[str, float], name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def resolve_artifacts(model_name: str,
+                      root: str = ARTIFACTS_DIR,
+                      offline: bool = False,
+                      phases: Optional[Dict[str, float]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Local directory and manifest of a model, fetching it first unless offline"""
+    phases = phases if phases is not None else {}
+    try:
+        with _phase(phases, 'verify'):
+            manifest = verify_artifacts(model_name, root)
+    except ArtifactError as e:
+        if offline:
+            raise ArtifactError(f"{e} (MODEL_OFFLINE is set, not downloading)") from e
+        logger.warning(f"⚠️ {e}; fetching it now")
+        with _phase(phases, 'fetch'):
+            manifest = fetch_artifacts(model_name, root)
+    return artifact_dir(model_name, root), manifest
+
+
+def load_sentence_transformer(model_name: str,
+                              root: str = ARTIFACTS_DIR,
+                              offline: bool = False,
+                              warmup: bool = True) -> Tuple[Any, Dict[str, Any]]:
+    """Load a SentenceTransformer from its pinned artifacts; returns (model, load report)
+
+    warmup=False skips the first encode, for callers that fork workers from
+    the loaded model and warm those up instead (see encoder_pool.py).
+    """
+    phases: Dict[str, float] = {}
+    started = time.perf_counter()
+    path, manifest = resolve_artifacts(model_name, root, offline, phases)
+
+    with _phase(phases, 'import'):
+        from sentence_transformers import SentenceTransformer
+    with _phase(phases, 'load'):
+        # A local directory never touches the hub; transformers picks model.safetensors
+        model = SentenceTransformer(path, device='cpu')
+    if warmup:
+        with _phase(phases, 'warmup'):
+            model.encode(["warmup"], show_progress_bar=False)
+
+    report = {
+        'source': path,
+        'revision': manifest.get('revision'),
+        'phases_ms': phases,
+        'total_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info(
+        f"⏱️ Loaded '{model_name}' in {report['total_ms']:.0f} ms ("
+        + ', '.join(f"{name} {ms:.0f} ms" for name, ms in phases.items()) + ")"
+    )
+    return model, report
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 3 or sys.argv[1] not in ('fetch', 'verify'):
+        print("usage: python model_artifacts.py fetch|verify <model> [<model>...]")
+        sys.exit(2)
+    command, names = sys.argv[1], sys.argv[2:]
+    for name in names:
+        if command == 'fetch':
+            result = fetch_artifacts(name)
+        else:
+            result = verify_artifacts(name, checksums=True)
+        size_mb = sum(entry['size'] for entry in result['files'].values()) / 1024 / 1024
+        print(f"✅ {name}: {result['repo_id']}@{result['revision']} ({len(result['files'])} files, {size_mb:.1f} MB)")
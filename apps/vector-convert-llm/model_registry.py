@@ -0,0 +1,280 @@
+"""
+Model Registry Module
+=====================
+
+Several embedding models in one service.
+
+Requests may name the model they want; ModelRegistry loads it on first use
+through the service's loader and keeps it for later requests. Only models
+on the allow-list can be requested, so a request can't make the service
+download arbitrary checkpoints. Loaded models are tracked by estimated
+memory (parameter and buffer bytes plus any exported ONNX file), and when
+the total passes the configured cap the least-recently-used models are
+unloaded. The default model is pinned and never evicted.
+
+Requests that already hold an evicted model finish with it; its memory is
+released once the last of them lets go.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownModelError(ValueError):
+    """The requested model is not on the registry's allow-list"""
+
+
+class ModelLoadError(RuntimeError):
+    """The requested model is allowed but could not be loaded"""
+
+
+def estimate_model_bytes(model, backend=None) -> int:
+    """Parameter and buffer bytes of a torch model, plus the file behind an ONNX backend"""
+    total = 0
+    try:
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    except Exception as e:
+        logger.warning(f"Could not measure model parameters: {e}")
+    onnx_path = getattr(backend, 'onnx_path', None)
+    if onnx_path and os.path.exists(onnx_path):
+        total += os.path.getsize(onnx_path)
+    return total
+
+
+class LoadedModel:
+    """One loaded embedding model with its inference backend and per-model counters"""
+
+    def __init__(self,
+                 name: str,
+                 model,
+                 encoder,
+                 backend_info: Optional[Dict[str, Any]] = None,
+                 encoder_pool=None,
+                 memory_bytes: int = 0,
+                 load_time_s: float = 0.0,
+                 load_report: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.model = model
+        self.encoder = encoder
+        self.backend_info = backend_info
+        self.encoder_pool = encoder_pool
+        self.memory_bytes = int(memory_bytes)
+        self.load_time_s = load_time_s
+        # Where the weights came from and how long each load phase took
+        self.load_report = load_report or {}
+        # Micro-batchers are attached by the service after construction
+        self.embed_batcher = None
+        self.encode_batcher = None
+
+        try:
+            self.dimension = int(model.get_sentence_embedding_dimension())
+        except Exception:
+            self.dimension = None
+        self.max_seq_length = getattr(model, 'max_seq_length', None)
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def vector_identity(self) -> str:
+        """What determines this model's vectors: name, pinned revision and inference backend
+
+        Keys for anything that outlives the process (the embedding cache's disk
+        tier) or is shared across requests (the near-duplicate index), so a
+        revision or INFERENCE_BACKEND change never serves the other one's vectors.
+        """
+        revision = self.load_report.get('revision') or 'unpinned'
+        backend = (self.backend_info or {}).get('active') or 'torch'
+        return f"{self.name}@{revision}:{backend}"
+
+    def touch(self):
+        with self._lock:
+            self.requests += 1
+            self.last_used = time.time()
+
+    def close(self):
+        """Stop this model's batchers and encoder workers"""
+        for batcher in (self.embed_batcher, self.encode_batcher):
+            if batcher is not None:
+                batcher.close()
+        if self.encoder_pool is not None:
+            self.encoder_pool.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'dimension': self.dimension,
+                'max_seq_length': self.max_seq_length,
+                'memory_mb': round(self.memory_bytes / 1024 / 1024, 1),
+                'load_time_s': round(self.load_time_s, 2),
+                'load_phases_ms': self.load_report.get('phases_ms'),
+                'revision': self.load_report.get('revision'),
+                'loaded_at': self.loaded_at,
+                'idle_s': round(time.time() - self.last_used, 1),
+                'requests': self.requests,
+                'inference_backend': (self.backend_info or {}).get('active'),
+            }
+        if self.embed_batcher is not None and self.encode_batcher is not None:
+            stats['micro_batching'] = {
+                'embed': self.embed_batcher.get_stats(),
+                'encode': self.encode_batcher.get_stats()
+            }
+        if self.encoder_pool is not None:
+            stats['encoder_pool'] = self.encoder_pool.get_stats()
+        return stats
+
+
+class ModelRegistry:
+    """Lazily loaded embedding models, evicted least-recently-used past a memory cap"""
+
+    def __init__(self,
+                 loader: Callable[[str], LoadedModel],
+                 default_model: str,
+                 allowed_models: Sequence[str] = (),
+                 max_memory_bytes: int = 0):
+        self.loader = loader
+        self.default_model = default_model
+        self.allowed_models: List[str] = [default_model] + [
+            name for name in allowed_models if name and name != default_model
+        ]
+        self.max_memory_bytes = max(0, int(max_memory_bytes))
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, LoadedModel] = {}
+        self._pinned = set()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._load_errors: Dict[str, str] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve_name(self, name: Optional[str]) -> str:
+        """Canonical model name for a request, raising UnknownModelError if it isn't allowed"""
+        if not name:
+            return self.default_model
+        if name not in self.allowed_models:
+            raise UnknownModelError(
+                f"Unknown model '{name}', expected one of {', '.join(self.allowed_models)}"
+            )
+        return name
+
+    def register(self, loaded: LoadedModel, pinned: bool = False, default: bool = False):
+        """Add an already-loaded model (the default model is loaded at startup and pinned)"""
+        with self._lock:
+            if default:
+                # A fallback checkpoint may stand in for the configured default
+                self.default_model = loaded.name
+                if loaded.name not in self.allowed_models:
+                    self.allowed_models.insert(0, loaded.name)
+            previous = self._models.get(loaded.name)
+            self._models[loaded.name] = loaded
+            if pinned:
+                self._pinned.add(loaded.name)
+            self._load_errors.pop(loaded.name, None)
+        if previous is not None and previous is not loaded:
+            previous.close()
+        self._evict_over_cap(keep=loaded.name)
+
+    def get(self, name: Optional[str] = None) -> LoadedModel:
+        """The named model (default when None), loading it first if necessary"""
+        name = self.resolve_name(name)
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                load_lock = self._load_locks.setdefault(name, threading.Lock())
+        if loaded is not None:
+            loaded.touch()
+            return loaded
+        if name == self.default_model:
+            # The service loads (and retries) the default model itself at startup
+            raise ModelLoadError(f"Default model '{name}' is not loaded")
+
+        # One load per model at a time; concurrent requests for it wait and share the result
+        with load_lock:
+            with self._lock:
+                loaded = self._models.get(name)
+            if loaded is None:
+                logger.info(f"📦 Loading model '{name}' on demand")
+                try:
+                    loaded = self.loader(name)
+                except Exception as e:
+                    with self._lock:
+                        self._load_errors[name] = str(e)
+                    logger.error(f"❌ Failed to load model '{name}': {e}")
+                    raise ModelLoadError(f"Failed to load model '{name}': {e}") from e
+                with self._lock:
+                    self._models[name] = loaded
+                    self._load_errors.pop(name, None)
+                    self.loads += 1
+                logger.info(
+                    f"✅ Model '{name}' loaded in {loaded.load_time_s:.1f}s "
+                    f"(~{loaded.memory_bytes / 1024 / 1024:.0f} MB)"
+                )
+                self._evict_over_cap(keep=name)
+        loaded.touch()
+        return loaded
+
+    def peek(self, name: Optional[str] = None) -> Optional[LoadedModel]:
+        """The named model if it is loaded, without loading it or counting a request"""
+        with self._lock:
+            return self._models.get(name or self.default_model)
+
+    def unload(self, name: str) -> bool:
+        """Unload a model that is not pinned; returns whether it was loaded"""
+        with self._lock:
+            if name in self._pinned:
+                return False
+            loaded = self._models.pop(name, None)
+        if loaded is None:
+            return False
+        loaded.close()
+        return True
+
+    def _evict_over_cap(self, keep: str):
+        """Unload least-recently-used unpinned models until the total fits the cap"""
+        if not self.max_memory_bytes:
+            return
+        evicted = []
+        with self._lock:
+            total = sum(loaded.memory_bytes for loaded in self._models.values())
+            candidates = sorted(
+                (loaded for name, loaded in self._models.items() if name not in self._pinned and name != keep),
+                key=lambda loaded: loaded.last_used
+            )
+            for loaded in candidates:
+                if total <= self.max_memory_bytes:
+                    break
+                del self._models[loaded.name]
+                total -= loaded.memory_bytes
+                self.evictions += 1
+                evicted.append(loaded)
+        for loaded in evicted:
+            logger.info(f"♻️ Unloaded model '{loaded.name}' (least recently used, over the model memory cap)")
+            loaded.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model stats for the health endpoint"""
+        with self._lock:
+            models = dict(self._models)
+            pinned = set(self._pinned)
+            errors = dict(self._load_errors)
+            loads, evictions = self.loads, self.evictions
+        return {
+            'default': self.default_model,
+            'available': self.allowed_models,
+            'max_memory_mb': round(self.max_memory_bytes / 1024 / 1024, 1) if self.max_memory_bytes else None,
+            'loaded_memory_mb': round(sum(loaded.memory_bytes for loaded in models.values()) / 1024 / 1024, 1),
+            'loads': loads,
+            'evictions': evictions,
+            'loaded': {
+                name: dict(loaded.get_stats(), pinned=name in pinned)
+                for name, loaded in models.items()
+            },
+            'load_errors': errors
+        }
@@ -0,0 +1,222 @@
+"""
+Pipeline Module
+===============
+
+Staged ingestion with bounded queues between stages.
+
+Ingestion fetches from Convex, chunks, encodes, and saves back to Convex.
+When those steps run in sequence, Convex is idle while the model encodes,
+and the CPU is idle while writes are in flight. Pipeline gives each stage
+its own thread and joins the stages with bounded queues, so network I/O and
+model compute overlap. A full queue blocks the stage that feeds it
+(backpressure). Memory therefore stays bounded by queue_size items per
+stage, whatever the size of the document.
+
+A stage is a function that takes an iterator of inputs and returns an
+iterable of outputs, so it can batch, filter or fan out. A map stage wraps
+a per-item function. With one thread per stage, items keep their order.
+For each stage the pipeline records:
+
+  busy_ms     time spent on the stage's own work
+  starved_ms  time spent waiting for input from the previous stage
+  blocked_ms  time spent waiting for room in the next stage's queue
+  queue       capacity and current, peak and mean depth of its input queue
+
+A stage that is mostly starved is waiting on the stage before it. One
+that is mostly blocked is held back by the stage after it.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+_POLL_SECONDS = 0.1
+
+
+class _Stopped(Exception):
+    """Raised inside a stage once the pipeline has been stopped"""
+
+
+class StageStats:
+    """Counters for one stage; each is written only by that stage's thread"""
+
+    def __init__(self, name: str, capacity: Optional[int]):
+        self.name = name
+        self.capacity = capacity
+        self.items_in = 0
+        self.items_out = 0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.depth = 0
+        self.peak_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_depth(self, depth: int):
+        self.depth = depth
+        self.peak_depth = max(self.peak_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        elapsed = ((self.finished or now) - self.started) if self.started else 0.0
+        info = {
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'busy_ms': round(max(0.0, elapsed - self.starved - self.blocked) * 1000, 1),
+            'starved_ms': round(self.starved * 1000, 1),
+            'blocked_ms': round(self.blocked * 1000, 1),
+            'running': self.started is not None and self.finished is None
+        }
+        if self.capacity is not None:
+            info['queue'] = {
+                'capacity': self.capacity,
+                'depth': self.depth,
+                'peak_depth': self.peak_depth,
+                'mean_depth': round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0
+            }
+        return info
+
+
+class Pipeline:
+    """A source plus stages on their own threads, joined by bounded queues"""
+
+    def __init__(self, name: str, queue_size: int = 4):
+        self.name = name
+        self.queue_size = max(1, int(queue_size))
+        self._stages: List[Tuple[str, Callable[[Iterator], Iterable]]] = []
+        self._stats: Dict[str, StageStats] = {}
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._failed_stage: Optional[str] = None
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def source(self, name: str, items: Iterable) -> 'Pipeline':
+        """First stage: produces items from `items` (iterated on its own thread)"""
+        if self._stages:
+            raise ValueError("The source must be the first stage")
+        return self._add(name, lambda _: items, None)
+
+    def stage(self, name: str, fn: Callable[[Iterator], Iterable]) -> 'Pipeline':
+        """Stage fed an iterator of the previous stage's outputs, yielding its own"""
+        if not self._stages:
+            raise ValueError("Add a source before other stages")
+        return self._add(name, fn, self.queue_size)
+
+    def map(self, name: str, fn: Callable[[Any], Any]) -> 'Pipeline':
+        """Stage applying fn to each item"""
+        return self.stage(name, lambda items: (fn(item) for item in items))
+
+    def _add(self, name: str, fn: Callable[[Iterator], Iterable], capacity: Optional[int]) -> 'Pipeline':
+        if name in self._stats:
+            raise ValueError(f"Duplicate stage name '{name}'")
+        self._stages.append((name, fn))
+        self._stats[name] = StageStats(name, capacity)
+        return self
+
+    def _put(self, q: queue.Queue, item: Any, stats: StageStats):
+        waited = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise _Stopped()
+                try:
+                    q.put(item, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked += time.perf_counter() - waited
+
+    def _get(self, q: queue.Queue) -> Any:
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def _drain(self, q: queue.Queue, stats: StageStats) -> Iterator:
+        while True:
+            stats.sample_depth(q.qsize())
+            waited = time.perf_counter()
+            try:
+                item = self._get(q)
+            finally:
+                stats.starved += time.perf_counter() - waited
+            if item is _END:
+                return
+            stats.items_in += 1
+            yield item
+
+    def _run_stage(self, name: str, fn: Callable[[Iterator], Iterable], inbox: Optional[queue.Queue], outbox: queue.Queue):
+        stats = self._stats[name]
+        stats.started = time.perf_counter()
+        try:
+            inputs = self._drain(inbox, stats) if inbox is not None else iter(())
+            for item in fn(inputs):
+                stats.items_out += 1
+                self._put(outbox, item, stats)
+            self._put(outbox, _END, stats)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            if self._error is None:
+                self._error, self._failed_stage = e, name
+                logger.error(f"❌ Pipeline '{self.name}' stage '{name}' failed: {e}", exc_info=True)
+            self._stop.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    def run(self) -> Iterator:
+        """Start every stage and yield the last stage's outputs; re-raises the first stage failure"""
+        if not self._stages:
+            raise ValueError("Pipeline has no stages")
+        self._started = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        threads = []
+        for n, (name, fn) in enumerate(self._stages):
+            thread = threading.Thread(
+                target=self._run_stage,
+                args=(name, fn, queues[n - 1] if n else None, queues[n]),
+                name=f'pipeline-{name}',
+                daemon=True
+            )
+            threads.append(thread)
+            thread.start()
+        try:
+            while True:
+                try:
+                    item = self._get(queues[-1])
+                except _Stopped:
+                    break
+                if item is _END:
+                    break
+                yield item
+        finally:
+            # Also reached when the caller stops iterating early
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+            self._finished = time.perf_counter()
+        if self._error is not None:
+            raise self._error
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        return {
+            'queue_size': self.queue_size,
+            'elapsed_ms': round(((self._finished or now) - self._started) * 1000, 1) if self._started else 0.0,
+            'failed_stage': self._failed_stage,
+            'stages': {name: stats.as_dict() for name, stats in self._stats.items()}
+        }
@@ -0,0 +1,188 @@
+"""
+Projection Module
+=================
+
+Corpus-trained PCA projection for compact embeddings.
+
+PcaProjection is fitted on a sample of our own chunk embeddings and maps a
+model's vectors (384 dimensions for all-MiniLM-L6-v2) to a smaller number
+of principal components. Storage and similarity cost shrink in proportion
+to the dimension cut.
+
+Vectors are L2-normalized before projection and again after it, so cosine
+similarity keeps working on the projected vectors. ProjectionStore keeps
+one fitted projection per model on disk and serves it to the encode paths.
+recall_at_k measures how many of the full-dimension top-k neighbours the
+projected vectors still find. The service reports it for a held-out query
+set before a projection is saved.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class PcaProjection:
+    """Mean and top principal components of a sample of normalized embeddings"""
+
+    def __init__(self,
+                 mean: np.ndarray,
+                 components: np.ndarray,
+                 explained_variance_ratio: np.ndarray,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=np.float32)
+        self.metadata = dict(metadata or {})
+
+    @property
+    def input_dimensions(self) -> int:
+        return int(self.components.shape[1])
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.components.shape[0])
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, dimensions: int, **metadata) -> 'PcaProjection':
+        """Fit on an (n, d) sample; needs more samples than output dimensions"""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float64))
+        samples, input_dimensions = vectors.shape
+        if not 0 < dimensions < input_dimensions:
+            raise ValueError(f"dimensions must be between 1 and {input_dimensions - 1}, got {dimensions}")
+        if samples <= dimensions:
+            raise ValueError(f"Need more than {dimensions} sample vectors to fit {dimensions} components, got {samples}")
+        mean = vectors.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        variance = singular_values ** 2
+        ratio = variance[:dimensions] / variance.sum()
+        metadata.update(samples=samples, fitted_at=time.time())
+        return cls(mean, vt[:dimensions], ratio, metadata)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """Project (n, d) or (d,) vectors; outputs are L2-normalized float32"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        single = vectors.ndim == 1
+        if single:
+            vectors = vectors[None, :]
+        if vectors.shape[1] != self.input_dimensions:
+            raise ValueError(
+                f"Projection expects {self.input_dimensions}-dimensional vectors, got {vectors.shape[1]}"
+            )
+        projected = _normalize((_normalize(vectors) - self.mean) @ self.components.T).astype(np.float32)
+        return projected[0] if single else projected
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            mean=self.mean,
+            components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio,
+            metadata=np.array(json.dumps(self.metadata))
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'PcaProjection':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['mean'],
+                data['components'],
+                data['explained_variance_ratio'],
+                json.loads(str(data['metadata']))
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(
+            self.metadata,
+            input_dimensions=self.input_dimensions,
+            dimensions=self.dimensions,
+            explained_variance=round(float(self.explained_variance_ratio.sum()), 4),
+            size_reduction=round(self.input_dimensions / self.dimensions, 2)
+        )
+
+
+def recall_at_k(corpus: np.ndarray,
+                queries: np.ndarray,
+                projection: PcaProjection,
+                k: int = 10) -> Dict[str, Any]:
+    """Share of each query's full-dimension cosine top-k that the projected vectors also rank top-k"""
+    corpus = _normalize(np.asarray(corpus, dtype=np.float32))
+    queries = _normalize(np.asarray(queries, dtype=np.float32))
+    k = max(1, min(int(k), len(corpus)))
+
+    def top_k(scores: np.ndarray) -> np.ndarray:
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    full = top_k(queries @ corpus.T)
+    reduced = top_k(projection.apply(queries) @ projection.apply(corpus).T)
+    per_query = [len(set(a) & set(b)) / k for a, b in zip(full, reduced)]
+    return {
+        'k': k,
+        'queries': len(queries),
+        'corpus': len(corpus),
+        'recall': round(float(np.mean(per_query)), 4) if per_query else None,
+        'min_recall': round(float(np.min(per_query)), 4) if per_query else None
+    }
+
+
+class ProjectionStore:
+    """Fitted projections per model, persisted as .npz files under a directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._projections: Dict[str, Optional[PcaProjection]] = {}
+
+    def path_for(self, model_name: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name) + '.npz')
+
+    def get(self, model_name: str) -> Optional[PcaProjection]:
+        """The model's saved projection (loaded from disk once), or None"""
+        with self._lock:
+            if model_name in self._projections:
+                return self._projections[model_name]
+        path = self.path_for(model_name)
+        projection = None
+        if os.path.exists(path):
+            try:
+                projection = PcaProjection.load(path)
+                logger.info(f"📐 Loaded {projection.dimensions}-dimension projection for '{model_name}'")
+            except Exception as e:
+                logger.error(f"❌ Could not load projection {path}: {e}")
+        with self._lock:
+            return self._projections.setdefault(model_name, projection)
+
+    def put(self, model_name: str, projection: PcaProjection):
+        projection.save(self.path_for(model_name))
+        with self._lock:
+            self._projections[model_name] = projection
+
+    def remove(self, model_name: str) -> bool:
+        path = self.path_for(model_name)
+        existed = os.path.exists(path)
+        if existed:
+            os.remove(path)
+        with self._lock:
+            self._projections[model_name] = None
+        return existed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = {name: p.get_stats() for name, p in self._projections.items() if p is not None}
+        return {'directory': self.directory, 'projections': loaded}
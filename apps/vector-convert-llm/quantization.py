@@ -0,0 +1,110 @@
+"""
+Quantization Module
+===================
+
+Compact embedding output formats plus rescoring.
+
+  float   the embedding as a list of floats (the default)
+  int8    each vector scaled by its own max |value| / 127 and rounded to
+          int8, returned as base64 bytes with its scale (4x smaller)
+  binary  one sign bit per dimension, packed eight to a byte and returned
+          as base64 (32x smaller)
+
+Binary vectors are searched by Hamming distance, which is cheap but
+coarse. binary_search() therefore over-fetches candidates, and rescore()
+re-ranks them by cosine similarity on the full-precision vectors.
+"""
+
+import base64
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+FLOAT = 'float'
+INT8 = 'int8'
+BINARY = 'binary'
+OUTPUT_MODES = (FLOAT, INT8, BINARY)
+
+# Set bits per byte value, for Hamming distances over packed vectors
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(n, d) float vectors -> (n, d) int8 values and (n,) float32 per-vector scales"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    values = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+def dequantize_int8(values: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return np.atleast_2d(values).astype(np.float32) * np.asarray(scales, dtype=np.float32).reshape(-1, 1)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """(n, d) float vectors -> (n, ceil(d / 8)) uint8 packed sign bits (1 where value > 0)"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return np.packbits(vectors > 0, axis=1)
+
+
+def pack_embeddings(vectors: np.ndarray, mode: str = FLOAT) -> List[Any]:
+    """JSON-ready embeddings in an output mode (one entry per row)"""
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{mode}', expected one of {', '.join(OUTPUT_MODES)}")
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if mode == FLOAT:
+        return vectors.tolist()
+    if mode == INT8:
+        values, scales = quantize_int8(vectors)
+        return [
+            {'data': base64.b64encode(row.tobytes()).decode('ascii'), 'scale': float(scale)}
+            for row, scale in zip(values, scales)
+        ]
+    return [base64.b64encode(row.tobytes()).decode('ascii') for row in quantize_binary(vectors)]
+
+
+def unpack_embedding(packed: Any, mode: str, dimension: int) -> np.ndarray:
+    """Inverse of pack_embeddings for one entry (binary unpacks to 0/1 bits)"""
+    if mode == FLOAT:
+        return np.asarray(packed, dtype=np.float32)
+    if mode == INT8:
+        values = np.frombuffer(base64.b64decode(packed['data']), dtype=np.int8)
+        return dequantize_int8(values, [packed['scale']])[0]
+    bits = np.unpackbits(np.frombuffer(base64.b64decode(packed), dtype=np.uint8))
+    return bits[:dimension]
+
+
+def output_size(dimension: int, mode: str) -> int:
+    """Bytes per vector before base64 encoding"""
+    if mode == INT8:
+        return dimension + 4
+    if mode == BINARY:
+        return (dimension + 7) // 8
+    return dimension * 4
+
+
+def hamming_distances(query_bits: np.ndarray, corpus_bits: np.ndarray) -> np.ndarray:
+    """Hamming distance from one packed query to each packed corpus row"""
+    return _POPCOUNT[np.bitwise_xor(np.atleast_2d(corpus_bits), query_bits.reshape(1, -1))].sum(axis=1)
+
+
+def binary_search(query_bits: np.ndarray, corpus_bits: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the `limit` corpus rows nearest the query by Hamming distance"""
+    distances = hamming_distances(query_bits, corpus_bits)
+    limit = max(1, min(int(limit), len(distances)))
+    candidates = np.argpartition(distances, limit - 1)[:limit]
+    return candidates[np.argsort(distances[candidates], kind='stable')]
+
+
+def rescore(query: np.ndarray,
+            candidate_vectors: np.ndarray,
+            candidate_ids: Sequence[Any],
+            top_k: int) -> List[Dict[str, Any]]:
+    """Re-rank candidates by full-precision cosine similarity; returns [{'id', 'score'}] best first"""
+    query = np.asarray(query, dtype=np.float32).reshape(-1)
+    candidate_vectors = np.atleast_2d(np.asarray(candidate_vectors, dtype=np.float32))
+    norms = np.linalg.norm(candidate_vectors, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+    scores = candidate_vectors @ query / np.maximum(norms, 1e-12)
+    order = np.argsort(-scores, kind='stable')[:max(0, int(top_k))]
+    return [{'id': candidate_ids[i], 'score': float(scores[i])} for i in order]
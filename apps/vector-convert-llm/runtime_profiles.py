@@ -0,0 +1,172 @@
+"""
+Runtime Profiles Module
+=======================
+
+Named memory profiles for the one vector-convert-llm engine.
+
+The service used to ship several entry points (main.py, optimized-main.py,
+minimal-main.py, simple_app.py), each with its own batch sizes, chunk
+sizes and loading behaviour. A profile is now just a set of defaults for
+the settings main.py reads:
+
+  full       everything on, sized for the default 2G allocation
+  optimized  small batches and chunks, one model, smaller caches, periodic GC
+  minimal    batch size 1, the model loads on first request, caches off,
+             GC after every request
+
+RUNTIME_PROFILE picks one by name. 'auto' (the default) picks one from the
+service's memory limit: VECTOR_CONVERT_LLM_RAM, or else the container's
+cgroup limit. A setting given explicitly in the environment always wins
+over the profile's value.
+"""
+
+import gc
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from memory_budget import detect_container_memory_limit, parse_memory_size
+
+logger = logging.getLogger(__name__)
+
+FULL = 'full'
+OPTIMIZED = 'optimized'
+MINIMAL = 'minimal'
+
+PROFILES: Dict[str, Dict[str, str]] = {
+    FULL: {
+        'EMBEDDING_MODELS': 'all-MiniLM-L6-v2,BAAI/bge-small-en',
+        'MODEL_REGISTRY_MAX_MB': '512',
+        'MICRO_BATCH_MAX_SIZE': '32',
+        'ENCODE_MAX_BATCH_SIZE': '64',
+        'ENCODE_TOKENS_PER_BATCH': '4096',
+        'CHUNK_STREAM_BATCH_SIZE': '256',
+        'PIPELINE_QUEUE_SIZE': '4',
+        'DEFAULT_CHUNK_SIZE': '1000',
+        'DEFAULT_CHUNK_OVERLAP': '200',
+        'EMBEDDING_CACHE_MAX_MB': '64',
+        'CHUNK_CACHE_MAX_MB': '32',
+        'NEAR_DUPLICATE_INDEX_MAX_MB': '32',
+        'CHUNKING_WORKERS': 'auto',
+        'LAZY_MODEL_LOAD': 'false',
+        'GC_INTERVAL': '0',
+    },
+    OPTIMIZED: {
+        'EMBEDDING_MODELS': '',
+        'MODEL_REGISTRY_MAX_MB': '128',
+        'MICRO_BATCH_MAX_SIZE': '8',
+        'ENCODE_MAX_BATCH_SIZE': '8',
+        'ENCODE_TOKENS_PER_BATCH': '1024',
+        'CHUNK_STREAM_BATCH_SIZE': '32',
+        'PIPELINE_QUEUE_SIZE': '2',
+        'DEFAULT_CHUNK_SIZE': '500',
+        'DEFAULT_CHUNK_OVERLAP': '50',
+        'EMBEDDING_CACHE_MAX_MB': '16',
+        'CHUNK_CACHE_MAX_MB': '8',
+        'NEAR_DUPLICATE_INDEX_MAX_MB': '8',
+        'CHUNKING_WORKERS': '0',
+        'LAZY_MODEL_LOAD': 'false',
+        'GC_INTERVAL': '10',
+    },
+    MINIMAL: {
+        'EMBEDDING_MODELS': '',
+        'MODEL_REGISTRY_MAX_MB': '0',
+        'MICRO_BATCH_MAX_SIZE': '1',
+        'ENCODE_MAX_BATCH_SIZE': '1',
+        'ENCODE_TOKENS_PER_BATCH': '512',
+        'CHUNK_STREAM_BATCH_SIZE': '8',
+        'PIPELINE_QUEUE_SIZE': '1',
+        'DEFAULT_CHUNK_SIZE': '500',
+        'DEFAULT_CHUNK_OVERLAP': '50',
+        'EMBEDDING_CACHE_ENABLED': 'false',
+        'CHUNK_CACHE_ENABLED': 'false',
+        'NEAR_DUPLICATE_ENABLED': 'false',
+        'CHUNKING_WORKERS': '0',
+        'LAZY_MODEL_LOAD': 'true',
+        'GC_INTERVAL': '1',
+    },
+}
+
+# 'auto' picks the smallest profile whose ceiling the memory limit falls under
+AUTO_THRESHOLDS_MB = ((MINIMAL, 1024), (OPTIMIZED, 2048))
+
+
+def detect_memory_limit() -> Tuple[Optional[int], str]:
+    """Memory the service may use in bytes (None if unlimited) and where it came from"""
+    allocation = parse_memory_size(os.environ.get('VECTOR_CONVERT_LLM_RAM', ''))
+    if allocation:
+        return allocation, 'VECTOR_CONVERT_LLM_RAM'
+    limit = detect_container_memory_limit()
+    if limit:
+        return limit, 'cgroup'
+    return None, 'unlimited'
+
+
+class RuntimeProfile:
+    """The selected profile; get() resolves a setting from the environment, then the profile"""
+
+    def __init__(self, name: str, reason: str, memory_limit: Optional[int] = None):
+        if name not in PROFILES:
+            raise ValueError(f"Unknown runtime profile '{name}', expected one of {', '.join(PROFILES)}")
+        self.name = name
+        self.reason = reason
+        self.memory_limit = memory_limit
+        self.settings = PROFILES[name]
+
+    def get(self, key: str, default: str) -> str:
+        value = os.environ.get(key)
+        if value is not None:
+            return value
+        return self.settings.get(key, default)
+
+    def overrides(self) -> Dict[str, str]:
+        """Profile settings the environment replaces"""
+        return {key: os.environ[key] for key in self.settings if key in os.environ}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'reason': self.reason,
+            'memory_limit_mb': round(self.memory_limit / 1024 / 1024) if self.memory_limit else None,
+            'settings': dict(self.settings, **self.overrides()),
+            'overridden': sorted(self.overrides())
+        }
+
+
+def select_profile(requested: Optional[str] = None) -> RuntimeProfile:
+    """Profile named by RUNTIME_PROFILE, or chosen from the memory limit for 'auto'"""
+    requested = (requested or os.environ.get('RUNTIME_PROFILE', 'auto')).lower()
+    memory_limit, source = detect_memory_limit()
+    if requested != 'auto':
+        return RuntimeProfile(requested, 'RUNTIME_PROFILE', memory_limit)
+    if memory_limit:
+        for name, ceiling_mb in AUTO_THRESHOLDS_MB:
+            if memory_limit < ceiling_mb * 1024 * 1024:
+                return RuntimeProfile(name, f"auto: {source} limit under {ceiling_mb} MB", memory_limit)
+    return RuntimeProfile(FULL, f"auto: {source} limit", memory_limit)
+
+
+class GarbageCollector:
+    """Runs gc.collect() every `interval` ticks (0 leaves collection to Python)"""
+
+    def __init__(self, interval: int = 0):
+        self.interval = max(0, int(interval))
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.collections = 0
+
+    def tick(self):
+        if not self.interval:
+            return
+        with self._lock:
+            self.ticks += 1
+            due = self.ticks % self.interval == 0
+            if due:
+                self.collections += 1
+        if due:
+            gc.collect()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'interval': self.interval, 'ticks': self.ticks, 'collections': self.collections}
@@ -0,0 +1,119 @@
+"""
+Encode Scheduler Module
+=======================
+
+Priority lanes in front of the model.
+
+Every model call is routed through PriorityScheduler.run() with a lane name.
+Only ``slots`` calls run at once. Whenever a slot frees up, the oldest call in
+the highest-priority non-empty lane goes next. Query embeddings on the
+interactive lane therefore wait for at most the bulk batch already running,
+never for the rest of a large document's batches, and search latency stays
+flat while ingestion is busy.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+# Number of recent waits kept per lane for the percentile metrics
+WAIT_SAMPLE_SIZE = 1000
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Lane:
+    """Queue and wait-time metrics for one priority class"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queue: deque = deque()
+        self.max_depth = 0
+        self.tasks_run = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+        self.recent_waits_ms: deque = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits_ms)
+        return {
+            'queue_depth': len(self.queue),
+            'max_queue_depth': self.max_depth,
+            'tasks_run': self.tasks_run,
+            'avg_wait_ms': round(self.total_wait_ms / self.tasks_run, 2) if self.tasks_run else 0,
+            'p50_wait_ms': round(_percentile(waits, 0.50), 2),
+            'p99_wait_ms': round(_percentile(waits, 0.99), 2),
+            'avg_run_ms': round(self.total_run_ms / self.tasks_run, 2) if self.tasks_run else 0
+        }
+
+
+class PriorityScheduler:
+    """Runs model calls one slot at a time, always preferring higher-priority lanes"""
+
+    def __init__(self, lanes: Sequence[str] = (INTERACTIVE, BULK), slots: int = 1):
+        self.lane_order = list(lanes)
+        self._lanes = {name: _Lane(name) for name in self.lane_order}
+        self.slots = max(1, int(slots))
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def _next_ticket(self):
+        """Ticket allowed to run next (condition held)"""
+        for name in self.lane_order:
+            queue = self._lanes[name].queue
+            if queue:
+                return queue[0]
+        return None
+
+    def run(self, lane: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once a slot is free and no higher-priority call is waiting"""
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown scheduler lane '{lane}', expected one of {', '.join(self.lane_order)}")
+
+        state = self._lanes[lane]
+        ticket = object()
+        enqueued = time.monotonic()
+        with self._condition:
+            state.queue.append(ticket)
+            state.max_depth = max(state.max_depth, len(state.queue))
+            while self._active >= self.slots or self._next_ticket() is not ticket:
+                self._condition.wait()
+            state.queue.popleft()
+            self._active += 1
+            # Another slot may still be free for the next ticket in line
+            self._condition.notify_all()
+
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            finished = time.monotonic()
+            with self._condition:
+                self._active -= 1
+                wait_ms = (started - enqueued) * 1000
+                state.tasks_run += 1
+                state.total_wait_ms += wait_ms
+                state.total_run_ms += (finished - started) * 1000
+                state.recent_waits_ms.append(wait_ms)
+                self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-lane queue depth and wait-time metrics for the health endpoint"""
+        with self._condition:
+            return {
+                'slots': self.slots,
+                'active': self._active,
+                'lanes': {name: self._lanes[name].get_stats() for name in self.lane_order}
+            }
@@ -0,0 +1,19 @@
+"""
+Service Entry Point
+===================
+
+Starts vector-convert-llm; startup.sh runs ``python serve.py``.
+
+The chunking pool's forkserver workers re-run the parent's __main__ script
+as __mp_main__ before they take any work. If that script were main.py,
+each worker would import torch and sentence-transformers and rebuild the
+service's clients, caches and model registry, at a cost of hundreds of MB
+per worker. This file is the __main__ instead. Its module level does
+nothing, so a worker's re-import is free and the worker only loads what
+its tasks need (chunking.py).
+"""
+
+if __name__ == '__main__':
+    import main
+
+    main.serve()
@@ -6,17 +6,22 @@ import logging
 import threading
 from typing import Dict, Any, Optional
 
+from convex_client import ConvexClient
+
 class StatusReporter:
     """Utility class for reporting service status to Convex backend"""
     
-    def __init__(self, service_name: str, convex_url: str):
+    def __init__(self, service_name: str, convex_url: str, check_connectivity: bool = True, client: Optional[ConvexClient] = None):
         self.service_name = service_name
         self.convex_url = convex_url
+        # Share the service's pooled client when given one, so reports reuse its connections
+        self.client = client or ConvexClient.from_env(convex_url, pool_size=2)
         self.start_time = time.time()
         self.logger = logging.getLogger(__name__)
         
-        # Test connectivity on initialization
-        self.test_connectivity()
+        # Test connectivity on initialization (callers starting in the background may defer it)
+        if check_connectivity:
+            self.test_connectivity()
         
     def get_memory_usage(self) -> Dict[str, Any]:
         """Get current memory usage statistics"""
@@ -90,10 +95,11 @@ class StatusReporter:
             self.logger.info(f"Attempting to send status update to: {self.convex_url}/updateServiceStatus")
             self.logger.debug(f"Payload: {payload}")
             
-            response = requests.post(
+            # A status report replaces the previous one, so it is safe to retry
+            response = self.client.post(
                 f"{self.convex_url}/updateServiceStatus",
                 json=payload,
-                timeout=10
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -194,19 +200,19 @@ class StatusReporter:
         self.logger.info(f"Started periodic status reporting every {interval_seconds} seconds")
         return thread
     
-    def test_connectivity(self):
-        """Test basic connectivity to Convex backend"""
+    def test_connectivity(self) -> bool:
+        """Test basic connectivity to Convex backend; returns whether the health endpoint answered 200"""
         try:
             self.logger.info(f"Testing connectivity to Convex backend at: {self.convex_url}")
             
             # Try a simple GET request to the health endpoint first
             health_url = f"{self.convex_url}/api/health"
-            response = requests.get(health_url, timeout=5)
+            response = self.client.get(health_url)
             
             if response.status_code == 200:
                 self.logger.info("✅ Successfully connected to Convex backend health endpoint")
-            else:
-                self.logger.warning(f"⚠️ Health endpoint returned status {response.status_code}")
+                return True
+            self.logger.warning(f"⚠️ Health endpoint returned status {response.status_code}")
                 
         except requests.exceptions.ConnectionError as e:
             self.logger.error(f"❌ Connection failed to Convex backend: {e}")
@@ -214,4 +220,5 @@ class StatusReporter:
         except requests.exceptions.Timeout as e:
             self.logger.error(f"❌ Connection timeout to Convex backend: {e}")
         except Exception as e:
-            self.logger.error(f"❌ Unexpected error testing connectivity: {e}")
\ No newline at end of file
+            self.logger.error(f"❌ Unexpected error testing connectivity: {e}")
+        return False
\ No newline at end of file
@@ -8,8 +8,12 @@ import os
 import time
 import json
 
+from convex_client import ConvexClient
+
 def test_convex_connection():
     convex_url = os.environ.get('CONVEX_URL', 'http://convex-backend:3211')
+    # No retries: a connection test should report the first failure as it is
+    client = ConvexClient(convex_url, retries=0)
     
     print(f"🔍 Testing connection to Convex backend at: {convex_url}")
     print("=" * 60)
@@ -17,7 +21,7 @@ def test_convex_connection():
     # Test 1: Basic connectivity
     print("1. Testing basic connectivity...")
     try:
-        response = requests.get(f"{convex_url}/api/health", timeout=5)
+        response = client.get("/api/health")
         print(f"   ✅ Health endpoint: {response.status_code}")
         if response.status_code == 200:
             print(f"   Response: {response.json()}")
@@ -42,11 +46,7 @@ def test_convex_connection():
             "timestamp": int(time.time() * 1000)
         }
         
-        response = requests.post(
-            f"{convex_url}/updateServiceStatus",
-            json=test_payload,
-            timeout=10
-        )
+        response = client.post("/updateServiceStatus", json=test_payload)
         
         print(f"   Status update endpoint: {response.status_code}")
         if response.status_code == 200:
@@ -79,6 +79,14 @@ def test_convex_connection():
     except Exception as e:
         print(f"   ❌ Network test error: {e}")
     
+    # Test 4: Client metrics (latency and connection reuse across the requests above)
+    print("\n4. Client metrics...")
+    stats = client.get_stats()
+    print(f"   Connections: {stats['connections']}")
+    for endpoint, endpoint_stats in stats['endpoints'].items():
+        print(f"   {endpoint}: {endpoint_stats['requests']} requests, mean {endpoint_stats['mean_ms']} ms")
+    client.close()
+    
     print("\n" + "=" * 60)
     print("🎉 Connection test completed!")
     return True
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from batching import FixedTokenBudget, MicroBatcher, encode_length_bucketed, iter_batches, plan_length_buckets
+
+
+def test_iter_batches_splits_a_stream():
+    assert list(iter_batches(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_batches([], 3)) == []
+
+
+def test_plan_length_buckets_groups_and_sorts_by_length():
+    lengths = [600, 10, 40, 33, 5, 100]
+    assert plan_length_buckets(lengths, boundaries=(32, 64, 128)) == [[4, 1], [3, 2], [5], [0]]
+
+
+def test_encode_length_bucketed_returns_rows_in_input_order():
+    texts = ['aaaa', 'a', 'aaa', 'aa']
+    calls = []
+
+    def encode(batch):
+        calls.append(batch)
+        return [len(text) for text in batch]
+
+    rows = encode_length_bucketed(texts, [len(t) for t in texts], encode, FixedTokenBudget(8, 2), boundaries=(2,))
+    assert rows == [4, 1, 3, 2]
+    assert all(len(batch) <= 2 for batch in calls)
+
+
+def test_encode_length_bucketed_isolates_failing_texts():
+    texts = ['ok', 'bad', 'ok2', 'ok3']
+
+    def encode(batch):
+        if 'bad' in batch:
+            raise RuntimeError('out of memory')
+        return [text.upper() for text in batch]
+
+    rows = encode_length_bucketed(texts, [1] * len(texts), encode, FixedTokenBudget(64, 4))
+    assert rows == ['OK', None, 'OK2', 'OK3']
+
+
+def test_micro_batcher_shares_batches_between_callers():
+    batches = []
+    batcher = MicroBatcher(lambda texts: batches.append(list(texts)) or [t * 2 for t in texts],
+                           max_batch_size=8, max_wait_ms=50)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.__setitem__(n, batcher.encode([str(n)])[0]))
+               for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {n: str(n) * 2 for n in range(8)}
+    assert len(batches) < 8
+    assert batcher.get_stats()['items_encoded'] == 8
+    batcher.close()
+
+
+def test_micro_batcher_propagates_errors_and_encodes_directly_after_close():
+    def encode(texts):
+        if 'boom' in texts:
+            raise ValueError('boom')
+        return texts
+
+    batcher = MicroBatcher(encode, max_batch_size=4, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.encode(['boom'])
+    batcher.close()
+    assert batcher.encode(['a', 'b']) == ['a', 'b']
@@ -0,0 +1,78 @@
+import numpy as np
+
+from caching import ENTRY_OVERHEAD_BYTES, ChunkCache, EmbeddingCache, LRUByteCache
+
+
+def test_lru_evicts_least_recently_used_past_the_byte_budget():
+    cache = LRUByteCache(max_bytes=3 * (10 + ENTRY_OVERHEAD_BYTES))
+    for key in 'abc':
+        cache.put(key, key, 10)
+    cache.get('a')
+    cache.put('d', 'd', 10)
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_lru_skips_values_larger_than_the_budget():
+    cache = LRUByteCache(max_bytes=100)
+    cache.put('big', 'x', 1000)
+    assert cache.get('big') is None
+
+
+def test_embedding_cache_encodes_each_unique_miss_once(tmp_path):
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    cache = EmbeddingCache(1 << 20, disk_dir=str(tmp_path), max_disk_bytes=1 << 20)
+    first = cache.encode(['a', 'bb', 'a'], encode, 'model', normalize=True)
+    second = cache.encode(['bb', 'ccc'], encode, 'model', normalize=True)
+    assert encoded == ['a', 'bb', 'ccc']
+    np.testing.assert_array_equal(first[:, 0], [1, 2, 1])
+    np.testing.assert_array_equal(second[:, 0], [2, 3])
+
+    # The normalization flag and model are part of the key
+    cache.encode(['a'], encode, 'model', normalize=False)
+    cache.encode(['a'], encode, 'other', normalize=True)
+    assert encoded[-2:] == ['a', 'a']
+
+    # A fresh cache over the same directory serves earlier rows from disk
+    reopened = EmbeddingCache(1 << 20, disk_dir=str(tmp_path), max_disk_bytes=1 << 20)
+    np.testing.assert_array_equal(reopened.encode(['ccc'], encode, 'model', normalize=True)[:, 0], [3])
+    assert encoded.count('ccc') == 1
+
+
+def test_chunk_cache_key_covers_every_parameter():
+    key = ChunkCache.make_key('text', chunk_size=100, chunk_overlap=10)
+    assert key == ChunkCache.make_key('text', chunk_overlap=10, chunk_size=100)
+    assert key != ChunkCache.make_key('text', chunk_size=100, chunk_overlap=20)
+    assert key != ChunkCache.make_key('text!', chunk_size=100, chunk_overlap=10)
+
+
+def test_chunk_cache_stream_records_complete_streams_only():
+    cache = ChunkCache(1 << 20, max_entry_bytes=20)
+    assert list(cache.stream('small', lambda: iter(['a', 'b']))) == ['a', 'b']
+    assert list(cache.stream('small', lambda: iter(['never called']))) == ['a', 'b']
+
+    assert list(cache.stream('large', lambda: iter(['x' * 15, 'y' * 15]))) == ['x' * 15, 'y' * 15]
+    assert cache.get('large') is None
+    assert cache.get_stats()['too_large_to_cache'] == 1
+
+
+def test_disk_tier_does_not_serve_another_backends_vectors(tmp_path):
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    EmbeddingCache(1 << 20, disk_dir=str(tmp_path), max_disk_bytes=1 << 20).encode(
+        ['a'], encode, 'model@abc:torch', normalize=False
+    )
+    EmbeddingCache(1 << 20, disk_dir=str(tmp_path), max_disk_bytes=1 << 20).encode(
+        ['a'], encode, 'model@abc:onnx-int8', normalize=False
+    )
+    assert encoded == ['a', 'a']
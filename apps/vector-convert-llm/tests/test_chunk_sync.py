@@ -0,0 +1,104 @@
+from chunk_sync import ChunkEmbeddingWriter, StoredChunks, chunk_hash
+
+
+def stored(*texts, model='model'):
+    return [
+        {'embeddingId': f'e{index}', 'chunkIndex': index, 'chunkHash': chunk_hash(text, model)}
+        for index, text in enumerate(texts)
+    ]
+
+
+def claim_all(chunks, texts, model='model'):
+    return [chunks.claim(chunk_hash(text, model), index) for index, text in enumerate(texts)]
+
+
+def test_chunk_hash_depends_on_model_and_text():
+    assert chunk_hash('text', 'a') == chunk_hash('text', 'a')
+    assert chunk_hash('text', 'a') != chunk_hash('text', 'b')
+    assert chunk_hash('text', 'a') != chunk_hash('text ', 'a')
+
+
+def test_unchanged_document_keeps_every_chunk():
+    chunks = StoredChunks(stored('one', 'two', 'three'))
+    assert claim_all(chunks, ['one', 'two', 'three']) == [True, True, True]
+    assert chunks.reindex == []
+    assert chunks.stale() == []
+
+
+def test_edited_document_reindexes_moved_chunks_and_deactivates_removed_ones():
+    chunks = StoredChunks(stored('one', 'two', 'three'))
+    assert claim_all(chunks, ['new', 'one', 'three']) == [False, True, True]
+    assert chunks.reindex == [{'embeddingId': 'e0', 'chunkIndex': 1}]
+    assert chunks.stale() == ['e1']
+
+
+def test_repeated_chunks_are_each_claimed_once():
+    chunks = StoredChunks(stored('same', 'same'))
+    assert claim_all(chunks, ['same', 'same', 'same']) == [True, True, False]
+    assert chunks.stale() == []
+    assert chunk_hash('same', 'model') in chunks.kept_hashes
+
+
+def test_chunks_without_a_hash_or_from_another_model_never_match():
+    legacy = {'embeddingId': 'old', 'chunkIndex': 0}
+    chunks = StoredChunks([legacy] + stored('one', model='other'))
+    assert claim_all(chunks, ['one']) == [False]
+    assert sorted(chunks.stale()) == ['e0', 'old']
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = str(self.body)
+
+    def json(self):
+        return self.body
+
+
+class FakeConvex:
+    """Answers the batch endpoint with batch_status (or results) and single saves with an id"""
+
+    def __init__(self, batch_status=200):
+        self.batch_status = batch_status
+        self.posts = []
+
+    def post(self, url, json=None):
+        self.posts.append(url.rsplit('/', 1)[-1])
+        if url.endswith('createDocumentEmbeddingsBatch'):
+            if self.batch_status != 200:
+                return FakeResponse(self.batch_status)
+            # Every third embedding in a batch fails; the second is missing from the response
+            results = [
+                {'index': n, 'error': 'rejected'} if n % 3 == 2 else {'index': n, 'embeddingId': payload['chunkText']}
+                for n, payload in enumerate(json['embeddings']) if n != 1
+            ]
+            return FakeResponse(200, {'results': results})
+        return FakeResponse(201, {'embeddingId': json['chunkText']})
+
+
+def payloads(n):
+    return [{'chunkText': f'c{i}', 'chunkIndex': i} for i in range(n)]
+
+
+def test_batch_results_map_back_to_each_payload():
+    convex = FakeConvex()
+    outcomes = ChunkEmbeddingWriter(convex, batch_size=4).save('http://convex', payloads(6))
+    assert convex.posts == ['createDocumentEmbeddingsBatch'] * 2
+    assert outcomes == [
+        ('c0', None), (None, 'Missing from the batch response'), (None, 'rejected'), ('c3', None),
+        ('c4', None), (None, 'Missing from the batch response'),
+    ]
+
+
+def test_missing_batch_endpoint_falls_back_to_single_saves_for_good():
+    convex = FakeConvex(batch_status=404)
+    writer = ChunkEmbeddingWriter(convex, batch_size=2)
+    assert writer.save('http://convex', payloads(3)) == [('c0', None), ('c1', None), ('c2', None)]
+    assert not writer.batch_supported
+    assert convex.posts == ['createDocumentEmbeddingsBatch'] + ['createDocumentEmbedding'] * 3
+
+
+def test_failed_batch_fails_each_of_its_payloads():
+    outcomes = ChunkEmbeddingWriter(FakeConvex(batch_status=500), batch_size=4).save('http://convex', payloads(2))
+    assert [error.startswith('500') for _, error in outcomes] == [True, True]
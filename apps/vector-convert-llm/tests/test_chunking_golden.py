@@ -0,0 +1,51 @@
+"""
+Golden tests for the semantic chunker: its output must match the original
+implementation (kept verbatim in benchmark_chunker.py) byte for byte, and
+the streaming chunker must match chunk_document for every source type.
+"""
+
+import hashlib
+import io
+
+import pytest
+
+from benchmark_chunker import golden_corpus, legacy_semantic_chunk_document
+from chunking import chunk_document, semantic_chunk_document, stream_chunk_document
+
+# The corpus is generated from a fixed seed; the fingerprint catches any change to
+# the generator, which would silently change what these tests compare
+CORPUS_SHA256 = '2386f9679f12ff24fc3f6843112889b7c605f85f02bc284a14656c538aed634e'
+CORPUS = golden_corpus()
+STREAMING_CORPUS = golden_corpus(documents=60)
+
+
+def test_corpus_is_fixed():
+    digest = hashlib.sha256('\0'.join(CORPUS).encode('utf-8', errors='surrogatepass')).hexdigest()
+    assert len(CORPUS) == 314
+    assert digest == CORPUS_SHA256
+
+
+@pytest.mark.parametrize('max_chunk_size', [100, 500, 1000, 4000])
+def test_semantic_chunker_matches_original(max_chunk_size):
+    mismatches = [
+        index for index, document in enumerate(CORPUS)
+        if semantic_chunk_document(document, max_chunk_size) != legacy_semantic_chunk_document(document, max_chunk_size)
+    ]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('chunk_size', [300, 1000])
+@pytest.mark.parametrize('source', ['str', 'file', 'pieces', 'bytes'])
+def test_streaming_matches_chunk_document(chunk_size, source):
+    sources = {
+        'str': lambda document: document,
+        'file': io.StringIO,
+        'pieces': lambda document: (document[i:i + 97] for i in range(0, len(document), 97)),
+        'bytes': lambda document: io.BytesIO(document.encode('utf-8')),
+    }
+    mismatches = [
+        index for index, document in enumerate(STREAMING_CORPUS)
+        if list(stream_chunk_document(sources[source](document), "text", chunk_size, 200))
+        != chunk_document(document, "text", chunk_size, 200)
+    ]
+    assert mismatches == []
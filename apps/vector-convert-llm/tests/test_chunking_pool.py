@@ -0,0 +1,53 @@
+from chunking_pool import ChunkingPool, ChunkJob
+
+
+def jobs(count, size=50):
+    return [ChunkJob(n, f"Sentence number {n}. " * size, chunk_size=200, chunk_overlap=20) for n in range(count)]
+
+
+def test_in_process_chunking_yields_one_result_per_document():
+    pool = ChunkingPool(workers=0)
+    results = {result.document_id: result for result in pool.chunk_documents(jobs(5))}
+    assert sorted(results) == list(range(5))
+    assert all(result.error is None and result.chunks for result in results.values())
+    assert pool.get_stats()['documents_chunked'] == 5
+
+
+def test_cache_hits_skip_chunking():
+    class Cache(dict):
+        def put(self, key, chunks):
+            self[key] = chunks
+
+    cache = Cache()
+    pool = ChunkingPool(workers=0, cache=cache)
+    job = ChunkJob('a', 'some text ' * 50, cache_key='key')
+    first = next(pool.chunk_documents([job]))
+    second = next(pool.chunk_documents([job]))
+    assert second.chunks == first.chunks
+    assert pool.get_stats()['cache_hits'] == 1
+
+
+def test_failures_name_the_document_they_belong_to():
+    class BrokenCache:
+        def get(self, key):
+            if key == 'b':
+                raise OSError('disk gone')
+            return None
+
+        def put(self, key, chunks):
+            pass
+
+    pool = ChunkingPool(workers=0, cache=BrokenCache())
+    results = list(pool.chunk_documents([ChunkJob('a', 'text ' * 50, cache_key='a'),
+                                         ChunkJob('b', 'text ' * 50, cache_key='b')]))
+    assert [(result.document_id, result.error is None) for result in results] == [('a', True), ('b', False)]
+
+
+def test_a_broken_job_stream_is_reported_without_an_id():
+    def stream():
+        yield from jobs(1)
+        raise RuntimeError('fetch failed')
+
+    results = list(ChunkingPool(workers=0).chunk_documents(stream()))
+    assert results[0].document_id == 0 and results[0].error is None
+    assert results[1].document_id is None and 'fetch failed' in results[1].error
@@ -0,0 +1,61 @@
+import pytest
+import requests
+
+from convex_client import ConvexClient
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def client_with(outcomes):
+    """A client whose session replays outcomes (status codes or exceptions) and records each call"""
+    client = ConvexClient('http://convex.test', retries=2, backoff=0)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append((method, url))
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+    client.session.request = request
+    return client, calls
+
+
+def test_get_is_retried_until_it_succeeds():
+    client, calls = client_with([503, 502, 200])
+    assert client.get('/api/documents/abc').status_code == 200
+    assert len(calls) == 3
+    assert client.get_stats()['endpoints']['/api/documents/abc']['retries'] == 2
+
+
+def test_get_gives_up_after_the_configured_retries():
+    client, calls = client_with([requests.exceptions.ConnectionError('refused')])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get('/api/health')
+    assert len(calls) == 3
+
+
+def test_post_is_sent_once():
+    client, calls = client_with([503, 200])
+    assert client.post('/api/embeddings/createDocumentEmbedding', json={'documentId': 'a'}).status_code == 503
+    assert len(calls) == 1
+    client, calls = client_with([requests.exceptions.Timeout('read timed out'), 200])
+    with pytest.raises(requests.exceptions.Timeout):
+        client.post('/api/notifications', json={})
+    assert len(calls) == 1
+
+
+def test_post_marked_idempotent_is_retried():
+    client, calls = client_with([504, 200])
+    assert client.post('/api/embeddings/chunk-hashes', json={}, idempotent=True).status_code == 200
+    assert len(calls) == 2
+
+
+def test_client_errors_are_not_retried():
+    client, calls = client_with([404, 200])
+    assert client.get('/api/documents/missing').status_code == 404
+    assert len(calls) == 1
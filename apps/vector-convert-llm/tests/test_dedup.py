@@ -0,0 +1,62 @@
+import numpy as np
+
+from dedup import ChunkDeduplicator, MinHasher, NearDuplicateIndex
+
+BOILERPLATE = ("This message and any attachments are confidential and intended solely for the "
+               "addressee. If you received it in error please notify the sender and delete it. ")
+
+
+def deduplicator(threshold=0.8):
+    return ChunkDeduplicator(MinHasher(), NearDuplicateIndex(threshold), namespace='test')
+
+
+def fake_encode(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return [np.full(4, len(text), dtype=np.float32) for text in texts]
+    return encode
+
+
+def test_minhash_similarity_tracks_word_overlap():
+    hasher = MinHasher()
+    index = NearDuplicateIndex()
+    a = hasher.signature(BOILERPLATE + "Sent on Monday.")
+    b = hasher.signature(BOILERPLATE + "Sent on Tuesday.")
+    c = hasher.signature("A completely different sentence about vector search and chunking.")
+    assert index.similarity(a, b) > 0.8
+    assert index.similarity(a, c) < 0.2
+    assert hasher.signature("  !!  ") is None
+
+
+def test_near_duplicates_reuse_the_first_embedding():
+    calls = []
+    dedup = deduplicator()
+    chunks = [BOILERPLATE + "Sent on Monday.", "Unrelated text about indexing documents quickly.",
+              BOILERPLATE + "Sent on Tuesday."]
+    rows, repeats = dedup.encode(chunks, fake_encode(calls))
+    assert calls == [chunks[:2]]
+    assert repeats == [False, False, True]
+    np.testing.assert_array_equal(rows[2], rows[0])
+    assert dedup.as_dict()['reused_within_document'] == 1
+
+
+def test_index_is_shared_across_documents_but_not_namespaces():
+    hasher, index = MinHasher(), NearDuplicateIndex(0.8)
+    calls = []
+    ChunkDeduplicator(hasher, index, 'm').encode([BOILERPLATE + "One."], fake_encode(calls))
+    rows, repeats = ChunkDeduplicator(hasher, index, 'm').encode([BOILERPLATE + "Two."], fake_encode(calls))
+    assert len(calls) == 1
+    assert repeats == [False]
+    assert rows[0] is not None
+    ChunkDeduplicator(hasher, index, 'other').encode([BOILERPLATE + "Two."], fake_encode(calls))
+    assert len(calls) == 2
+
+
+def test_index_evicts_past_its_byte_budget():
+    hasher = MinHasher()
+    index = NearDuplicateIndex(0.9, max_bytes=2000)
+    for n in range(10):
+        index.add(hasher.signature(f"document number {n} with its own words {n * 7}"), np.zeros(4, dtype=np.float32))
+    stats = index.get_stats()
+    assert stats['bytes'] <= 2000
+    assert stats['evictions'] > 0
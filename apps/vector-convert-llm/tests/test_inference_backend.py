@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import inference_backend
+from inference_backend import TorchBackend, check_parity, create_backend
+
+
+class FakeModel:
+    """Stands in for a SentenceTransformer: one fixed unit vector per text length"""
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        vectors = np.array([[len(text), 1.0, 0.5] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def candidate_backend(flip=False, error=None):
+    class FakeCandidate(TorchBackend):
+        name = 'int8'
+
+        def __init__(self, model):
+            if error is not None:
+                raise error
+            super().__init__(model)
+
+        def encode(self, texts, **kwargs):
+            vectors = super().encode(texts, **kwargs)
+            return -vectors if flip else vectors
+    return FakeCandidate
+
+
+def test_parity_check_compares_per_text_cosines():
+    reference = TorchBackend(FakeModel())
+    assert check_parity(reference, reference)['passed']
+    flipped = check_parity(reference, candidate_backend(flip=True)(FakeModel()))
+    assert not flipped['passed']
+    assert flipped['min_cosine'] == pytest.approx(-1.0)
+
+
+def test_candidate_matching_torch_is_used(monkeypatch):
+    monkeypatch.setattr(inference_backend, 'QuantizedTorchBackend', candidate_backend())
+    backend, info = create_backend(FakeModel(), 'int8', 'fake', '/nonexistent')
+    assert backend.name == 'int8'
+    assert info['active'] == 'int8'
+
+
+def test_candidate_failing_parity_falls_back_to_torch(monkeypatch):
+    monkeypatch.setattr(inference_backend, 'QuantizedTorchBackend', candidate_backend(flip=True))
+    backend, info = create_backend(FakeModel(), 'int8', 'fake', '/nonexistent')
+    assert backend.name == 'torch'
+    assert info['active'] == 'torch'
+    assert not info['parity']['passed']
+    assert 'Parity check failed' in info['error']
+
+
+@pytest.mark.parametrize('error', [ImportError("no module named 'torch'"), RuntimeError('export failed')])
+def test_candidate_that_cannot_be_built_falls_back_to_torch(monkeypatch, error):
+    monkeypatch.setattr(inference_backend, 'QuantizedTorchBackend', candidate_backend(error=error))
+    backend, info = create_backend(FakeModel(), 'int8', 'fake', '/nonexistent')
+    assert backend.name == 'torch'
+    assert str(error) in info['error']
+
+
+def test_unknown_backend_falls_back_to_torch():
+    backend, info = create_backend(FakeModel(), 'tensorrt', 'fake', '/nonexistent')
+    assert backend.name == 'torch'
+    assert 'Unknown backend' in info['error']
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from jobs import FAILED, SUCCEEDED, JobManager, JobProgress, QueueFullError
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in (SUCCEEDED, FAILED):
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.005)
+
+
+def test_progress_counts_and_times_stages():
+    progress = JobProgress()
+    progress.add(chunks=2)
+    progress.add(chunks=3)
+    progress.set(saved=4)
+    assert list(progress.timed_iter('chunk', iter('ab'))) == ['a', 'b']
+    progress.attach('live', lambda: {'depth': 1})
+    snapshot = progress.snapshot()
+    assert snapshot['chunks'] == 5
+    assert snapshot['saved'] == 4
+    assert snapshot['stage'] == 'chunk'
+    assert 'chunk' in snapshot['stage_ms']
+    assert snapshot['live'] == {'depth': 1}
+
+
+def test_jobs_record_results_and_errors():
+    manager = JobManager(workers=1)
+    ok = manager.submit('embed', {'id': 1}, lambda job: ({'chunks': 3}, 200))
+    refused = manager.submit('embed', {'id': 2}, lambda job: ({'error': 'not found'}, 404))
+    crashed = manager.submit('embed', {'id': 3}, lambda job: 1 / 0)
+    for job in (ok, refused, crashed):
+        wait_for(job)
+    assert ok.status == SUCCEEDED and ok.result == {'chunks': 3}
+    assert refused.status == FAILED and refused.error == 'not found'
+    assert crashed.status == FAILED and 'division' in crashed.error
+    assert manager.get_stats()['succeeded'] == 1
+    assert manager.get_stats()['failed'] == 2
+    assert manager.get(ok.id) is ok
+
+
+def test_submissions_past_the_queue_limit_are_refused():
+    manager = JobManager(workers=1, max_queued=1)
+    release = threading.Event()
+    running = manager.submit('block', {}, lambda job: (release.wait(), ({}, 200))[1])
+    while running.started_at is None:
+        time.sleep(0.005)
+    manager.submit('queued', {}, lambda job: ({}, 200))
+    with pytest.raises(QueueFullError):
+        manager.submit('refused', {}, lambda job: ({}, 200))
+    assert manager.get_stats()['rejected'] == 1
+    release.set()
+    wait_for(running)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from lifecycle import DONE, FAILED, StartupLifecycle
+
+
+def wait_until_settled(lifecycle, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while any(phase['state'] not in (DONE, FAILED) for phase in lifecycle.get_stats()['phases'].values()):
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_ready_once_required_phases_succeed():
+    lifecycle = StartupLifecycle()
+    lifecycle.add_phase('model', lambda: True)
+    lifecycle.add_phase('convex', lambda: False, required=False)
+    assert not lifecycle.is_ready()
+    assert lifecycle.start()
+    assert not lifecycle.start()
+    wait_until_settled(lifecycle)
+    stats = lifecycle.get_stats()
+    assert lifecycle.is_ready()
+    assert stats['phases']['convex']['state'] == FAILED
+    assert stats['phases']['convex']['error'] == 'phase reported failure'
+
+
+def test_failed_required_phase_blocks_readiness():
+    lifecycle = StartupLifecycle()
+    lifecycle.add_phase('model', lambda: 1 / 0)
+    lifecycle.start()
+    wait_until_settled(lifecycle)
+    assert not lifecycle.is_ready()
+    assert 'division' in lifecycle.get_stats()['phases']['model']['error']
+
+
+def test_foreground_phase_runs_first_in_the_calling_thread():
+    seen = []
+    lifecycle = StartupLifecycle()
+    lifecycle.add_phase('background', lambda: seen.append('background'))
+    lifecycle.add_phase('foreground', lambda: seen.append((threading.current_thread(), threading.active_count())),
+                        foreground=True)
+    threads_before = threading.active_count()
+    lifecycle.start()
+    wait_until_settled(lifecycle)
+    assert seen[0] == (threading.current_thread(), threads_before)
+    assert seen[1] == 'background'
+
+
+def test_start_without_foreground_runs_every_phase_in_the_background():
+    seen = []
+    lifecycle = StartupLifecycle()
+    lifecycle.add_phase('model', lambda: seen.append(threading.current_thread()), foreground=True)
+    lifecycle.start(foreground=False)
+    wait_until_settled(lifecycle)
+    assert lifecycle.is_ready()
+    assert seen and seen[0] is not threading.current_thread()
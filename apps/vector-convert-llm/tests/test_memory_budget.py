@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+import memory_budget
+from memory_budget import AdaptiveBatchSizer, parse_memory_size
+
+MB = 1024 * 1024
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2G', 2 * 1024 * MB),
+    ('1.5g', int(1.5 * 1024 * MB)),
+    ('400M', 400 * MB),
+    ('512MiB', 512 * MB),
+    (' 64K ', 64 * 1024),
+    ('1048576', MB),
+    ('lots', None),
+    ('', None),
+])
+def test_parse_memory_size(value, expected):
+    assert parse_memory_size(value) == expected
+
+
+@pytest.fixture
+def sizer(monkeypatch):
+    """A sizer with 100 MB of headroom whose batches grow RSS by `growth` bytes"""
+    growth = {'bytes': 0}
+
+    class FakeSampler:
+        def __init__(self, process):
+            self.growth = growth['bytes']
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(memory_budget, '_PeakRssSampler', FakeSampler)
+    monkeypatch.setattr(AdaptiveBatchSizer, 'headroom_bytes', lambda self: 100 * MB)
+    sizer = AdaptiveBatchSizer(1024 * MB, initial_bytes_per_token=64 * 1024, max_batch_size=256, safety_factor=1.0)
+    sizer.growth = growth
+    return sizer
+
+
+def test_batches_grow_when_they_need_less_memory(sizer):
+    before = sizer.batch_size_for(100)
+    sizer.growth['bytes'] = 100 * 1024
+    for _ in range(10):
+        sizer.observe(16, 100, lambda: None)
+    assert sizer.batch_size_for(100) > before
+
+
+def test_batches_shrink_at_once_when_they_need_more_memory(sizer):
+    before = sizer.batch_size_for(100)
+    sizer.growth['bytes'] = 16 * 100 * 256 * 1024
+    assert sizer.observe(16, 100, lambda: 'done') == 'done'
+    assert sizer.bytes_per_token == 256 * 1024
+    assert sizer.batch_size_for(100) == before // 4
+
+
+def test_memory_errors_back_off(sizer):
+    before = sizer.batch_size_for(100)
+    sizer.shrink(before, 100, RuntimeError("CUDA out of memory"))
+    assert sizer.batch_size_for(100) == before // 2
+    sizer.shrink(before, 100, ValueError("bad input"))
+    assert sizer.get_stats()['memory_backoffs'] == 1
+
+
+def test_overlapping_batches_are_not_measured(sizer):
+    sizer.growth['bytes'] = 1024 * MB
+    entered, release = threading.Event(), threading.Event()
+
+    def measured_batch():
+        entered.set()
+        release.wait()
+
+    thread = threading.Thread(target=sizer.observe, args=(1, 1, measured_batch))
+    thread.start()
+    try:
+        entered.wait()
+        assert sizer.observe(1, 1, lambda: 'overlapping') == 'overlapping'
+    finally:
+        release.set()
+        thread.join()
+    stats = sizer.get_stats()
+    assert stats['batches_measured'] == 1
+    assert stats['batches_unmeasured'] == 1
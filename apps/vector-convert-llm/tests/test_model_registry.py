@@ -0,0 +1,56 @@
+import pytest
+
+from model_registry import LoadedModel, ModelLoadError, ModelRegistry, UnknownModelError
+
+MB = 1024 * 1024
+
+
+def fake_model(name, memory_mb=100):
+    return LoadedModel(name, model=object(), encoder=None, memory_bytes=memory_mb * MB)
+
+
+def registry(max_memory_mb=350):
+    loads = []
+
+    def loader(name):
+        loads.append(name)
+        return fake_model(name)
+
+    models = ModelRegistry(loader, 'default', ['a', 'b', 'c'], max_memory_bytes=max_memory_mb * MB)
+    models.register(fake_model('default'), pinned=True, default=True)
+    return models, loads
+
+
+def test_models_load_once_on_demand():
+    models, loads = registry()
+    assert models.get('a') is models.get('a')
+    assert loads == ['a']
+    with pytest.raises(UnknownModelError):
+        models.get('d')
+
+
+def test_least_recently_used_model_is_evicted_over_the_cap():
+    models, _ = registry()
+    models.get('a').last_used = 1
+    models.get('b').last_used = 2
+    models.get('a').last_used = 3
+    models.get('c')
+    loaded = models.get_stats()['loaded']
+    assert sorted(loaded) == ['a', 'c', 'default']
+    assert models.evictions == 1
+
+
+def test_pinned_default_is_never_evicted():
+    models, _ = registry(max_memory_mb=50)
+    models.peek('default').last_used = 0
+    models.get('a')
+    models.get('b')
+    assert models.peek('default') is not None
+    assert models.unload('default') is False
+    assert sorted(models.get_stats()['loaded']) == ['b', 'default']
+
+
+def test_default_model_is_never_loaded_on_demand():
+    models = ModelRegistry(lambda name: fake_model(name), 'default', ['a'])
+    with pytest.raises(ModelLoadError):
+        models.get()
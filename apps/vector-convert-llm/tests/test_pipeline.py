@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from pipeline import Pipeline
+
+
+def test_stages_transform_items_in_order():
+    pipeline = (Pipeline('test', queue_size=2)
+                .source('numbers', range(20))
+                .map('square', lambda n: n * n)
+                .stage('pairs', lambda items: (sum(pair) for pair in zip(items, items))))
+    assert list(pipeline.run()) == [a * a + b * b for a, b in zip(range(0, 20, 2), range(1, 20, 2))]
+    stats = pipeline.get_stats()
+    assert stats['failed_stage'] is None
+    assert stats['stages']['square']['items_in'] == 20
+    assert stats['stages']['pairs']['items_out'] == 10
+
+
+def test_stage_failure_is_reraised_and_reported():
+    def explode(n):
+        if n == 3:
+            raise ValueError('bad item')
+        return n
+
+    pipeline = Pipeline('test').source('numbers', range(10)).map('explode', explode)
+    with pytest.raises(ValueError, match='bad item'):
+        list(pipeline.run())
+    assert pipeline.get_stats()['failed_stage'] == 'explode'
+
+
+def test_bounded_queues_apply_backpressure():
+    produced = []
+
+    def source():
+        for n in range(100):
+            produced.append(n)
+            yield n
+
+    pipeline = Pipeline('test', queue_size=1).source('numbers', source()).map('identity', lambda n: n)
+    results = pipeline.run()
+    assert next(results) == 0
+    time.sleep(0.2)
+    # One item in hand per stage plus one per queue; nothing close to the whole source
+    assert len(produced) <= 6
+    results.close()
+
+
+def test_builder_validates_stage_order_and_names():
+    with pytest.raises(ValueError):
+        Pipeline('test').map('first', lambda n: n)
+    with pytest.raises(ValueError):
+        Pipeline('test').source('a', []).map('a', lambda n: n)
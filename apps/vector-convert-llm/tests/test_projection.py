@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from projection import PcaProjection, ProjectionStore, recall_at_k
+
+
+def sample(n=200, d=32, rank=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.normal(size=(n, rank)) @ rng.normal(size=(rank, d))).astype(np.float32)
+
+
+def test_fit_and_apply_reduce_to_normalized_vectors():
+    vectors = sample()
+    projection = PcaProjection.fit(vectors, 8, model='test')
+    projected = projection.apply(vectors)
+    assert projected.shape == (200, 8)
+    np.testing.assert_allclose(np.linalg.norm(projected, axis=1), 1.0, rtol=1e-5)
+    assert projection.apply(vectors[0]).shape == (8,)
+    assert projection.get_stats()['explained_variance'] > 0.99
+
+
+def test_fit_rejects_impossible_shapes():
+    with pytest.raises(ValueError):
+        PcaProjection.fit(sample(), 32)
+    with pytest.raises(ValueError):
+        PcaProjection.fit(sample(n=5), 8)
+    with pytest.raises(ValueError):
+        PcaProjection.fit(sample(), 8).apply(np.ones(16))
+
+
+def test_low_rank_data_keeps_its_neighbours():
+    vectors = sample()
+    projection = PcaProjection.fit(vectors, 8)
+    assert recall_at_k(vectors, vectors[:20], projection, k=5)['recall'] >= 0.9
+
+
+def test_store_persists_projections(tmp_path):
+    store = ProjectionStore(str(tmp_path))
+    projection = PcaProjection.fit(sample(), 8, model='org/model')
+    store.put('org/model', projection)
+    reloaded = ProjectionStore(str(tmp_path)).get('org/model')
+    np.testing.assert_allclose(reloaded.components, projection.components)
+    assert reloaded.metadata['model'] == 'org/model'
+    assert store.remove('org/model')
+    assert store.get('org/model') is None
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from quantization import BINARY, FLOAT, INT8, binary_search, output_size, pack_embeddings, quantize_binary, rescore, unpack_embedding
+
+
+def vectors(n=5, dimension=20, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dimension)).astype(np.float32)
+
+
+def test_float_round_trip_is_exact():
+    original = vectors()
+    packed = pack_embeddings(original, FLOAT)
+    assert np.array_equal(np.stack([unpack_embedding(row, FLOAT, 20) for row in packed]), original)
+
+
+def test_int8_round_trip_is_close():
+    original = vectors()
+    packed = pack_embeddings(original, INT8)
+    restored = np.stack([unpack_embedding(row, INT8, 20) for row in packed])
+    scales = np.abs(original).max(axis=1, keepdims=True) / 127.0
+    assert np.all(np.abs(restored - original) <= scales / 2 + 1e-6)
+
+
+def test_binary_round_trip_keeps_signs_and_trims_padding():
+    original = vectors()
+    packed = pack_embeddings(original, BINARY)
+    bits = np.stack([unpack_embedding(row, BINARY, 20) for row in packed])
+    assert bits.shape == (5, 20)
+    assert np.array_equal(bits, (original > 0).astype(np.uint8))
+    assert output_size(20, BINARY) == 3
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        pack_embeddings(vectors(), 'float16')
+
+
+def test_binary_search_orders_by_hamming_distance():
+    query = np.ones(16, dtype=np.float32)
+    corpus = np.ones((4, 16), dtype=np.float32)
+    corpus[0, :8] = -1   # 8 bits differ
+    corpus[1, :2] = -1   # 2 bits differ
+    corpus[3, :5] = -1   # 5 bits differ
+    indices = binary_search(quantize_binary(query)[0], quantize_binary(corpus), limit=3)
+    assert indices.tolist() == [2, 1, 3]
+
+
+def test_rescore_ranks_by_cosine_and_keeps_top_k():
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    candidates = np.array([[0.0, 1.0], [10.0, 1.0], [1.0, 1.0]], dtype=np.float32)
+    results = rescore(query, candidates, ['a', 'b', 'c'], top_k=2)
+    assert [result['id'] for result in results] == ['b', 'c']
+    assert results[0]['score'] > results[1]['score']
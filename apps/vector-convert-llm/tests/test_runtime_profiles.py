@@ -0,0 +1,51 @@
+import pytest
+
+import runtime_profiles
+from runtime_profiles import FULL, MINIMAL, OPTIMIZED, PROFILES, GarbageCollector, RuntimeProfile, select_profile
+
+
+@pytest.fixture
+def memory_limit(monkeypatch):
+    def set_limit(limit_bytes):
+        monkeypatch.setattr(runtime_profiles, 'detect_memory_limit', lambda: (limit_bytes, 'test'))
+    monkeypatch.delenv('RUNTIME_PROFILE', raising=False)
+    return set_limit
+
+
+@pytest.mark.parametrize('limit_mb, expected', [(512, MINIMAL), (1536, OPTIMIZED), (4096, FULL), (None, FULL)])
+def test_auto_picks_a_profile_from_the_memory_limit(memory_limit, limit_mb, expected):
+    memory_limit(limit_mb * 1024 * 1024 if limit_mb else None)
+    assert select_profile().name == expected
+
+
+def test_requested_profile_wins_over_auto(memory_limit, monkeypatch):
+    memory_limit(512 * 1024 * 1024)
+    monkeypatch.setenv('RUNTIME_PROFILE', 'full')
+    assert select_profile().name == FULL
+    with pytest.raises(ValueError):
+        select_profile('huge')
+
+
+def test_environment_overrides_profile_settings(monkeypatch):
+    profile = RuntimeProfile(MINIMAL, 'test')
+    monkeypatch.setenv('MICRO_BATCH_MAX_SIZE', '4')
+    assert profile.get('MICRO_BATCH_MAX_SIZE', '32') == '4'
+    assert profile.get('LAZY_MODEL_LOAD', 'false') == 'true'
+    assert profile.get('NOT_A_SETTING', 'default') == 'default'
+    assert profile.get_stats()['overridden'] == ['MICRO_BATCH_MAX_SIZE']
+
+
+def test_profiles_define_the_same_core_settings():
+    shared = set(PROFILES[FULL]) & set(PROFILES[OPTIMIZED]) & set(PROFILES[MINIMAL])
+    assert {'LAZY_MODEL_LOAD', 'GC_INTERVAL', 'DEFAULT_CHUNK_SIZE', 'CHUNKING_WORKERS'} <= shared
+
+
+def test_garbage_collector_runs_every_interval(monkeypatch):
+    collections = []
+    monkeypatch.setattr(runtime_profiles.gc, 'collect', lambda: collections.append(1))
+    collector = GarbageCollector(interval=3)
+    for _ in range(7):
+        collector.tick()
+    assert len(collections) == 2
+    GarbageCollector(interval=0).tick()
+    assert len(collections) == 2
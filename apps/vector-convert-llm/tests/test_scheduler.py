@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+
+def test_interactive_calls_run_ahead_of_queued_bulk_calls():
+    scheduler = PriorityScheduler(slots=1)
+    release = threading.Event()
+    order = []
+
+    blocker = threading.Thread(target=scheduler.run, args=(BULK, release.wait))
+    blocker.start()
+    while scheduler.get_stats()['active'] == 0:
+        time.sleep(0.001)
+
+    threads = [threading.Thread(target=scheduler.run, args=(BULK, lambda: order.append(BULK)))]
+    threads[0].start()
+    while scheduler.get_stats()['lanes'][BULK]['queue_depth'] == 0:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=scheduler.run, args=(INTERACTIVE, lambda: order.append(INTERACTIVE))))
+    threads[1].start()
+    while scheduler.get_stats()['lanes'][INTERACTIVE]['queue_depth'] == 0:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in [blocker] + threads:
+        thread.join()
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_run_returns_results_and_propagates_errors():
+    scheduler = PriorityScheduler()
+    assert scheduler.run(INTERACTIVE, lambda: 42) == 42
+    with pytest.raises(ZeroDivisionError):
+        scheduler.run(BULK, lambda: 1 / 0)
+    assert scheduler.get_stats()['active'] == 0
+    with pytest.raises(ValueError):
+        scheduler.run('unknown', lambda: None)
+
+
+def test_slots_bound_concurrency():
+    scheduler = PriorityScheduler(slots=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.run, args=(BULK, work)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
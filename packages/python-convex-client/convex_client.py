@@ -0,0 +1,265 @@
+"""
+Convex Client Module
+====================
+
+Pooled HTTP client for the Convex backend's HTTP actions.
+
+This is the single source for vector-convert-llm and lightweight-llm.
+Each app directory has a symlink to it for local runs. The Docker builds
+copy it from the "convex-client" build context, which docker-compose
+points at this directory.
+
+ConvexClient wraps one requests.Session. The keep-alive connection pool
+means chunk saves and status reports reuse open connections instead of
+paying for TCP (and TLS) setup on every call. On top of the session:
+
+  timeouts  (connect, read) seconds per endpoint, matched by path prefix,
+            with CONVEX_TIMEOUT as the read timeout for everything else
+  retries   idempotent calls (GET, plus POSTs marked idempotent=True) are
+            retried on connection errors, timeouts and 502/503/504. Each
+            retry waits a full-jitter exponential backoff. Other writes are
+            sent once, so a chunk is never inserted twice.
+  gzip      JSON bodies of at least CONVEX_GZIP_MIN_BYTES are sent with
+            Content-Encoding: gzip. It is off by default (0), because
+            whatever receives the request must decode it, such as a
+            reverse proxy in front of Convex.
+  metrics   requests, errors, retries and a latency histogram per
+            endpoint, plus the share of requests that reused a pooled
+            connection (from urllib3's own counters)
+
+Endpoints accept a path relative to the base URL or a full URL. Some
+routes still take a caller-supplied convex_url. Metrics group paths by
+route: long id-like segments are folded into ':id'.
+"""
+
+import gzip
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds by path prefix; the longest matching prefix wins
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    '/api/health': (3.0, 5.0),
+    '/updateServiceStatus': (3.0, 10.0),
+    '/api/documents': (5.0, 30.0),
+    '/api/embeddings/chunk-hashes': (5.0, 30.0),
+    '/api/embeddings/createDocumentEmbedding': (5.0, 30.0),
+    '/api/embeddings/createDocumentEmbeddingsBatch': (5.0, 60.0),
+    '/api/embeddings/sync-chunks': (5.0, 60.0),
+    '/api/notifications': (5.0, 15.0),
+}
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_ID_SEGMENT = re.compile(r'^[A-Za-z0-9_-]{20,}$')
+
+
+def endpoint_label(url: str) -> str:
+    """Route-level metrics label for a URL: its path with id-like segments folded to ':id'"""
+    path = urlsplit(url).path or '/'
+    return '/'.join(':id' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+class EndpointStats:
+    """Counts and latency histogram for one endpoint (updated under the client's lock)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, failed: bool):
+        self.requests += 1
+        self.errors += int(failed)
+        self.total_ms += elapsed_ms
+        for n, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[n] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ['inf']
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'mean_ms': round(self.total_ms / self.requests, 1) if self.requests else None,
+            'latency_histogram': dict(zip(labels, self.buckets))
+        }
+
+
+class ConvexClient:
+    """Keep-alive session for Convex HTTP actions with timeouts, retries, gzip and metrics"""
+
+    def __init__(self,
+                 base_url: str = '',
+                 pool_size: int = 16,
+                 default_timeout: float = 10.0,
+                 connect_timeout: float = 5.0,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 retries: int = 2,
+                 backoff: float = 0.25,
+                 gzip_min_bytes: int = 0):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = max(1, int(pool_size))
+        self.default_timeout = (float(connect_timeout), float(default_timeout))
+        self.timeouts = dict(DEFAULT_TIMEOUTS if timeouts is None else timeouts)
+        self.retries = max(0, int(retries))
+        self.backoff = max(0.0, float(backoff))
+        self.gzip_min_bytes = max(0, int(gzip_min_bytes))
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self.gzipped_requests = 0
+        self.gzip_bytes_saved = 0
+
+    @classmethod
+    def from_env(cls, base_url: Optional[str] = None, pool_size: Optional[int] = None) -> 'ConvexClient':
+        """Client configured from CONVEX_* environment variables"""
+        return cls(
+            base_url=base_url if base_url is not None else os.environ.get('CONVEX_URL', ''),
+            pool_size=pool_size if pool_size is not None else int(os.environ.get('CONVEX_POOL_SIZE', '16')),
+            default_timeout=float(os.environ.get('CONVEX_TIMEOUT', '10')),
+            connect_timeout=float(os.environ.get('CONVEX_CONNECT_TIMEOUT', '5')),
+            retries=int(os.environ.get('CONVEX_RETRIES', '2')),
+            backoff=float(os.environ.get('CONVEX_RETRY_BACKOFF', '0.25')),
+            gzip_min_bytes=int(os.environ.get('CONVEX_GZIP_MIN_BYTES', '0'))
+        )
+
+    def url_for(self, path: str) -> str:
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def timeout_for(self, url: str) -> Tuple[float, float]:
+        path = urlsplit(url).path
+        matches = [prefix for prefix in self.timeouts if path.startswith(prefix)]
+        return self.timeouts[max(matches, key=len)] if matches else self.default_timeout
+
+    def _body(self, payload: Any) -> Tuple[bytes, Dict[str, str]]:
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.gzip_min_bytes and len(body) >= self.gzip_min_bytes:
+            compressed = gzip.compress(body, compresslevel=5)
+            with self._lock:
+                self.gzipped_requests += 1
+                self.gzip_bytes_saved += len(body) - len(compressed)
+            body = compressed
+            headers['Content-Encoding'] = 'gzip'
+        return body, headers
+
+    def _stats_for(self, label: str) -> EndpointStats:
+        stats = self._endpoints.get(label)
+        if stats is None:
+            stats = self._endpoints[label] = EndpointStats()
+        return stats
+
+    def request(self,
+                method: str,
+                path: str,
+                json: Any = None,
+                params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[Any] = None,
+                idempotent: Optional[bool] = None) -> requests.Response:
+        """Send a request; returns the response for any status and raises requests exceptions like requests does"""
+        method = method.upper()
+        url = self.url_for(path)
+        label = endpoint_label(url)
+        if idempotent is None:
+            idempotent = method in ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+        if timeout is None:
+            timeout = self.timeout_for(url)
+        body, headers = self._body(json) if json is not None else (None, {})
+        attempts = self.retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, data=body, headers=headers, params=params, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(label, started, failed=True)
+                if attempt + 1 >= attempts:
+                    raise
+                self._wait_before_retry(label, attempt, e)
+                continue
+            except requests.exceptions.RequestException:
+                self._record(label, started, failed=True)
+                raise
+            retryable = response.status_code in RETRY_STATUSES
+            self._record(label, started, failed=response.status_code >= 500)
+            if not retryable or attempt + 1 >= attempts:
+                return response
+            self._wait_before_retry(label, attempt, f"HTTP {response.status_code}")
+        raise AssertionError("unreachable")
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, json: Any = None, **kwargs) -> requests.Response:
+        return self.request('POST', path, json=json, **kwargs)
+
+    def _record(self, label: str, started: float, failed: bool):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats_for(label).record(elapsed_ms, failed)
+
+    def _wait_before_retry(self, label: str, attempt: int, reason: Any):
+        # Full jitter: anywhere between zero and the exponential ceiling
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        with self._lock:
+            self._stats_for(label).retries += 1
+        logger.warning(f"⚠️ Convex {label} failed ({reason}); retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """Connections opened vs requests sent across the session's pools"""
+        opened = sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {
+            'pool_size': self.pool_size,
+            'connections_opened': opened,
+            'requests_sent': sent,
+            'reuse_rate': round(1 - opened / sent, 4) if sent else None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {label: stats.as_dict() for label, stats in sorted(self._endpoints.items())}
+            gzip_stats = {
+                'min_bytes': self.gzip_min_bytes,
+                'requests': self.gzipped_requests,
+                'bytes_saved': self.gzip_bytes_saved
+            }
+        return {
+            'base_url': self.base_url,
+            'retries': self.retries,
+            'connections': self.connection_stats(),
+            'gzip': gzip_stats,
+            'endpoints': endpoints
+        }
+
+    def close(self):
+        self.session.close()